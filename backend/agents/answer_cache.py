@@ -0,0 +1,149 @@
+"""
+Answer cache for product questions.
+
+Keyed on the normalized question, a hash of the product's scraped data, the
+model name and the prompt version, so an answer is reused only while all four
+are unchanged. Entries expire after a TTL; the in-memory layer is an LRU and
+the optional Mongo layer (ANSWER_CACHE_BACKEND=mongo) shares answers between
+processes. ScraperEngine invalidates a product's entries when a scrape lands.
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+ANSWER_CACHE_TTL = int(os.getenv("ANSWER_CACHE_TTL", "3600"))
+ANSWER_CACHE_MAX_ENTRIES = int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000"))
+ANSWER_CACHE_BACKEND = os.getenv("ANSWER_CACHE_BACKEND", "memory").lower()
+
+
+def normalize_question(question: str) -> str:
+    question = re.sub(r"\s+", " ", question or "").strip().lower()
+    return question.rstrip("?!. ")
+
+
+def data_version(product: dict) -> str:
+    """Hash of the scraped fields an answer depends on; changes whenever a scrape lands."""
+    fields = {key: product.get(key) for key in
+              ("title", "brand", "price", "rating", "specifications", "reviews", "review_count", "scraped_at")}
+    payload = json.dumps(fields, sort_keys=True, default=str)
+    return hashlib.sha1(payload.encode("utf-8")).hexdigest()
+
+
+def cache_key(question: str, version: str, model: str, prompt_version: str) -> str:
+    raw = "\x1f".join([normalize_question(question), version, model, prompt_version])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnswerCache:
+    def __init__(self, ttl: int = ANSWER_CACHE_TTL, max_entries: int = ANSWER_CACHE_MAX_ENTRIES,
+                 backend: str = ANSWER_CACHE_BACKEND, enabled: bool = ANSWER_CACHE_ENABLED, collection=None):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.backend = backend
+        self.enabled = enabled
+        self._collection = collection
+        self._index_ready = False
+        # key -> (expires_at monotonic, product_id, value)
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self.stats = {"hits": 0, "misses": 0, "mongo_hits": 0, "sets": 0, "evictions": 0, "invalidations": 0}
+
+    async def _mongo(self):
+        if self.backend != "mongo":
+            return None
+        if self._collection is None:
+            from ..db.database import answer_cache_collection
+            self._collection = answer_cache_collection
+        if not self._index_ready:
+            # Mongo drops expired documents on its own
+            await self._collection.create_index("expires_at", expireAfterSeconds=0)
+            await self._collection.create_index("product_id")
+            self._index_ready = True
+        return self._collection
+
+    def _remember(self, key: str, product_id: str, value: dict, ttl: float):
+        self._entries[key] = (time.monotonic() + ttl, product_id, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    async def get(self, key: str) -> Optional[dict]:
+        if not self.enabled:
+            return None
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.stats["hits"] += 1
+                return entry[2]
+            del self._entries[key]
+
+        if (collection := await self._mongo()) is not None:
+            try:
+                doc = await collection.find_one({"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}})
+            except Exception as e:
+                print(f"Error reading answer cache: {e}")
+                doc = None
+            if doc:
+                remaining = (doc["expires_at"].replace(tzinfo=timezone.utc) - datetime.now(timezone.utc)).total_seconds()
+                self._remember(key, doc["product_id"], doc["value"], max(remaining, 0))
+                self.stats["hits"] += 1
+                self.stats["mongo_hits"] += 1
+                return doc["value"]
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, product_id: str, value: dict) -> None:
+        """Store `value`; `product_id` is the tracked product, used for invalidation."""
+        if not self.enabled:
+            return
+        self._remember(key, product_id, value, self.ttl)
+        self.stats["sets"] += 1
+        if (collection := await self._mongo()) is not None:
+            try:
+                await collection.replace_one(
+                    {"_id": key},
+                    {"_id": key, "product_id": product_id, "value": value,
+                     "expires_at": datetime.now(timezone.utc) + timedelta(seconds=self.ttl)},
+                    upsert=True,
+                )
+            except Exception as e:
+                print(f"Error writing answer cache: {e}")
+
+    async def invalidate(self, product_id: Any) -> int:
+        """Drop every cached answer about a tracked product (a new scrape landed)."""
+        product_id = str(product_id)
+        stale = [key for key, entry in self._entries.items() if entry[1] == product_id]
+        for key in stale:
+            del self._entries[key]
+        removed = len(stale)
+        if (collection := await self._mongo()) is not None:
+            try:
+                removed += (await collection.delete_many({"product_id": product_id})).deleted_count
+            except Exception as e:
+                print(f"Error invalidating answer cache: {e}")
+        self.stats["invalidations"] += removed
+        return removed
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "entries": len(self._entries),
+            "enabled": self.enabled,
+            "backend": self.backend,
+            "ttl": self.ttl,
+            "max_entries": self.max_entries,
+        }
+
+
+answer_cache = AnswerCache()
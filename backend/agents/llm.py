@@ -0,0 +1,101 @@
+"""
+Shared LLM client.
+
+One OpenAIChatCompletionClient per process on top of a pooled, keep-alive httpx
+transport. It is opened on FastAPI startup and closed on shutdown instead of
+being torn down after every request. Calls go through `slot()`, which caps how
+many LLM requests run at once; timeouts and retries are handled by the OpenAI
+SDK underneath.
+"""
+
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import TYPE_CHECKING, Optional
+
+import httpx
+
+if TYPE_CHECKING:
+    from autogen_ext.models.openai import OpenAIChatCompletionClient
+
+LLM_MODEL = os.getenv("LLM_MODEL", "gpt-4o-mini")
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "3"))
+LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+
+
+class LLMClient:
+    def __init__(self, model: str = LLM_MODEL, timeout: float = LLM_TIMEOUT, max_retries: int = LLM_MAX_RETRIES,
+                 max_connections: int = LLM_MAX_CONNECTIONS, max_concurrency: int = LLM_MAX_CONCURRENCY):
+        self.model = model
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        self._http_client: Optional[httpx.AsyncClient] = None
+        self._client: Optional["OpenAIChatCompletionClient"] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self.stats = {"calls": 0, "in_flight": 0, "waits": 0, "errors": 0}
+
+    @property
+    def client(self) -> "OpenAIChatCompletionClient":
+        if self._client is None:
+            # Imported here: pulling in the OpenAI SDK is a noticeable part of cold start
+            from autogen_ext.models.openai import OpenAIChatCompletionClient
+            self._http_client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections,
+                                    max_keepalive_connections=self.max_connections),
+            )
+            self._client = OpenAIChatCompletionClient(
+                model=self.model,
+                timeout=self.timeout,
+                max_retries=self.max_retries,
+                http_client=self._http_client,
+            )
+        return self._client
+
+    async def start(self):
+        """Open the client at startup so the first ask doesn't pay for it."""
+        self.client
+        print(f"✅ LLM client ready (model={self.model}, max_concurrency={self.max_concurrency})")
+
+    @asynccontextmanager
+    async def slot(self):
+        """Hold one of the `max_concurrency` LLM call slots."""
+        # Created lazily so it binds to the running loop
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+        if self._slots.locked():
+            self.stats["waits"] += 1
+        async with self._slots:
+            self.stats["calls"] += 1
+            self.stats["in_flight"] += 1
+            try:
+                yield self.client
+            except Exception:
+                self.stats["errors"] += 1
+                raise
+            finally:
+                self.stats["in_flight"] -= 1
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "model": self.model,
+            "max_concurrency": self.max_concurrency,
+            "timeout": self.timeout,
+            "max_retries": self.max_retries,
+        }
+
+    async def close(self):
+        client, self._client = self._client, None
+        http_client, self._http_client = self._http_client, None
+        if client is not None:
+            await client.close()
+        if http_client is not None:
+            await http_client.aclose()
+
+
+llm = LLMClient()
@@ -0,0 +1,341 @@
+"""
+Persistent, incremental vector memory for product analysis.
+
+All products share one Chroma collection. Every chunk carries `product_id`
+metadata and a content-hash id, so indexing a product only embeds chunks that
+are new or changed, and queries only see the product being asked about. The
+agent of each request gets a ProductMemoryView pinned to its product (or the
+product in the current_product_id ContextVar), so concurrent askers never see
+or clear each other's vectors.
+
+Queries are hybrid (see retrieval.py): vector hits and a per-product BM25 index
+are fused with RRF, optionally reranked, and the number of chunks returned
+depends on the question type unless `k` is fixed.
+"""
+
+import asyncio
+import hashlib
+import os
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from autogen_core import CancellationToken
+from autogen_core.memory import Memory, MemoryContent, MemoryMimeType, MemoryQueryResult, UpdateContextResult
+from autogen_core.model_context import ChatCompletionContext
+from autogen_core.models import SystemMessage
+
+from .retrieval import CANDIDATE_MULTIPLIER, PINNED_TYPES, BM25Index, Reranker, k_for, query_type, \
+    reciprocal_rank_fusion
+
+EMBED_BATCH_SIZE = int(os.getenv("RAG_EMBED_BATCH_SIZE", "64"))
+EMBED_CONCURRENCY = int(os.getenv("RAG_EMBED_CONCURRENCY", "4"))
+# BM25 indexes (with every chunk text) kept in memory, least recently queried dropped first
+LEXICAL_CACHE_SIZE = int(os.getenv("RAG_LEXICAL_CACHE_SIZE", "100"))
+
+# Product the current request is about; set by rag_agent before running the agent
+current_product_id: ContextVar[Optional[str]] = ContextVar("current_product_id", default=None)
+
+Chunk = Tuple[str, Dict[str, Any]]
+
+
+def chunk_id(product_id: str, kind: str, text: str) -> str:
+    """Same product + type + text always gives the same id, so re-adding is a no-op."""
+    return hashlib.sha1(f"{product_id}\x1f{kind}\x1f{text}".encode("utf-8")).hexdigest()
+
+
+class ProductMemory(Memory):
+    """autogen Memory over a persistent Chroma collection, scoped per product."""
+
+    def __init__(self, persistence_path: Path, collection_name: str = "product_chunks",
+                 k: Optional[int] = None, score_threshold: float = 0.4, batch_size: Optional[int] = None,
+                 concurrency: Optional[int] = None, lexical_cache_size: int = LEXICAL_CACHE_SIZE):
+        self.persistence_path = Path(persistence_path)
+        self.collection_name = collection_name
+        # None: chunks per query follow the question type (RAG_K)
+        self.k = k
+        self.score_threshold = score_threshold
+        self._client = None
+        self._collection = None
+        self._embedding_function = None
+        # product_id -> ids of the chunks indexed last time, to skip unchanged products
+        self._synced: Dict[str, frozenset] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        # product_id -> (BM25 index, {chunk id: (document, metadata)}), rebuilt after a sync; an LRU
+        self._lexical: "OrderedDict[str, Tuple[BM25Index, Dict[str, Tuple[str, dict]]]]" = OrderedDict()
+        self.lexical_cache_size = lexical_cache_size
+        self.reranker = Reranker()
+        # Ingestion: chunks per embedding/add call and how many batches are embedded at once
+        self.batch_size = batch_size or EMBED_BATCH_SIZE
+        self.concurrency = concurrency or EMBED_CONCURRENCY
+        self.stats = {"chunks_embedded": 0, "batches": 0, "embed_seconds": 0.0}
+        self.retrieval_stats = {"queries": 0, "vector_only": 0, "lexical_only": 0, "both": 0, "pinned": 0,
+                                "reranked": 0}
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            import chromadb  # heavy; only needed once the first product is indexed or queried
+            from chromadb.utils import embedding_functions
+            self.persistence_path.mkdir(parents=True, exist_ok=True)
+            self._client = chromadb.PersistentClient(path=str(self.persistence_path))
+            # Chroma's default model, kept so add_chunks can embed outside collection.add
+            self._embedding_function = embedding_functions.DefaultEmbeddingFunction()
+            self._collection = self._client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"},
+                embedding_function=self._embedding_function,
+            )
+        return self._collection
+
+    # ---- indexing --------------------------------------------------------
+
+    async def add_chunks(self, ids: List[str], documents: List[str], metadatas: List[dict]) -> Dict[str, float]:
+        """Bulk-embed chunks in batches, several batches at a time, then insert them one batch after another."""
+        if not ids:
+            return {"chunks": 0, "batches": 0, "seconds": 0.0, "chunks_per_s": 0.0}
+        started = time.perf_counter()
+        slots = asyncio.Semaphore(self.concurrency)
+        collection = self.collection
+        embed = self._embedding_function
+
+        async def embed_batch(start: int):
+            async with slots:
+                # One model call per batch; the thread keeps the loop free
+                return await asyncio.to_thread(embed, documents[start:start + self.batch_size])
+
+        starts = range(0, len(ids), self.batch_size)
+        embeddings = await asyncio.gather(*(embed_batch(start) for start in starts))
+
+        def write():
+            # A single writer: concurrent adds to the persistent client aren't safe
+            for start, batch in zip(starts, embeddings):
+                end = start + self.batch_size
+                collection.add(ids=ids[start:end], documents=documents[start:end],
+                               metadatas=metadatas[start:end], embeddings=batch)
+
+        await asyncio.to_thread(write)
+
+        seconds = time.perf_counter() - started
+        rate = len(ids) / seconds if seconds else 0.0
+        self.stats["chunks_embedded"] += len(ids)
+        self.stats["batches"] += len(starts)
+        self.stats["embed_seconds"] += seconds
+        print(f"📥 Embedded {len(ids)} chunks in {len(starts)} batch(es), {seconds:.2f}s ({rate:.1f} chunks/s)")
+        return {"chunks": len(ids), "batches": len(starts), "seconds": seconds, "chunks_per_s": rate}
+
+    async def _sync(self, product_id: str, chunks: List[Chunk]) -> Dict[str, int]:
+        ids, documents, metadatas, seen = [], [], [], set()
+        for text, metadata in chunks:
+            cid = chunk_id(product_id, metadata.get("type", ""), text)
+            if cid in seen:
+                continue
+            seen.add(cid)
+            ids.append(cid)
+            documents.append(text)
+            metadatas.append({**metadata, "product_id": product_id})
+
+        stored_ids = await asyncio.to_thread(self.collection.get, where={"product_id": product_id}, include=[])
+        stored = set(stored_ids["ids"])
+        missing = [i for i, cid in enumerate(ids) if cid not in stored]
+        # Only these get embedded
+        await self.add_chunks([ids[i] for i in missing], [documents[i] for i in missing],
+                              [metadatas[i] for i in missing])
+        # Chunks whose text changed (price, specs...) leave their old version behind
+        stale = list(stored - seen)
+        if stale:
+            await asyncio.to_thread(self.collection.delete, ids=stale)
+        self._synced[product_id] = frozenset(ids)
+        self._lexical.pop(product_id, None)
+        return {"added": len(missing), "removed": len(stale), "unchanged": len(ids) - len(missing)}
+
+    async def index_product(self, product_id: str, chunks: List[Chunk]) -> Dict[str, int]:
+        """Make the stored chunks of `product_id` match `chunks`, embedding only new ones."""
+        ids = frozenset(chunk_id(product_id, m.get("type", ""), text) for text, m in chunks)
+        if self._synced.get(product_id) == ids:
+            return {"added": 0, "removed": 0, "unchanged": len(ids)}
+        lock = self._locks.setdefault(product_id, asyncio.Lock())
+        async with lock:
+            return await self._sync(product_id, chunks)
+
+    def metrics(self) -> dict:
+        seconds = self.stats["embed_seconds"]
+        return {
+            **self.stats,
+            "chunks_per_s": round(self.stats["chunks_embedded"] / seconds, 1) if seconds else 0.0,
+            "batch_size": self.batch_size,
+            "concurrency": self.concurrency,
+            "products_synced": len(self._synced),
+            "retrieval": {
+                **self.retrieval_stats,
+                "lexical_indexes": len(self._lexical),
+                "lexical_cache_size": self.lexical_cache_size,
+                "reranker": self.reranker.model_name if self.reranker.available else None,
+            },
+        }
+
+    # ---- retrieval ---------------------------------------------------------
+
+    async def _lexical_index(self, product_id: str) -> Tuple[BM25Index, Dict[str, Tuple[str, dict]]]:
+        """BM25 index over the product's stored chunks, built on first use after a sync."""
+        if product_id in self._lexical:
+            self._lexical.move_to_end(product_id)
+            return self._lexical[product_id]
+        stored = await asyncio.to_thread(self.collection.get, where={"product_id": product_id},
+                                         include=["documents", "metadatas"])
+        chunks = {cid: (document, metadata or {})
+                  for cid, document, metadata in zip(stored["ids"], stored["documents"], stored["metadatas"])}
+        index = (BM25Index(list(chunks), [doc for doc, _ in chunks.values()]), chunks)
+        self._lexical[product_id] = index
+        while len(self._lexical) > self.lexical_cache_size:
+            self._lexical.popitem(last=False)
+        return index
+
+    async def _vector_search(self, product_id: str, text: str, n: int) -> Dict[str, float]:
+        """Chunk id -> cosine similarity for vector hits above the score threshold, best first."""
+        def run():
+            return self.collection.query(
+                query_texts=[text],
+                n_results=n,
+                where={"product_id": product_id},
+                include=["distances"],
+            )
+
+        found = await asyncio.to_thread(run)
+        scores = {}
+        for cid, distance in zip(found["ids"][0], found["distances"][0]):
+            score = 1.0 - distance
+            if score >= self.score_threshold:
+                scores[cid] = score
+        return scores
+
+    # ---- autogen Memory interface ------------------------------------------
+
+    async def query(self, query: Union[str, MemoryContent], cancellation_token: Optional[CancellationToken] = None,
+                    **kwargs: Any) -> MemoryQueryResult:
+        product_id = kwargs.get("product_id") or current_product_id.get()
+        if product_id is None:
+            return MemoryQueryResult(results=[])
+        text = str(query.content if isinstance(query, MemoryContent) else query)
+        k = kwargs.get("k") or self.k or k_for(text)
+        n = k * CANDIDATE_MULTIPLIER
+
+        bm25, chunks = await self._lexical_index(product_id)
+        if not chunks:
+            return MemoryQueryResult(results=[])
+        vector = await self._vector_search(product_id, text, min(n, len(chunks)))
+        lexical = dict(bm25.search(text, n))
+        fused = reciprocal_rank_fusion([list(vector), list(lexical)])
+
+        # Price/spec questions always get the metadata/spec chunk, even when reviews outrank it
+        pinned_type, pinned_id = PINNED_TYPES.get(query_type(text)), None
+        if pinned_type and not any(chunks[cid][1].get("type") == pinned_type for cid, _ in fused[:k]):
+            pinned_id = next((cid for cid, (_, m) in chunks.items() if m.get("type") == pinned_type), None)
+            if pinned_id is not None:
+                self.retrieval_stats["pinned"] += 1
+
+        candidates = [cid for cid, _ in fused[:n] if cid in chunks and cid != pinned_id]
+        reranked = await asyncio.to_thread(self.reranker.rerank, text,
+                                           [(cid, chunks[cid][0]) for cid in candidates])
+        rerank_scores = {}
+        if reranked is not None:
+            self.retrieval_stats["reranked"] += 1
+            rerank_scores = dict(reranked)
+            candidates = [cid for cid, _ in reranked]
+        if pinned_id is not None:
+            candidates.insert(0, pinned_id)
+
+        self.retrieval_stats["queries"] += 1
+        fused_scores = dict(fused)
+        results = []
+        for cid in candidates[:k]:
+            document, metadata = chunks[cid]
+            source = "both" if cid in vector and cid in lexical else "vector_only" if cid in vector else "lexical_only"
+            if cid in vector or cid in lexical:
+                self.retrieval_stats[source] += 1
+            extra = {"score": vector.get(cid, 0.0), "bm25": lexical.get(cid, 0.0), "rrf": fused_scores.get(cid, 0.0)}
+            if cid in rerank_scores:
+                extra["rerank"] = rerank_scores[cid]
+            results.append(MemoryContent(
+                content=document,
+                mime_type=MemoryMimeType.TEXT,
+                metadata={**metadata, **extra},
+            ))
+        return MemoryQueryResult(results=results)
+
+    async def update_context(self, model_context: ChatCompletionContext,
+                             product_id: Optional[str] = None) -> UpdateContextResult:
+        messages = await model_context.get_messages()
+        if not messages:
+            return UpdateContextResult(memories=MemoryQueryResult(results=[]))
+
+        last_message = messages[-1]
+        query_text = last_message.content if isinstance(last_message.content, str) else str(last_message)
+        query_results = await self.query(query_text, product_id=product_id)
+        if query_results.results:
+            memory_strings = [f"{i}. {memory.content}" for i, memory in enumerate(query_results.results, 1)]
+            memory_context = "\nRelevant memory content:\n" + "\n".join(memory_strings)
+            await model_context.add_message(SystemMessage(content=memory_context))
+        return UpdateContextResult(memories=query_results)
+
+    async def add(self, content: MemoryContent, cancellation_token: Optional[CancellationToken] = None) -> None:
+        metadata = dict(content.metadata or {})
+        product_id = metadata.pop("product_id", None) or current_product_id.get()
+        if product_id is None:
+            raise ValueError("ProductMemory.add needs a product_id (metadata or current_product_id)")
+        text = str(content.content)
+        cid = chunk_id(product_id, metadata.get("type", ""), text)
+
+        def run():
+            self.collection.upsert(ids=[cid], documents=[text], metadatas=[{**metadata, "product_id": product_id}])
+
+        await asyncio.to_thread(run)
+        self._synced.pop(product_id, None)
+        self._lexical.pop(product_id, None)
+
+    def for_product(self, product_id: str) -> "ProductMemoryView":
+        """A per-request Memory bound to one product, sharing this store's Chroma client."""
+        return ProductMemoryView(self, product_id)
+
+    async def clear(self, product_id: Optional[str] = None) -> None:
+        """Remove the current product's chunks only; other products are left alone."""
+        product_id = product_id or current_product_id.get()
+        if product_id is None:
+            return
+        await asyncio.to_thread(self.collection.delete, where={"product_id": product_id})
+        self._synced.pop(product_id, None)
+        self._lexical.pop(product_id, None)
+
+    async def close(self) -> None:
+        self._collection = None
+        self._client = None
+
+
+class ProductMemoryView(Memory):
+    """Memory handed to one agent: every call is pinned to a single product."""
+
+    def __init__(self, store: ProductMemory, product_id: str):
+        self.store = store
+        self.product_id = product_id
+
+    async def query(self, query: Union[str, MemoryContent], cancellation_token: Optional[CancellationToken] = None,
+                    **kwargs: Any) -> MemoryQueryResult:
+        return await self.store.query(query, cancellation_token, **{**kwargs, "product_id": self.product_id})
+
+    async def update_context(self, model_context: ChatCompletionContext) -> UpdateContextResult:
+        return await self.store.update_context(model_context, product_id=self.product_id)
+
+    async def add(self, content: MemoryContent, cancellation_token: Optional[CancellationToken] = None) -> None:
+        metadata = {**(content.metadata or {}), "product_id": self.product_id}
+        await self.store.add(MemoryContent(content=content.content, mime_type=content.mime_type, metadata=metadata),
+                             cancellation_token)
+
+    async def clear(self) -> None:
+        await self.store.clear(self.product_id)
+
+    async def close(self) -> None:
+        # The Chroma client is shared; the store owns it
+        pass
+
@@ -5,48 +5,51 @@ Analyzes product data using vector storage and LLM capabilities.
 
 import os
 from pathlib import Path
-from typing import List, Dict
+import json
+from typing import Any, AsyncIterator, List, Dict, Optional, Tuple
 from datetime import datetime, timezone
 from bson import ObjectId
-import tiktoken
 from dotenv import load_dotenv
 from pydantic import BaseModel, Field
 
 from autogen_agentchat.agents import AssistantAgent
-from autogen_agentchat.messages import TextMessage
-from autogen_core.memory import MemoryContent, MemoryMimeType
-from autogen_ext.memory.chromadb import ChromaDBVectorMemory, PersistentChromaDBVectorMemoryConfig
-from autogen_ext.models.openai import OpenAIChatCompletionClient
+from autogen_agentchat.base import TaskResult
+from autogen_agentchat.messages import MemoryQueryEvent, ModelClientStreamingChunkEvent, TextMessage
 from autogen_agentchat.ui import Console
 
 from ..utils.mongo import PyObjectId
 from ..db.database import scraped_results_collection
-from ..models.report import SummaryReportModel
+from ..db.review_store import review_store
+from ..models.report import SummaryReportModel, SummaryReportResponse
+from .product_memory import ProductMemory, current_product_id
+from ..utils.chunking import chunk_texts
+from .answer_cache import answer_cache, cache_key, data_version
+from .semantic_cache import SemanticQuestionCache
+from .llm import llm
 # Load environment variables
 load_dotenv()
 
 # Setup paths and configurations
+# Created by the Chroma stores on first use, not at import
 CHROMA_DB_PATH = Path("./data/chroma_db")
-CHROMA_DB_PATH.mkdir(parents=True, exist_ok=True)
-
-# Initialize vector memory
-vector_memory = ChromaDBVectorMemory(
-    config=PersistentChromaDBVectorMemoryConfig(
-        collection_name="product_reviews",
-        persistence_path=str(CHROMA_DB_PATH),
-        k=3,
-        score_threshold=0.4
-    )
+
+# One persistent collection for all products; chunks are keyed by content hash
+# and filtered by product_id, so nothing is cleared or re-embedded per question.
+# Retrieval is hybrid (vector + BM25); how many chunks a question gets depends on its type (RAG_K)
+vector_memory = ProductMemory(
+    persistence_path=CHROMA_DB_PATH,
+    collection_name="product_chunks",
+    score_threshold=float(os.getenv("RAG_SCORE_THRESHOLD", "0.25"))
 )
 
-# Initialize LLM client and assistant
-model_client = OpenAIChatCompletionClient(model="gpt-4o-mini")
-assistant = AssistantAgent(
-    name="product_analyst",
-    model_client=model_client,
-    memory=[vector_memory],
-    output_content_type=SummaryReportModel,
-    system_message="""
+# Re-worded repeats of earlier questions reuse their answers
+semantic_cache = SemanticQuestionCache(persistence_path=CHROMA_DB_PATH)
+
+# Cached answers are keyed on these; bump PROMPT_VERSION whenever the system prompt changes
+MODEL_NAME = llm.model
+PROMPT_VERSION = "1"
+
+SYSTEM_MESSAGE = """
     You are a Product Intelligence Agent for e-commerce sellers.
 
 Your task is to analyze the given product data—including customer reviews, specifications, pricing information, and feature comparisons—and generate a structured and concise competitive summary. Your analysis should help sellers make better product, pricing, or marketing decisions.
@@ -61,32 +64,35 @@ Always think from the perspective of an e-commerce seller trying to understand:
 Your output must be structured
 Be objective. Avoid vague language. Use insights extracted from the reviews and product data only.
 """
-)
 
 
-def chunk_text(text: str, max_tokens: int = 400) -> List[str]:
-    """Split text into chunks of approximately max_tokens length."""
-    tokenizer = tiktoken.get_encoding("cl100k_base")
-    tokens = tokenizer.encode(text)
-    return [tokenizer.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+def build_assistant(product_id: str, stream: bool = False) -> AssistantAgent:
+    """A fresh agent per request: its own chat state and a memory pinned to one product.
 
-async def load_product_data(product_id: str) -> None:
-    """Load product data into vector memory for analysis."""
-    # Clear previous data
-    await vector_memory.clear()
-    
-    # Get product data
-    product = scraped_results_collection.find_one({"_id": ObjectId(product_id)})
-    if not product:
-        raise ValueError("No product data found")
+    Only the heavy pieces are shared - the pooled LLM client (agents/llm.py) and
+    the Chroma client behind vector_memory - so building one is cheap.
+    """
+    return AssistantAgent(
+        name="product_analyst",
+        model_client=llm.client,
+        memory=[vector_memory.for_product(product_id)],
+        output_content_type=SummaryReportModel,
+        system_message=SYSTEM_MESSAGE,
+        # Emit partial model output as ModelClientStreamingChunkEvent (streaming endpoint)
+        model_client_stream=stream,
+    )
+
+
+def product_chunks(product: dict, reviews: Optional[List[Any]] = None) -> List[Tuple[str, dict]]:
+    """Specs, metadata and review chunks of a scraped product as (text, metadata) pairs.
+
+    `reviews` defaults to any still embedded in the document.
+    """
+    chunks = []
 
     # Add specifications
     if specs := product.get("specifications"):
-        await vector_memory.add(MemoryContent(
-            content=str(specs),
-            mime_type=MemoryMimeType.TEXT,
-            metadata={"type": "specifications", "product_id": product_id}
-        ))
+        chunks.append((str(specs), {"type": "specifications"}))
 
     # Add metadata
     metadata = {
@@ -95,111 +101,224 @@ async def load_product_data(product_id: str) -> None:
         "price": product.get("price", ""),
         "rating": product.get("rating", "")
     }
-    await vector_memory.add(MemoryContent(
-        content=str(metadata),
-        mime_type=MemoryMimeType.TEXT,
-        metadata={"type": "metadata", "product_id": product_id}
-    ))
-
-    # Add reviews
-    if reviews := product.get("reviews"):
-        for idx, review in enumerate(reviews):
-            review_text = review.get("body", str(review)) if isinstance(review, dict) else str(review)
-            for chunk_idx, chunk in enumerate(chunk_text(review_text)):
-                await vector_memory.add(MemoryContent(
-                    content=chunk,
-                    mime_type=MemoryMimeType.TEXT,
-                    metadata={
-                        "type": "review",
-                        "product_id": product_id,
-                        "review_index": idx,
-                        "chunk_index": chunk_idx
-                    }
-                ))
-
-async def analyze_product(query: str, product_id: str) -> SummaryReportModel:
-    """Analyze product data and return structured insights."""
-    try:
-        # Load product data into memory
-        await load_product_data(product_id)
-
-        # Get analysis from LLM
-        result = await assistant.run(task=query)
-        # Try to extract the content from the last message
-        last_msg = result.messages[-1]
-        content = getattr(last_msg, 'content', None)
-        if content is None:
-            # Try 'data' or fallback to the whole message
-            content = getattr(last_msg, 'data', last_msg)
-        print("🤖 LLM Response:", content)
-        # If content is a dict, try to build SummaryReportModel
-        if isinstance(content, dict):
-            content = SummaryReportModel(**content)
-        if not isinstance(content, SummaryReportModel):
-            print("❌ Unexpected message format (not a StructuredMessage).")
-            # Return a default model with minimal info to avoid type error
-            from ..utils.mongo import PyObjectId
-            # Only return if product_id is valid PyObjectId, else raise
-            pid = PyObjectId(product_id)
-            return SummaryReportModel(
-                product_id=pid,
-                buy_or_skip="neutral",
-                pros=[],
-                cons=[],
-                feature_gaps=[],
-                pricing_summary="",
-                platform_recommendation="",
-                generated_by="",
-                generated_at=datetime.now(timezone.utc)
-            )
-       
-        # Print structured fields
-        print("🧠 product_id:", content.product_id)
-        print("💰 buy_or_skip:", content.buy_or_skip)
-        print("📝 pros:", content.pros)
-        print("📝 cons:", content.cons)
-        print("📝 feature_gaps:", content.feature_gaps)
-        print("💰 pricing_summary:", content.pricing_summary)
-        print("🔍 platform_recommendation:", content.platform_recommendation)
-        print("🤖 generated_by:", content.generated_by)
-        print("🕰️ generated_at:", content.generated_at)
-        
-        # Ensure product_id is a PyObjectId
+    chunks.append((str(metadata), {"type": "metadata"}))
+
+    # Add reviews, all chunked with one batched encode
+    if reviews is None:
+        reviews = product.get("reviews")
+    if reviews:
+        review_texts = [review.get("body", str(review)) if isinstance(review, dict) else str(review)
+                        for review in reviews]
+        for idx, review_chunks in enumerate(chunk_texts(review_texts, max_tokens=400)):
+            for chunk_idx, chunk in enumerate(review_chunks):
+                chunks.append((chunk, {"type": "review", "review_index": idx, "chunk_index": chunk_idx}))
+    return chunks
+
+async def load_product_data(product_id: str, product: Optional[dict] = None) -> None:
+    """Index the product's chunks; only new or changed ones are embedded."""
+    if product is None:
+        product = await scraped_results_collection.find_one({"_id": ObjectId(product_id)})
+    if not product:
+        raise ValueError("No product data found")
+
+    # Reviews come from the product's review buckets (plus any not migrated out of the doc yet)
+    reviews = await review_store.reviews_for(product)
+    stats = await vector_memory.index_product(product_id, product_chunks(product, reviews))
+    print(f"📚 Indexed product {product_id}: {stats}")
+
+def _answer_keys(query: str, product_id: str, product: dict) -> dict:
+    """Cache keys for this question about this version of the product data."""
+    version = data_version(product)
+    return {
+        "version": version,
+        "key": cache_key(query, version, MODEL_NAME, PROMPT_VERSION),
+        "tracked_id": str(product.get("product_id", product_id)),
+    }
+
+async def _cached_report(query: str, product_id: str, keys: dict) -> Optional[SummaryReportResponse]:
+    # Same question about unchanged data with the same model/prompt: reuse the answer
+    if (cached := await answer_cache.get(keys["key"])) is not None:
+        print(f"⚡ Answer cache hit for {product_id}")
+        return SummaryReportResponse(**cached, cached=True)
+    # Same question in different words?
+    cached = await semantic_cache.get(query, product_id, keys["version"], MODEL_NAME, PROMPT_VERSION)
+    if cached is not None:
+        await answer_cache.set(keys["key"], keys["tracked_id"], cached)
+        return SummaryReportResponse(**cached, cached=True)
+    return None
+
+def _message_content(result):
+    # Try to extract the content from the last message
+    last_msg = result.messages[-1]
+    content = getattr(last_msg, 'content', None)
+    if content is None:
+        # Try 'data' or fallback to the whole message
+        content = getattr(last_msg, 'data', last_msg)
+    return content
+
+async def _finalize_report(content, query: str, product_id: str, keys: dict) -> SummaryReportResponse:
+    """Validate the agent's output, save it to reports and fill the answer caches."""
+    print("🤖 LLM Response:", content)
+    # If content is a dict, try to build SummaryReportModel
+    if isinstance(content, dict):
+        content = SummaryReportModel(**content)
+    if not isinstance(content, SummaryReportModel):
+        print("❌ Unexpected message format (not a StructuredMessage).")
+        # Return a default model with minimal info to avoid type error
         from ..utils.mongo import PyObjectId
-        pid = getattr(content, 'product_id', None)
-        if not isinstance(pid, PyObjectId):
-            try:
-                pid = PyObjectId(pid)
-            except Exception:
-                pid = PyObjectId(product_id)
-                
-        report = SummaryReportModel(
+        # Only return if product_id is valid PyObjectId, else raise
+        pid = PyObjectId(product_id)
+        return SummaryReportResponse(
             product_id=pid,
-            buy_or_skip=content.buy_or_skip,
-            pros=content.pros,
-            cons=content.cons,
-            feature_gaps=content.feature_gaps,
-            pricing_summary=content.pricing_summary,
-            platform_recommendation=content.platform_recommendation,
-            generated_by=content.generated_by,
-            generated_at=getattr(content, 'generated_at', datetime.now(timezone.utc)),
-            summary=getattr(content, 'summary', None),
-            strengths=getattr(content, 'strengths', content.pros if hasattr(content, 'pros') else None),
-            improvement_opportunities=getattr(content, 'improvement_opportunities', content.feature_gaps if hasattr(content, 'feature_gaps') else None),
-            recommendations=getattr(content, 'recommendations', None)
+            buy_or_skip="neutral",
+            pros=[],
+            cons=[],
+            feature_gaps=[],
+            pricing_summary="",
+            platform_recommendation="",
+            generated_by="",
+            generated_at=datetime.now(timezone.utc)
         )
-        # Save to reports_collection (upsert by product_id)
-        from ..db.database import reports_collection
-        reports_collection.replace_one(
-            {"product_id": pid},
-            report.model_dump(by_alias=True),
-            upsert=True
-        )
-        return report
-        
+
+    # Print structured fields
+    print("🧠 product_id:", content.product_id)
+    print("💰 buy_or_skip:", content.buy_or_skip)
+    print("📝 pros:", content.pros)
+    print("📝 cons:", content.cons)
+    print("📝 feature_gaps:", content.feature_gaps)
+    print("💰 pricing_summary:", content.pricing_summary)
+    print("🔍 platform_recommendation:", content.platform_recommendation)
+    print("🤖 generated_by:", content.generated_by)
+    print("🕰️ generated_at:", content.generated_at)
+
+    # Ensure product_id is a PyObjectId
+    from ..utils.mongo import PyObjectId
+    pid = getattr(content, 'product_id', None)
+    if not isinstance(pid, PyObjectId):
+        try:
+            pid = PyObjectId(pid)
+        except Exception:
+            pid = PyObjectId(product_id)
+
+    report = SummaryReportModel(
+        product_id=pid,
+        buy_or_skip=content.buy_or_skip,
+        pros=content.pros,
+        cons=content.cons,
+        feature_gaps=content.feature_gaps,
+        pricing_summary=content.pricing_summary,
+        platform_recommendation=content.platform_recommendation,
+        generated_by=content.generated_by,
+        generated_at=getattr(content, 'generated_at', datetime.now(timezone.utc)),
+        summary=getattr(content, 'summary', None),
+        strengths=getattr(content, 'strengths', content.pros if hasattr(content, 'pros') else None),
+        improvement_opportunities=getattr(content, 'improvement_opportunities', content.feature_gaps if hasattr(content, 'feature_gaps') else None),
+        recommendations=getattr(content, 'recommendations', None)
+    )
+    # Save to reports_collection (upsert by product_id)
+    from ..db.database import reports_collection
+    await reports_collection.replace_one(
+        {"product_id": pid},
+        report.model_dump(by_alias=True),
+        upsert=True
+    )
+    answer = report.model_dump(by_alias=True)
+    await answer_cache.set(keys["key"], keys["tracked_id"], answer)
+    await semantic_cache.set(keys["key"], query, product_id, keys["version"], MODEL_NAME, PROMPT_VERSION, answer)
+    return SummaryReportResponse(**answer)
+
+async def _get_product(product_id: str) -> dict:
+    product = await scraped_results_collection.find_one({"_id": ObjectId(product_id)})
+    if not product:
+        raise ValueError("No product data found")
+    return product
+
+async def analyze_product(query: str, product_id: str) -> SummaryReportResponse:
+    """Analyze product data and return structured insights."""
+    # Scope memory queries to this product for the rest of this request
+    token = current_product_id.set(product_id)
+    try:
+        product = await _get_product(product_id)
+        keys = _answer_keys(query, product_id, product)
+        if (cached := await _cached_report(query, product_id, keys)) is not None:
+            return cached
+
+        # Load product data into memory
+        await load_product_data(product_id, product)
+
+        # Get analysis from LLM (bounded by the shared client's concurrency limit)
+        assistant = build_assistant(product_id)
+        async with llm.slot():
+            result = await assistant.run(task=query)
+        return await _finalize_report(_message_content(result), query, product_id, keys)
+
     except Exception as e:
         raise Exception(f"error: {str(e)}")
     finally:
-        await model_client.close()
+        current_product_id.reset(token)
+
+def completed_fields(buffer: str) -> Dict[str, Any]:
+    """Top-level fields of a JSON object that are already complete in a partial stream.
+
+    '{"buy_or_skip": "buy", "pros": ["Gre' -> {"buy_or_skip": "buy"}
+    """
+    decoder = json.JSONDecoder()
+    fields = {}
+    start = buffer.find("{")
+    if start < 0:
+        return fields
+    pos = start + 1
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+        try:
+            key, pos = decoder.raw_decode(buffer, pos)
+            while pos < len(buffer) and buffer[pos] in " \t\r\n:":
+                pos += 1
+            value, end = decoder.raw_decode(buffer, pos)
+        except ValueError:
+            return fields
+        # A bare number at the very end may still be growing ("4" -> "42")
+        if end >= len(buffer) and isinstance(value, (int, float)):
+            return fields
+        fields[key] = value
+        pos = end
+
+async def analyze_product_stream(query: str, product_id: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Same analysis as analyze_product, yielded as (event, data) pairs while it runs.
+
+    Events: "retrieval" (memory chunks used as context), "field" (one report
+    field as soon as the model has finished generating it), then "report": the
+    validated report plus its `cached` flag (the only event on a cache hit).
+    """
+    product = await _get_product(product_id)
+    keys = _answer_keys(query, product_id, product)
+    if (cached := await _cached_report(query, product_id, keys)) is not None:
+        yield "report", cached.model_dump(mode="json", by_alias=True)
+        return
+
+    await load_product_data(product_id, product)
+
+    assistant = build_assistant(product_id, stream=True)
+    buffer, sent, result = "", set(), None
+    async with llm.slot():
+        async for event in assistant.run_stream(task=query):
+            if isinstance(event, MemoryQueryEvent):
+                yield "retrieval", {"results": [
+                    {"content": str(memory.content), "metadata": memory.metadata or {}} for memory in event.content
+                ]}
+            elif isinstance(event, ModelClientStreamingChunkEvent):
+                buffer += event.content
+                for name, value in completed_fields(buffer).items():
+                    if name not in sent:
+                        sent.add(name)
+                        yield "field", {"name": name, "value": value}
+            elif isinstance(event, TaskResult):
+                result = event
+
+    if result is None:
+        raise ValueError("Agent finished without a result")
+    report = await _finalize_report(_message_content(result), query, product_id, keys)
+    yield "report", report.model_dump(mode="json", by_alias=True)
 
 # --- End of file ---
\ No newline at end of file
@@ -0,0 +1,141 @@
+"""
+Hybrid retrieval helpers for the product analyst.
+
+A small in-process BM25 index over a product's chunks complements the vector
+search (exact terms like model numbers, "battery", "refund" are matched
+lexically), the two ranked lists are merged with reciprocal rank fusion, and an
+optional local cross-encoder reranks the fused candidates. How many chunks the
+LLM gets depends on the kind of question (RAG_K).
+"""
+
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Query type -> number of chunks handed to the LLM
+DEFAULT_K = "summary=12,reviews=10,specs=6,pricing=4,default=8"
+RERANKER_MODEL = os.getenv("RAG_RERANKER", "")  # e.g. cross-encoder/ms-marco-MiniLM-L-6-v2
+RRF_K = int(os.getenv("RAG_RRF_K", "60"))
+# How many candidates each retriever contributes per returned chunk
+CANDIDATE_MULTIPLIER = int(os.getenv("RAG_CANDIDATE_MULTIPLIER", "3"))
+
+TOKEN = re.compile(r"[a-z0-9]+(?:[.'][a-z0-9]+)*")
+STOPWORDS = {
+    "a", "an", "and", "are", "as", "at", "be", "but", "by", "for", "from", "has", "have", "i", "in", "is",
+    "it", "its", "of", "on", "or", "so", "that", "the", "this", "to", "was", "were", "with", "what", "how",
+    "do", "does", "did", "my", "me", "you", "your", "they", "them", "there", "about",
+}
+
+QUERY_TYPES = [
+    ("pricing", re.compile(r"\b(price|pricing|cost|cheap|expensive|worth|deal|discount|value for money)\b")),
+    ("specs", re.compile(r"\b(spec|specs|specification|feature|features|dimension|weight|size|battery|storage|ram|display|material)\b")),
+    ("summary", re.compile(r"\b(summary|summari[sz]e|overall|should i|buy|recommend|pros|cons|strengths|weakness)")),
+    ("reviews", re.compile(r"\b(review|reviews|customers?|users?|complain|complaints|like|dislike|opinion)\b")),
+]
+
+# Chunk types worth pinning into the context for a query type
+PINNED_TYPES = {"pricing": "metadata", "specs": "specifications"}
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN.findall((text or "").lower()) if token not in STOPWORDS]
+
+
+def parse_k(spec: str) -> Dict[str, int]:
+    k = {}
+    for item in spec.split(","):
+        if "=" in item:
+            name, value = item.split("=", 1)
+            try:
+                k[name.strip()] = int(value)
+            except ValueError:
+                print(f"Ignoring invalid RAG_K entry: {item}")
+    k.setdefault("default", 8)
+    return k
+
+
+K_BY_TYPE = parse_k(os.getenv("RAG_K", DEFAULT_K))
+
+
+def query_type(query: str) -> str:
+    text = (query or "").lower()
+    for name, pattern in QUERY_TYPES:
+        if pattern.search(text):
+            return name
+    return "default"
+
+
+def k_for(query: str) -> int:
+    return K_BY_TYPE.get(query_type(query), K_BY_TYPE["default"])
+
+
+class BM25Index:
+    """Okapi BM25 over a fixed set of documents with an inverted index."""
+
+    def __init__(self, ids: Sequence[str], documents: Sequence[str], k1: float = 1.5, b: float = 0.75):
+        self.ids = list(ids)
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self.lengths: List[int] = []
+        for index, document in enumerate(documents):
+            tokens = tokenize(document)
+            self.lengths.append(len(tokens))
+            for term, count in Counter(tokens).items():
+                self.postings[term][index] = count
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 0.0
+        total = len(self.ids)
+        self.idf = {term: math.log(1 + (total - len(docs) + 0.5) / (len(docs) + 0.5))
+                    for term, docs in self.postings.items()}
+
+    def search(self, query: str, k: int) -> List[Tuple[str, float]]:
+        scores: Dict[int, float] = defaultdict(float)
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = self.idf[term]
+            for index, tf in docs.items():
+                norm = 1 - self.b + self.b * (self.lengths[index] / self.avg_length if self.avg_length else 1)
+                scores[index] += idf * tf * (self.k1 + 1) / (tf + self.k1 * norm)
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+        return [(self.ids[index], score) for index, score in ranked]
+
+
+def reciprocal_rank_fusion(rankings: Sequence[Sequence[str]], k: int = RRF_K) -> List[Tuple[str, float]]:
+    """Merge ranked id lists; ids ranked well by several retrievers rise to the top."""
+    scores: Dict[str, float] = defaultdict(float)
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] += 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class Reranker:
+    """Optional local cross-encoder (RAG_RERANKER); a no-op when unset or not installed."""
+
+    def __init__(self, model_name: str = RERANKER_MODEL):
+        self.model_name = model_name
+        self._model = None
+        self.available = bool(model_name)
+
+    def _load(self):
+        if self._model is None and self.available:
+            try:
+                from sentence_transformers import CrossEncoder
+                self._model = CrossEncoder(self.model_name)
+            except Exception as e:
+                print(f"⚠️ Reranker {self.model_name} unavailable, using fused order: {e}")
+                self.available = False
+        return self._model
+
+    def rerank(self, query: str, candidates: List[Tuple[str, str]]) -> Optional[List[Tuple[str, float]]]:
+        """Return (id, score) best first, or None to keep the incoming order."""
+        model = self._load()
+        if model is None or not candidates:
+            return None
+        scores = model.predict([(query, text) for _, text in candidates])
+        return sorted(((doc_id, float(score)) for (doc_id, _), score in zip(candidates, scores)),
+                      key=lambda item: item[1], reverse=True)
@@ -0,0 +1,135 @@
+"""
+Semantic question cache.
+
+Catches re-worded repeats ("is the battery good?" / "battery life reviews?")
+that the exact-match answer cache misses. Questions are embedded into a
+persistent Chroma collection (cosine HNSW index) together with the answer; a
+new question reuses the closest prior answer for the same product, data
+version, model and prompt version when the similarity clears the threshold.
+"""
+
+import asyncio
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from .answer_cache import normalize_question
+
+SEMANTIC_CACHE_ENABLED = os.getenv("SEMANTIC_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+# Cosine similarity a prior question must reach to be reused. Set for Chroma's default
+# all-MiniLM-L6-v2 embeddings, where rewordings of one question ("is the battery good?" /
+# "battery life reviews?") score around 0.8 and 0.92 only matches near-verbatim repeats.
+# Hits are still limited to the same product and data version. Raise it if answers get mixed up.
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.8"))
+SEMANTIC_CACHE_TTL = int(os.getenv("SEMANTIC_CACHE_TTL", "86400"))
+
+
+class SemanticQuestionCache:
+    def __init__(self, persistence_path: Path, collection_name: str = "question_cache",
+                 threshold: float = SEMANTIC_CACHE_THRESHOLD, ttl: int = SEMANTIC_CACHE_TTL,
+                 enabled: bool = SEMANTIC_CACHE_ENABLED):
+        self.persistence_path = Path(persistence_path)
+        self.collection_name = collection_name
+        self.threshold = threshold
+        self.ttl = ttl
+        self.enabled = enabled
+        self._collection = None
+        self.stats = {"hits": 0, "misses": 0, "sets": 0}
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            import chromadb
+            self.persistence_path.mkdir(parents=True, exist_ok=True)
+            client = chromadb.PersistentClient(path=str(self.persistence_path))
+            self._collection = client.get_or_create_collection(
+                name=self.collection_name,
+                metadata={"hnsw:space": "cosine"},
+            )
+        return self._collection
+
+    @staticmethod
+    def _scope(product_id: str, version: str, model: str, prompt_version: str) -> dict:
+        return {"$and": [
+            {"product_id": product_id},
+            {"data_version": version},
+            {"model": model},
+            {"prompt_version": prompt_version},
+        ]}
+
+    async def get(self, question: str, product_id: str, version: str, model: str,
+                  prompt_version: str) -> Optional[Dict[str, Any]]:
+        """Closest prior answer for this product/data/model/prompt, or None."""
+        if not self.enabled:
+            return None
+
+        def run():
+            return self.collection.query(
+                query_texts=[normalize_question(question)],
+                n_results=1,
+                where=self._scope(product_id, version, model, prompt_version),
+                include=["metadatas", "distances"],
+            )
+
+        try:
+            found = await asyncio.to_thread(run)
+        except Exception as e:
+            print(f"Error querying semantic cache: {e}")
+            self.stats["misses"] += 1
+            return None
+
+        if found["ids"] and found["ids"][0]:
+            metadata, distance = found["metadatas"][0][0], found["distances"][0][0]
+            similarity = 1.0 - distance
+            fresh = time.time() - metadata.get("created_at", 0) < self.ttl
+            if similarity >= self.threshold and fresh:
+                self.stats["hits"] += 1
+                print(f"⚡ Semantic cache hit ({similarity:.3f}): {metadata.get('question')!r}")
+                return json.loads(metadata["answer"])
+
+        self.stats["misses"] += 1
+        return None
+
+    async def set(self, key: str, question: str, product_id: str, version: str, model: str,
+                  prompt_version: str, answer: Dict[str, Any]) -> None:
+        if not self.enabled:
+            return
+        normalized = normalize_question(question)
+
+        def run():
+            # Answers for older data versions can never match again
+            self.collection.delete(where={"$and": [
+                {"product_id": product_id},
+                {"data_version": {"$ne": version}},
+            ]})
+            self.collection.upsert(
+                ids=[key],
+                documents=[normalized],
+                metadatas=[{
+                    "product_id": product_id,
+                    "data_version": version,
+                    "model": model,
+                    "prompt_version": prompt_version,
+                    "question": normalized,
+                    "answer": json.dumps(answer, default=str),
+                    "created_at": time.time(),
+                }],
+            )
+
+        try:
+            await asyncio.to_thread(run)
+            self.stats["sets"] += 1
+        except Exception as e:
+            print(f"Error writing semantic cache: {e}")
+
+    def metrics(self) -> Dict[str, Any]:
+        lookups = self.stats["hits"] + self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_rate": round(self.stats["hits"] / lookups, 3) if lookups else 0.0,
+            "enabled": self.enabled,
+            "threshold": self.threshold,
+            "ttl": self.ttl,
+        }
@@ -1,7 +1,7 @@
 from typing import Optional
-from pymongo import MongoClient, errors
-from pymongo.database import Database
-from pymongo.collection import Collection
+from pymongo import AsyncMongoClient, errors
+from pymongo.asynchronous.database import AsyncDatabase
+from pymongo.asynchronous.collection import AsyncCollection
 from dotenv import load_dotenv
 import os
 
@@ -9,27 +9,87 @@ import os
 load_dotenv()
 
 MONGO_URI: str = os.getenv("MONGO_URI", "")
-if not MONGO_URI:
-    raise ValueError("MONGO_URI environment variable is not set")
-
 DB_NAME: str = os.getenv("DATABASE_NAME", "")
-if not DB_NAME:
-    raise ValueError("DATABASE_NAME environment variable is not set")
-
-try:
-    client: MongoClient = MongoClient(MONGO_URI, serverSelectionTimeoutMS=3000)  # 3s timeout
-    client.server_info()  # Forces connection on init
-    print("✅ MongoDB connection established.")
-except errors.ServerSelectionTimeoutError as err:
-    print("❌ Failed to connect to MongoDB:", err)
-    raise SystemExit(err)
-
-db: Database = client[DB_NAME]
-products_collection: Collection = db["products"]
-users_collection: Collection = db["users"]
-reports_collection: Collection = db["reports"]
-summaries_collection: Collection = db["summaries"]
-sentiments_collection: Collection = db["sentiments"]
-scraped_results_collection: Collection = db["scraped_results"]
-scraped_competitors_collection: Collection = db["scraped_competitors"]
-agent_run_log_collection: Collection = db["agent_run_log"]  
+
+# Connection pool and timeouts (milliseconds). One uvicorn worker shares this pool
+# across all in-flight requests, scrapes and LLM calls.
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_MAX_IDLE_TIME_MS = int(os.getenv("MONGO_MAX_IDLE_TIME_MS", "300000"))
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "3000"))
+MONGO_CONNECT_TIMEOUT_MS = int(os.getenv("MONGO_CONNECT_TIMEOUT_MS", "5000"))
+MONGO_SOCKET_TIMEOUT_MS = int(os.getenv("MONGO_SOCKET_TIMEOUT_MS", "30000"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "10000"))
+
+# Async driver: queries are awaited instead of blocking the event loop. Nothing
+# connects at import: the client is built on first use (inside the running loop)
+# and ping_db() in the app lifespan fails fast when Mongo is unreachable.
+_client: Optional[AsyncMongoClient] = None
+
+
+def get_client() -> AsyncMongoClient:
+    global _client
+    if _client is None:
+        if not MONGO_URI:
+            raise ValueError("MONGO_URI environment variable is not set")
+        _client = AsyncMongoClient(
+            MONGO_URI,
+            maxPoolSize=MONGO_MAX_POOL_SIZE,
+            minPoolSize=MONGO_MIN_POOL_SIZE,
+            maxIdleTimeMS=MONGO_MAX_IDLE_TIME_MS,
+            serverSelectionTimeoutMS=MONGO_SERVER_SELECTION_TIMEOUT_MS,
+            connectTimeoutMS=MONGO_CONNECT_TIMEOUT_MS,
+            socketTimeoutMS=MONGO_SOCKET_TIMEOUT_MS,
+            waitQueueTimeoutMS=MONGO_WAIT_QUEUE_TIMEOUT_MS,
+        )
+    return _client
+
+
+def get_db() -> AsyncDatabase:
+    if not DB_NAME:
+        raise ValueError("DATABASE_NAME environment variable is not set")
+    return get_client()[DB_NAME]
+
+
+async def ping_db() -> None:
+    try:
+        await get_client().admin.command("ping")
+        print("✅ MongoDB connection established.")
+    except errors.ServerSelectionTimeoutError as err:
+        print("❌ Failed to connect to MongoDB:", err)
+        raise SystemExit(err)
+
+
+async def close_db() -> None:
+    global _client
+    client, _client = _client, None
+    if client is not None:
+        await client.close()
+
+
+class LazyCollection:
+    """Stands in for an AsyncCollection until first use, so importing this module is free."""
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __getattr__(self, attr):
+        return getattr(get_db()[self.name], attr)
+
+    def __repr__(self):
+        return f"LazyCollection({self.name!r})"
+
+
+products_collection: AsyncCollection = LazyCollection("products")
+users_collection: AsyncCollection = LazyCollection("users")
+reports_collection: AsyncCollection = LazyCollection("reports")
+summaries_collection: AsyncCollection = LazyCollection("summaries")
+sentiments_collection: AsyncCollection = LazyCollection("sentiments")
+scraped_results_collection: AsyncCollection = LazyCollection("scraped_results")
+scraped_competitors_collection: AsyncCollection = LazyCollection("scraped_competitors")
+agent_run_log_collection: AsyncCollection = LazyCollection("agent_run_log")
+scrape_jobs_collection: AsyncCollection = LazyCollection("scrape_jobs")
+scrape_cursors_collection: AsyncCollection = LazyCollection("scrape_cursors")
+review_fingerprints_collection: AsyncCollection = LazyCollection("review_fingerprints")
+answer_cache_collection: AsyncCollection = LazyCollection("answer_cache")
+review_buckets_collection: AsyncCollection = LazyCollection("review_buckets")
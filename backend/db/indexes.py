@@ -0,0 +1,141 @@
+# db/indexes.py
+# Declared indexes for every collection. ensure_indexes() runs on API/worker
+# startup and is idempotent (create_indexes skips ones that already exist).
+# Each index is created separately; a failure is logged with the index name.
+# Report missing and unused indexes with
+#   python -m backend.db.indexes            # report via $indexStats
+#   python -m backend.db.indexes --ensure   # create missing ones first
+import argparse
+import asyncio
+import os
+from typing import Dict, List
+
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+from .database import close_db, get_db
+
+ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() not in ("0", "false", "no")
+
+INDEXES: Dict[str, List[IndexModel]] = {
+    "products": [
+        IndexModel([("user_id", ASCENDING)]),
+    ],
+    "users": [
+        # Sign-up and login look users up by email and assume it is unique
+        IndexModel([("email", ASCENDING)], unique=True),
+    ],
+    "reports": [
+        # One report per product (rag_agent upserts by product_id)
+        IndexModel([("product_id", ASCENDING)], unique=True),
+    ],
+    "summaries": [
+        IndexModel([("product_id", ASCENDING)]),
+    ],
+    "sentiments": [
+        # One sentiment doc per product and platform (replace_one upsert)
+        IndexModel([("product_id", ASCENDING), ("platform", ASCENDING)], unique=True),
+    ],
+    "scraped_results": [
+        IndexModel([("product_id", ASCENDING), ("platform", ASCENDING), ("url", ASCENDING)]),
+        # GET /scraped/{product_id} pages by _id within a product
+        IndexModel([("product_id", ASCENDING), ("_id", ASCENDING)]),
+    ],
+    "scraped_competitors": [
+        IndexModel([("product_id", ASCENDING), ("scraped_at", DESCENDING)]),
+    ],
+    "agent_run_log": [
+        IndexModel([("ran_at", DESCENDING)]),
+    ],
+    "scrape_jobs": [
+        # Worker claim: oldest queued/expired job first
+        IndexModel([("status", ASCENDING), ("created_at", ASCENDING)]),
+    ],
+    "scrape_cursors": [
+        IndexModel([("platform", ASCENDING), ("url", ASCENDING)], unique=True),
+    ],
+    "review_fingerprints": [
+        # Same spec and name ReviewFingerprintStore creates on its own; dedup is per product
+        IndexModel([("product_id", ASCENDING), ("platform", ASCENDING), ("url", ASCENDING),
+                    ("fingerprint", ASCENDING)], unique=True, name="product_platform_url_fingerprint_unique"),
+    ],
+    "review_buckets": [
+        # Bucket numbers are unique per scraped product; also the append/stream path
+        IndexModel([("scraped_id", ASCENDING), ("url", ASCENDING), ("bucket", ASCENDING)], unique=True),
+        # Paging a product's reviews (GET /reviews/{product_id}) and recency queries
+        IndexModel([("product_id", ASCENDING), ("source", ASCENDING), ("_id", ASCENDING)]),
+        IndexModel([("product_id", ASCENDING), ("platform", ASCENDING), ("last_at", DESCENDING)]),
+    ],
+    "answer_cache": [
+        # Same specs AnswerCache creates for the mongo backend
+        IndexModel([("expires_at", ASCENDING)], expireAfterSeconds=0),
+        IndexModel([("product_id", ASCENDING)]),
+    ],
+}
+
+
+def _name(index: IndexModel) -> str:
+    return index.document["name"]
+
+
+async def ensure_indexes() -> Dict[str, List[str]]:
+    """Create every declared index that doesn't exist yet; returns names per collection."""
+    created = {}
+    failed = 0
+    for collection, indexes in INDEXES.items():
+        created[collection] = []
+        # One at a time so a single bad index doesn't keep the rest of the collection's from being built
+        for index in indexes:
+            try:
+                created[collection] += await get_db()[collection].create_indexes([index])
+            except OperationFailure as e:
+                # e.g. duplicates blocking a unique index; the app still works without it
+                failed += 1
+                print(f"⚠️ Could not create index {_name(index)} on {collection}: {e}")
+    total = sum(len(indexes) for indexes in INDEXES.values())
+    print(f"✅ Indexes ensured: {total - failed}/{total}")
+    return created
+
+
+async def index_report() -> Dict[str, dict]:
+    """Declared indexes that are missing and existing ones with no recorded use.
+
+    $indexStats counts are per mongod since its last restart, so "unused" only
+    means unused during that window.
+    """
+    report = {}
+    for collection, indexes in INDEXES.items():
+        stats = await (await get_db()[collection].aggregate([{"$indexStats": {}}])).to_list(None)
+        existing = {stat["name"]: stat for stat in stats}
+        declared = {_name(index) for index in indexes}
+        report[collection] = {
+            "missing": sorted(declared - set(existing)),
+            "unused": sorted(name for name, stat in existing.items()
+                             if name != "_id_" and stat["accesses"]["ops"] == 0),
+            "undeclared": sorted(set(existing) - declared - {"_id_"}),
+            "ops": {name: stat["accesses"]["ops"] for name, stat in existing.items()},
+        }
+    return report
+
+
+async def main(ensure: bool):
+    try:
+        if ensure:
+            await ensure_indexes()
+        report = await index_report()
+        for collection, item in report.items():
+            print(f"{collection}:")
+            print(f"  missing:    {', '.join(item['missing']) or '-'}")
+            print(f"  unused:     {', '.join(item['unused']) or '-'}")
+            print(f"  undeclared: {', '.join(item['undeclared']) or '-'}")
+            for name, ops in item["ops"].items():
+                print(f"    {name}: {ops} ops")
+    finally:
+        await close_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Report missing/unused MongoDB indexes")
+    parser.add_argument("--ensure", action="store_true", help="create missing declared indexes first")
+    args = parser.parse_args()
+    asyncio.run(main(args.ensure))
@@ -0,0 +1,218 @@
+# db/review_store.py
+# Reviews live in their own collection, in buckets of up to REVIEW_BUCKET_SIZE
+# reviews per scraped document (scraped_results doc, or a competitor doc + product
+# url), instead of inside the parent document. That keeps parents far from the
+# 16 MB BSON limit and lets readers page or stream reviews a bucket at a time.
+# Each bucket records its source ("results" or "competitors"): competitor docs share
+# the product_id, and a product's review pages only cover its own scraped results.
+# Move reviews still embedded in older documents with
+#   python -m backend.db.review_store migrate
+import argparse
+import asyncio
+import os
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from ..utils.fingerprint import review_fingerprint
+
+REVIEW_BUCKET_SIZE = int(os.getenv("REVIEW_BUCKET_SIZE", "200"))
+
+
+class ReviewBucketStore:
+    def __init__(self, collection=None, bucket_size: int = REVIEW_BUCKET_SIZE):
+        self._collection = collection
+        self.bucket_size = bucket_size
+
+    @property
+    def collection(self):
+        if self._collection is None:
+            from .database import review_buckets_collection
+            self._collection = review_buckets_collection
+        return self._collection
+
+    # ---- writes ------------------------------------------------------------
+
+    async def append(self, scraped_id: ObjectId, product_id: ObjectId, platform: str, url: Optional[str],
+                     reviews: List[Any], source: str = "results", migrated: bool = False) -> int:
+        """Add reviews (in order) to the buckets of one scraped product; returns how many were stored.
+
+        migrated=True keeps the reviews in buckets of their own (flagged "migrated"), so
+        migrate() can drop them and start over after an interruption.
+        """
+        if not reviews:
+            return 0
+        key = {"scraped_id": scraped_id, "url": url}
+        now = datetime.now(timezone.utc)
+        entries = [{"review": review, "fingerprint": review_fingerprint(review)} for review in reviews]
+        stored = 0
+        while stored < len(entries):
+            last = await self.collection.find_one(key, {"bucket": 1, "count": 1, "migrated": 1}, sort=[("bucket", -1)])
+            if last and last["count"] < self.bucket_size and last.get("migrated", False) == migrated:
+                # Top up the open bucket; the count in the filter guards against a concurrent writer
+                batch = entries[stored:stored + self.bucket_size - last["count"]]
+                result = await self.collection.update_one(
+                    {"_id": last["_id"], "count": last["count"]},
+                    {"$push": {"reviews": {"$each": batch}}, "$inc": {"count": len(batch)},
+                     "$set": {"last_at": now}},
+                )
+                if result.modified_count == 0:
+                    continue
+            else:
+                batch = entries[stored:stored + self.bucket_size]
+                try:
+                    await self.collection.insert_one({
+                        **key,
+                        "product_id": product_id,
+                        "platform": platform,
+                        "source": source,
+                        "bucket": last["bucket"] + 1 if last else 0,
+                        "count": len(batch),
+                        "reviews": batch,
+                        "first_at": now,
+                        "last_at": now,
+                        **({"migrated": True} if migrated else {}),
+                    })
+                except DuplicateKeyError:
+                    # Another writer opened this bucket number first
+                    continue
+            stored += len(batch)
+        return stored
+
+    async def delete(self, scraped_id: ObjectId) -> int:
+        return (await self.collection.delete_many({"scraped_id": scraped_id})).deleted_count
+
+    # ---- reads -------------------------------------------------------------
+
+    async def iter_reviews(self, scraped_id: Optional[ObjectId] = None, product_id: Optional[ObjectId] = None,
+                           platform: Optional[str] = None, url: Optional[str] = None) -> AsyncIterator[Any]:
+        """Yield reviews oldest first, holding one bucket in memory at a time."""
+        query: Dict[str, Any] = {}
+        if scraped_id is not None:
+            query["scraped_id"] = scraped_id
+        if product_id is not None:
+            query["product_id"] = product_id
+        if platform:
+            query["platform"] = platform
+        if url:
+            query["url"] = url
+        async for bucket in self.collection.find(query, {"reviews.review": 1}, batch_size=1).sort("_id", 1):
+            for entry in bucket.get("reviews", []):
+                yield entry["review"]
+
+    async def iter_document_reviews(self, doc: dict) -> AsyncIterator[Any]:
+        """Reviews of a scraped_results doc: any still embedded (not migrated yet), then its buckets."""
+        for review in doc.get("reviews") or []:
+            yield review
+        async for review in self.iter_reviews(scraped_id=doc["_id"]):
+            yield review
+
+    async def reviews_for(self, doc: dict) -> List[Any]:
+        return [review async for review in self.iter_document_reviews(doc)]
+
+    async def page(self, product_id: ObjectId, limit: int, cursor: Optional[str] = None,
+                   platform: Optional[str] = None, source: str = "results") -> Tuple[List[dict], Optional[str]]:
+        """One page of a product's reviews (competitor reviews only with source="competitors");
+        cursors look like "<bucket id>:<offset>"."""
+        query: Dict[str, Any] = {"product_id": product_id, "source": source}
+        if platform:
+            query["platform"] = platform
+        offset = 0
+        if cursor:
+            bucket_id, _, offset_text = cursor.partition(":")
+            if not ObjectId.is_valid(bucket_id) or not offset_text.isdigit():
+                raise ValueError("Invalid cursor")
+            query["_id"] = {"$gte": ObjectId(bucket_id)}
+            offset = int(offset_text)
+
+        items: List[dict] = []
+        projection = {"reviews.review": 1, "platform": 1, "url": 1, "scraped_id": 1}
+        async for bucket in self.collection.find(query, projection, batch_size=2).sort("_id", 1):
+            reviews = bucket.get("reviews", [])
+            for index in range(offset, len(reviews)):
+                if len(items) == limit:
+                    return items, f"{bucket['_id']}:{index}"
+                items.append({"review": reviews[index]["review"], "platform": bucket["platform"],
+                              "url": bucket.get("url"), "scraped_id": str(bucket["scraped_id"])})
+            offset = 0
+        return items, None
+
+    async def count(self, product_id: ObjectId, platform: Optional[str] = None, source: str = "results") -> int:
+        match: Dict[str, Any] = {"product_id": product_id, "source": source}
+        if platform:
+            match["platform"] = platform
+        found = await (await self.collection.aggregate([
+            {"$match": match},
+            {"$group": {"_id": None, "total": {"$sum": "$count"}}},
+        ])).to_list(None)
+        return found[0]["total"] if found else 0
+
+
+review_store = ReviewBucketStore()
+
+
+# ---- migration -------------------------------------------------------------
+
+async def migrate(dry_run: bool = False) -> Dict[str, int]:
+    """Move embedded reviews of scraped_results / scraped_competitors docs into buckets.
+
+    Safe to re-run after an interruption: a doc keeps its embedded reviews until they
+    are bucketed, and buckets left by an earlier attempt are replaced, not added to.
+    Migrated scraped_results reviews are also claimed in review_fingerprints and seed
+    the product's review cursor, so the next incremental scrape doesn't store them again.
+    """
+    from .database import close_db, scraped_competitors_collection, scraped_results_collection
+    from ..scrapers.cursors import new_reviews, review_cursors
+    from ..scrapers.extractors import canonical_product_url
+    from ..scrapers.review_dedup import review_fingerprints
+    stats = {"results": 0, "competitor_docs": 0, "reviews": 0}
+    try:
+        async for doc in scraped_results_collection.find({"reviews": {"$exists": True}}):
+            reviews = doc.get("reviews") or []
+            platform = doc.get("platform")
+            # Older docs hold the raw search-result url; incremental scrapes key on the canonical one
+            url = doc.get("url")
+            url = (canonical_product_url(platform, url) or url) if url else url
+            if not dry_run:
+                # Only buckets of an interrupted earlier attempt are cleared: incremental scrapes
+                # may already have bucketed newer reviews for this doc
+                await review_store.collection.delete_many({"scraped_id": doc["_id"], "migrated": True})
+                await review_store.append(doc["_id"], doc["product_id"], platform, url, reviews, migrated=True)
+                # Both are no-ops for reviews a previous attempt already recorded
+                await review_fingerprints.claim(platform, reviews, doc["product_id"], url)
+                known = await review_cursors.known(platform, url)
+                await review_cursors.advance(platform, url, new_reviews(reviews, known))
+                await scraped_results_collection.update_one(
+                    {"_id": doc["_id"]},
+                    {"$unset": {"reviews": ""}, "$set": {"url": url}, "$inc": {"review_count": len(reviews)}})
+            stats["results"] += 1
+            stats["reviews"] += len(reviews)
+
+        async for doc in scraped_competitors_collection.find({"products.reviews": {"$exists": True}}):
+            products = doc.get("products") or []
+            if not dry_run:
+                # Competitor docs never get reviews appended later, so re-running starts over
+                await review_store.delete(doc["_id"])
+            for product in products:
+                reviews = product.pop("reviews", None) or []
+                product["review_count"] = len(reviews)
+                if not dry_run:
+                    await review_store.append(doc["_id"], doc["product_id"], doc.get("platform"),
+                                              product.get("url"), reviews, source="competitors")
+                stats["reviews"] += len(reviews)
+            if not dry_run:
+                await scraped_competitors_collection.update_one({"_id": doc["_id"]}, {"$set": {"products": products}})
+            stats["competitor_docs"] += 1
+    finally:
+        await close_db()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Review bucket maintenance")
+    parser.add_argument("command", choices=["migrate"])
+    parser.add_argument("--dry-run", action="store_true", help="count what would be moved")
+    args = parser.parse_args()
+    print(asyncio.run(migrate(args.dry_run)))
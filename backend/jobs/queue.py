@@ -0,0 +1,188 @@
+# jobs/queue.py
+# Scrape job queue. The API enqueues a job and returns its id right away; scraper
+# workers (backend/jobs/worker.py) claim jobs and write progress back so clients
+# can poll GET /jobs/{job_id}.
+import os
+from abc import ABC, abstractmethod
+from copy import deepcopy
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+
+# A running job whose lease expired (worker died) is handed to another worker
+JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "900"))
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+
+def new_job(product_id: str, query: str, platforms: List[str], kind: str = "product",
+            competitor_num: int = 1) -> dict:
+    platforms = list(dict.fromkeys(platforms))
+    return {
+        "_id": ObjectId(),
+        "product_id": ObjectId(product_id),
+        "kind": kind,
+        "query": query,
+        "platforms": platforms,
+        "competitor_num": competitor_num,
+        "status": "queued",
+        "progress": {platform: {"status": "queued", "products_done": 0, "products_total": None, "error": None}
+                     for platform in platforms},
+        "results": {},
+        "error": None,
+        "attempts": 0,
+        "worker_id": None,
+        "created_at": datetime.now(timezone.utc),
+        "started_at": None,
+        "finished_at": None,
+    }
+
+
+class JobQueue(ABC):
+    @abstractmethod
+    async def enqueue(self, job: dict) -> str:
+        """Store a job built by new_job() and return its id."""
+
+    @abstractmethod
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        """Mark the oldest runnable job as running and return it, or None."""
+
+    @abstractmethod
+    async def update_platform(self, job_id, platform: str, update: dict) -> None:
+        """Merge `update` into the progress entry of one platform."""
+
+    @abstractmethod
+    async def finish(self, job_id, status: str, results: dict, error: Optional[str] = None,
+                     worker_id: Optional[str] = None) -> bool:
+        """Record the final status and per-platform result summary.
+
+        With `worker_id`, only while that worker still holds the job; returns
+        False when another worker has reclaimed it in the meantime.
+        """
+
+    @abstractmethod
+    async def get(self, job_id) -> Optional[dict]:
+        pass
+
+
+class InMemoryJobQueue(JobQueue):
+    """In-process queue for tests and single-process dev setups."""
+
+    def __init__(self):
+        self._jobs: Dict[ObjectId, dict] = {}
+        self._pending: List[ObjectId] = []
+
+    async def enqueue(self, job: dict) -> str:
+        self._jobs[job["_id"]] = deepcopy(job)
+        self._pending.append(job["_id"])
+        return str(job["_id"])
+
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        if not self._pending:
+            return None
+        job = self._jobs[self._pending.pop(0)]
+        job.update({
+            "status": "running",
+            "worker_id": worker_id,
+            "started_at": datetime.now(timezone.utc),
+            "attempts": job["attempts"] + 1,
+        })
+        return deepcopy(job)
+
+    async def update_platform(self, job_id, platform: str, update: dict) -> None:
+        job = self._jobs.get(ObjectId(job_id))
+        if job:
+            job["progress"].setdefault(platform, {}).update(update)
+
+    async def finish(self, job_id, status: str, results: dict, error: Optional[str] = None,
+                     worker_id: Optional[str] = None) -> bool:
+        job = self._jobs.get(ObjectId(job_id))
+        if not job or (worker_id is not None and job["worker_id"] != worker_id):
+            return False
+        job.update({"status": status, "results": results, "error": error,
+                    "finished_at": datetime.now(timezone.utc)})
+        return True
+
+    async def get(self, job_id) -> Optional[dict]:
+        job = self._jobs.get(ObjectId(job_id))
+        return deepcopy(job) if job else None
+
+
+class MongoJobQueue(JobQueue):
+    """Jobs live in the scrape_jobs collection so API and workers can be separate processes."""
+
+    def __init__(self, collection=None):
+        if collection is None:
+            from ..db.database import scrape_jobs_collection
+            collection = scrape_jobs_collection
+        self.collection = collection
+
+    async def enqueue(self, job: dict) -> str:
+        await self.collection.insert_one(job)
+        return str(job["_id"])
+
+    async def claim(self, worker_id: str) -> Optional[dict]:
+        now = datetime.now(timezone.utc)
+        # A job whose lease ran out on its last allowed attempt can't be retried; fail it
+        # instead of leaving it "running" forever
+        await self.collection.update_many(
+            {"status": "running", "lease_expires_at": {"$lt": now}, "attempts": {"$gte": JOB_MAX_ATTEMPTS}},
+            {"$set": {"status": "failed", "finished_at": now,
+                      "error": f"Lease expired after {JOB_MAX_ATTEMPTS} attempt(s)"},
+             "$unset": {"lease_expires_at": ""}},
+        )
+        return await self.collection.find_one_and_update(
+            {
+                "$or": [
+                    {"status": "queued"},
+                    {"status": "running", "lease_expires_at": {"$lt": now}},
+                ],
+                "attempts": {"$lt": JOB_MAX_ATTEMPTS},
+            },
+            {
+                "$set": {
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "lease_expires_at": now + timedelta(seconds=JOB_LEASE_SECONDS),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("created_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def update_platform(self, job_id, platform: str, update: dict) -> None:
+        # Every progress write also extends the lease of the running job
+        fields = {f"progress.{platform}.{key}": value for key, value in update.items()}
+        fields["lease_expires_at"] = datetime.now(timezone.utc) + timedelta(seconds=JOB_LEASE_SECONDS)
+        await self.collection.update_one({"_id": ObjectId(job_id)}, {"$set": fields})
+
+    async def finish(self, job_id, status: str, results: dict, error: Optional[str] = None,
+                     worker_id: Optional[str] = None) -> bool:
+        query = {"_id": ObjectId(job_id)}
+        if worker_id is not None:
+            # A worker whose lease expired must not overwrite the job's new owner
+            query["worker_id"] = worker_id
+        result = await self.collection.update_one(
+            query,
+            {"$set": {"status": status, "results": results, "error": error,
+                      "finished_at": datetime.now(timezone.utc)},
+             "$unset": {"lease_expires_at": ""}}
+        )
+        return result.matched_count > 0
+
+    async def get(self, job_id) -> Optional[dict]:
+        return await self.collection.find_one({"_id": ObjectId(job_id)})
+
+
+_job_queue: Optional[JobQueue] = None
+
+def get_job_queue() -> JobQueue:
+    """Process-wide queue; JOB_QUEUE_BACKEND=memory selects the in-process one."""
+    global _job_queue
+    if _job_queue is None:
+        backend = os.getenv("JOB_QUEUE_BACKEND", "mongo").lower()
+        _job_queue = InMemoryJobQueue() if backend == "memory" else MongoJobQueue()
+    return _job_queue
@@ -0,0 +1,164 @@
+# jobs/worker.py
+# Scraper workers: claim jobs from the queue, run the platform fan-out and write
+# progress/results back. Run standalone with
+#   python -m backend.jobs.worker --workers 2
+# or in-process from the API (JOB_INPROCESS_WORKERS, always on for the memory queue).
+import argparse
+import asyncio
+import os
+import socket
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from dotenv import load_dotenv
+
+from .queue import JobQueue, get_job_queue
+from ..db.database import close_db, ping_db, products_collection
+from ..db.indexes import ENSURE_INDEXES, ensure_indexes
+from ..scrapers.scraper_engine import run_platforms
+from ..scrapers.browser_pool import browser_pool
+from ..scrapers.http_fetch import http_fetcher
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "1.0"))
+
+
+def summarize_result(result) -> dict:
+    """Keep job documents small: scraped data itself lives in scraped_results."""
+    if isinstance(result, dict) and "error" in result:
+        return {"error": result["error"]}
+    if not result:
+        return {"error": "No products found"}
+    products = result if isinstance(result, list) else [result]
+    return {
+        "products": len(products),
+        "items": [{"url": p.get("url"), "title": p.get("title")} for p in products if isinstance(p, dict)],
+    }
+
+
+async def run_job(queue: JobQueue, job: dict) -> str:
+    """Run one job to completion; any error fails this job, never the worker loop."""
+    job_id = job["_id"]
+    try:
+        return await _run_job(queue, job)
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {e}")
+        try:
+            await queue.finish(job_id, "failed", {}, str(e), worker_id=job.get("worker_id"))
+        except Exception as finish_error:
+            # The lease expires and the job is retried or failed by a later claim
+            print(f"Error marking job {job_id} failed: {finish_error}")
+        return "failed"
+
+
+async def _run_job(queue: JobQueue, job: dict) -> str:
+    job_id = job["_id"]
+
+    async def on_progress(platform: str, update: dict):
+        await queue.update_platform(job_id, platform, update)
+
+    results = await run_platforms(
+        job["platforms"],
+        job["query"],
+        str(job["product_id"]),
+        job.get("competitor_num", 1),
+        on_progress=on_progress,
+    )
+
+    summary = {platform: summarize_result(result) for platform, result in results.items()}
+    failed = [platform for platform, item in summary.items() if "error" in item]
+    if not failed:
+        status = "completed"
+    elif len(failed) == len(summary):
+        status = "failed"
+    else:
+        status = "partial"
+
+    if status != "failed":
+        await products_collection.update_one(
+            {"_id": job["product_id"]},
+            {"$set": {
+                "status": "scraped",
+                "last_updated": datetime.now(timezone.utc)
+            }}
+        )
+
+    if not await queue.finish(job_id, status, summary, worker_id=job.get("worker_id")):
+        print(f"⚠️ Job {job_id} was reclaimed by another worker; result of this run dropped")
+        return status
+    print(f"✅ Job {job_id} finished: {status}")
+    return status
+
+
+async def worker_loop(queue: JobQueue, worker_id: str, stop: asyncio.Event):
+    while not stop.is_set():
+        job = None
+        try:
+            job = await queue.claim(worker_id)
+        except Exception as e:
+            print(f"Error claiming job: {e}")
+
+        if job is None:
+            # Nothing to do; sleep until the next poll or until asked to stop
+            try:
+                await asyncio.wait_for(stop.wait(), JOB_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            continue
+
+        print(f"🛠️ Worker {worker_id} picked up job {job['_id']}")
+        await run_job(queue, job)
+
+
+def _worker_id(index: int) -> str:
+    return f"{socket.gethostname()}-{os.getpid()}-{index}"
+
+
+# In-process workers started by the API
+_stop: Optional[asyncio.Event] = None
+_tasks: List[asyncio.Task] = []
+
+def start_workers(count: int, queue: Optional[JobQueue] = None) -> List[asyncio.Task]:
+    global _stop
+    queue = queue or get_job_queue()
+    _stop = asyncio.Event()
+    for index in range(count):
+        _tasks.append(asyncio.create_task(worker_loop(queue, _worker_id(index), _stop)))
+    print(f"✅ Started {count} in-process scrape worker(s)")
+    return _tasks
+
+async def stop_workers():
+    if _stop is not None:
+        _stop.set()
+    for task in _tasks:
+        task.cancel()
+    await asyncio.gather(*_tasks, return_exceptions=True)
+    _tasks.clear()
+
+
+async def main(count: int):
+    await ping_db()
+    if ENSURE_INDEXES:
+        await ensure_indexes()
+    queue = get_job_queue()
+    stop = asyncio.Event()
+    tasks = [asyncio.create_task(worker_loop(queue, _worker_id(index), stop)) for index in range(count)]
+    print(f"✅ {count} scrape worker(s) polling for jobs")
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        await browser_pool.close()
+        await http_fetcher.close()
+        await close_db()
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    parser = argparse.ArgumentParser(description="Run scrape job workers")
+    parser.add_argument("--workers", type=int, default=int(os.getenv("SCRAPER_WORKERS", "2")))
+    args = parser.parse_args()
+    if os.getenv("JOB_QUEUE_BACKEND", "mongo").lower() == "memory":
+        print("⚠️ JOB_QUEUE_BACKEND=memory only works with in-process workers; use the mongo backend here.")
+    try:
+        asyncio.run(main(args.workers))
+    except KeyboardInterrupt:
+        print("Workers stopped.")
@@ -1,24 +1,84 @@
 import sys
 import os
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException
-from backend.routers import product, user,sentiment
+from backend.routers import product, user,sentiment, jobs, reviews
+from backend.routers.scraped_result import scraped_router
+from backend.utils.pagination import NEXT_CURSOR_HEADER
+from backend.scrapers.browser_pool import browser_pool
+from backend.scrapers.rate_limit import domain_limiter
+from backend.scrapers.routing import request_blocker
+from backend.scrapers.snapshots import snapshot_store
+from backend.scrapers.http_fetch import http_fetcher
+from backend.agents.answer_cache import answer_cache
+from backend.agents.llm import llm
+from backend.db.database import close_db, ping_db
+from backend.db.indexes import ENSURE_INDEXES, ensure_indexes
 from dotenv import load_dotenv
 from fastapi.middleware.cors import CORSMiddleware
 load_dotenv(override=True)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Nothing heavy happens at import; Mongo, the LLM client and workers start here.
+    # Chroma, the RAG agent and the VADER lexicon load on first use.
+    await ping_db()
+    if ENSURE_INDEXES:
+        await ensure_indexes()
+    await llm.start()
+    # The memory queue only lives in this process, so it needs in-process workers
+    default_workers = "1" if os.getenv("JOB_QUEUE_BACKEND", "mongo").lower() == "memory" else "0"
+    worker_count = int(os.getenv("JOB_INPROCESS_WORKERS", default_workers))
+    if worker_count > 0:
+        from backend.jobs.worker import start_workers
+        start_workers(worker_count)
+    try:
+        yield
+    finally:
+        if worker_count > 0:
+            from backend.jobs.worker import stop_workers
+            await stop_workers()
+        await browser_pool.close()
+        await http_fetcher.close()
+        await llm.close()
+        await close_db()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Paged list endpoints return the next page's cursor in a header
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
 app.include_router(product.router)
 app.include_router(user.router)
 app.include_router(sentiment.router)
+app.include_router(jobs.router)
+app.include_router(scraped_router)
+app.include_router(reviews.router)
+
 @app.get("/")
 async def root():
     return {"message": "API is running"}
 
+@app.get("/metrics")
+async def metrics():
+    # The RAG agent is imported on first ask; don't pull it in just to report on it
+    rag_agent = sys.modules.get("backend.agents.rag_agent")
+    not_loaded = {"loaded": False}
+    return {
+        "browser_pool": browser_pool.metrics(),
+        "rate_limits": domain_limiter.metrics(),
+        "request_blocking": request_blocker.metrics(),
+        "snapshots": snapshot_store.metrics(),
+        "http_fetch": http_fetcher.metrics(),
+        "rag_index": rag_agent.vector_memory.metrics() if rag_agent else not_loaded,
+        "answer_cache": answer_cache.metrics(),
+        "semantic_cache": rag_agent.semantic_cache.metrics() if rag_agent else not_loaded,
+        "llm": llm.metrics(),
+    }
+
@@ -12,6 +12,7 @@ class ProductAnalysis(BaseModel):
     improvement_opportunities: List[str] = Field(..., description="List of weak spots, missing features, or areas not mentioned in reviews")
     recommendations: List[str] = Field(..., description="List of suggestions for the seller to add, improve, or emphasize")
     analyzed_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    cached: bool = False  # served from the answer cache
 
     model_config = ConfigDict(
         arbitrary_types_allowed=True,
@@ -0,0 +1,34 @@
+from pydantic import BaseModel, Field, ConfigDict
+from typing import Any, Dict, List, Literal, Optional
+from datetime import datetime, timezone
+from bson import ObjectId
+from ..utils.mongo import PyObjectId
+
+class PlatformProgressModel(BaseModel):
+    status: Literal["queued", "running", "completed", "failed"] = "queued"
+    products_done: int = 0
+    products_total: Optional[int] = None
+    error: Optional[str] = None
+
+class ScrapeJobModel(BaseModel):
+    id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
+    product_id: PyObjectId
+    kind: Literal["product", "competitors"] = "product"
+    query: str
+    platforms: List[str]
+    competitor_num: int = 1
+    status: Literal["queued", "running", "completed", "partial", "failed"] = "queued"
+    progress: Dict[str, PlatformProgressModel] = Field(default_factory=dict)
+    results: Dict[str, Any] = Field(default_factory=dict)
+    error: Optional[str] = None
+    attempts: int = 0
+    worker_id: Optional[str] = None
+    created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+
+    model_config = ConfigDict(
+        arbitrary_types_allowed=True,
+        populate_by_name=True,
+        json_encoders={ObjectId: str}
+    )
@@ -26,3 +26,9 @@ class SummaryReportModel(BaseModel):
         populate_by_name=True,
         json_encoders={ObjectId: str}
     )
+
+
+# What the ask endpoints return. Kept apart from SummaryReportModel, which is the
+# agent's structured-output schema and must not grow response-only fields.
+class SummaryReportResponse(SummaryReportModel):
+    cached: bool = False  # served from the answer cache
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 from pydantic import BaseModel, Field
 from typing import Optional
 from datetime import datetime
@@ -14,10 +14,13 @@ class ReviewModel(BaseModel):
 class ProductModel(BaseModel):
     url: str
     title: str
-    price: Optional[float]
+    # Stored as scraped: "$19.99", "₹1,299", "N/A" or a number
+    price: Union[str, float, None] = None
     specifications: Dict[str, str]
-    rating: Optional[float]
-    reviews: List[ReviewModel]
+    rating: Union[str, float, None] = None
+    # Reviews are stored in review_buckets; only documents from before the move embed them
+    reviews: Optional[List[Union[ReviewModel, str]]] = None
+    review_count: Optional[int] = None
 
 class ScrapedCompetitorsModel(BaseModel):
     id: PyObjectId = Field(default_factory=PyObjectId, alias="_id")
@@ -1,8 +1,8 @@
-from typing import List, Dict
+from typing import List, Dict, Union
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional
 from datetime import datetime
-from utils.mongo import PyObjectId
+from ..utils.mongo import PyObjectId
 from bson import ObjectId
 from typing import List, Literal, Optional
 class ReviewModel(BaseModel):
@@ -17,10 +17,14 @@ class ScrapedResultModel(BaseModel):
     platform: str
     url: str
     title: str
-    price: Optional[float]
+    # Stored as scraped: "$19.99", "₹1,299", "N/A" or a number
+    price: Union[str, float, None] = None
     specifications: Dict[str, str]
-    rating: Optional[float]
-    reviews: List[ReviewModel]
+    rating: Union[str, float, None] = None
+    # Stored in review_buckets; None unless the listing asked for them. Scrapers
+    # store plain review strings
+    reviews: Optional[List[Union[ReviewModel, str]]] = None
+    review_count: Optional[int] = None
     scraped_at: datetime = Field(default_factory=datetime.utcnow)
 
     model_config = ConfigDict(
@@ -0,0 +1,16 @@
+from fastapi import APIRouter, HTTPException
+from bson import ObjectId
+from ..models.job import ScrapeJobModel
+from ..jobs.queue import get_job_queue
+
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+# poll the status of a scrape job
+@router.get("/{job_id}", response_model=ScrapeJobModel)
+async def get_job(job_id: str):
+    if not ObjectId.is_valid(job_id):
+        raise HTTPException(status_code=400, detail="Invalid job ID")
+    job = await get_job_queue().get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return ScrapeJobModel(**job)
@@ -1,16 +1,18 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import json
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
 from ..models.product import TrackedProductModel
 from ..models.analysis import ProductAnalysis
 from ..utils.mongo import PyObjectId
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, fetch_page, ndjson_response
 from bson import ObjectId
-from typing import List, Literal, Dict
+from typing import List, Literal, Dict, Optional
 from datetime import datetime
 from datetime import timezone
 from ..db.database import products_collection,scraped_results_collection,reports_collection,sentiments_collection
 # from scrapers.scraper_engine import ScraperEngine
-from ..scrapers.scraper_engine import ScraperEngine
-from ..agents.rag_agent import analyze_product
+from ..jobs.queue import get_job_queue, new_job
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
@@ -22,53 +24,58 @@ class ProductCreateRequest(BaseModel):
 
 # create a new tracked product
 @router.post("/", response_model=TrackedProductModel)
-def create_product(product: ProductCreateRequest):
+async def create_product(product: ProductCreateRequest):
     data = product.model_dump()
     data.update({
         "status": "pending",
         "created_at": datetime.now(timezone.utc),
         "last_updated": datetime.now(timezone.utc),
     })
-    result = products_collection.insert_one(data)
-    created_product = products_collection.find_one({"_id": result.inserted_id})
+    result = await products_collection.insert_one(data)
+    created_product = await products_collection.find_one({"_id": result.inserted_id})
     if created_product:
         return TrackedProductModel(**created_product)
     raise HTTPException(status_code=500, detail="Failed to create product")
 
-# list all tracked products
+# list tracked products, one page at a time (next page: ?cursor=<X-Next-Cursor>)
 @router.get("/", response_model=List[TrackedProductModel])
-def list_products():
-    products = products_collection.find()
+async def list_products(response: Response, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                        cursor: Optional[str] = None, format: Literal["json", "ndjson"] = "json"):
+    if format == "ndjson":
+        return ndjson_response(products_collection, {}, TrackedProductModel, cursor)
+    products, next_cursor = await fetch_page(products_collection, {}, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [TrackedProductModel(**prod) for prod in products]
 
 # get a tracked product by id
 @router.get("/{product_id}", response_model=TrackedProductModel)
-def get_product(product_id: str):
-    product = products_collection.find_one({"_id": ObjectId(product_id)})
+async def get_product(product_id: str):
+    product = await products_collection.find_one({"_id": ObjectId(product_id)})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
     return TrackedProductModel(**product)
 
 # update a tracked product
 @router.put("/{product_id}", response_model=TrackedProductModel)
-def update_product(product_id: str, update_data: ProductCreateRequest):
+async def update_product(product_id: str, update_data: ProductCreateRequest):
     update_dict = update_data.model_dump()
     update_dict["last_updated"] = datetime.now(timezone.utc)
-    result = products_collection.update_one(
+    result = await products_collection.update_one(
         {"_id": ObjectId(product_id)}, 
         {"$set": update_dict}
     )
     if result.modified_count == 0:
         raise HTTPException(status_code=404, detail="Product not found or unchanged")
-    updated = products_collection.find_one({"_id": ObjectId(product_id)})
+    updated = await products_collection.find_one({"_id": ObjectId(product_id)})
     if updated:
         return TrackedProductModel(**updated)
     raise HTTPException(status_code=404, detail="Product not found")
 
 # delete a tracked product
 @router.delete("/{product_id}")
-def delete_product(product_id: str):
-    result = products_collection.delete_one({"_id": ObjectId(product_id)})
+async def delete_product(product_id: str):
+    result = await products_collection.delete_one({"_id": ObjectId(product_id)})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
     return {"message": "Product deleted successfully"}
@@ -102,64 +109,39 @@ def delete_product(product_id: str):
 
 #     return {"message": "Scraping complete", "results": results}
 
-# Run scraper for the tracked products
-@router.post("/{product_id}/scrape")
+# Run scraper for the tracked products: queue a job and return its id right away;
+# poll GET /jobs/{job_id} for progress
+@router.post("/{product_id}/scrape", status_code=status.HTTP_202_ACCEPTED)
 async def scrape_product(product_id: str):
-    product = products_collection.find_one({"_id": ObjectId(product_id)})
+    product = await products_collection.find_one({"_id": ObjectId(product_id)})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    results = {}
-    for platform in product.get("platforms", []):
-        try:
-            engine = ScraperEngine(platform, product["name"], product_id)
-            result = await engine.run()
-            results[platform] = result
-        except Exception as e:
-            results[platform] = {"error": str(e)}
-
-    # Update product status
-    products_collection.update_one(
-        {"_id": ObjectId(product_id)},
-        {"$set": {
-            "status": "scraped",
-            "last_updated": datetime.now(timezone.utc)
-        }}
-    )
+    job = new_job(product_id, product["name"], product.get("platforms", []), kind="product")
+    job_id = await get_job_queue().enqueue(job)
 
     return {
         "product_id": product_id,
         "product_name": product["name"],
-        "results": results
+        "job_id": job_id,
+        "status": "queued"
     }
 
-@router.post("/{product_id}/scrape_competitors")
+@router.post("/{product_id}/scrape_competitors", status_code=status.HTTP_202_ACCEPTED)
 async def scrape_competitors(product_id: str, competitor_num: int = 3):
-    product = products_collection.find_one({"_id": ObjectId(product_id)})
+    product = await products_collection.find_one({"_id": ObjectId(product_id)})
     if not product:
         raise HTTPException(status_code=404, detail="Product not found")
 
-    results = {}
-    for platform in product.get("platforms", []):
-        try:
-            engine = ScraperEngine(platform, product["name"], product_id, competitor_num)
-            result = await engine.run()
-            results[platform] = result
-        except Exception as e:
-            results[platform] = {"error": str(e)}
-            # Update product status
-    products_collection.update_one(
-        {"_id": ObjectId(product_id)},
-        {"$set": {
-            "status": "scraped",
-            "last_updated": datetime.now(timezone.utc)
-        }}
-    )
+    job = new_job(product_id, product["name"], product.get("platforms", []),
+                  kind="competitors", competitor_num=competitor_num)
+    job_id = await get_job_queue().enqueue(job)
 
     return {
         "product_id": product_id,
         "product_name": product["name"],
-        "results": results
+        "job_id": job_id,
+        "status": "queued"
     }
 # asking agent about the product
 class ProductQuestion(BaseModel):
@@ -170,24 +152,55 @@ async def ask_product_question(product_id: str, question: ProductQuestion):
     """Ask a question about product reviews using RAG"""
     try:
         # Verify product exists
-        product = scraped_results_collection.find_one({"_id": ObjectId(product_id)})
+        product = await scraped_results_collection.find_one({"_id": ObjectId(product_id)})
         if not product:
             raise HTTPException(status_code=404, detail="Product not found")
 
-        # Get analysis from RAG agent
+        # Get analysis from RAG agent (imported on first use: autogen/Chroma are slow to import)
+        from ..agents.rag_agent import analyze_product
         result = await analyze_product(question.question, product_id)
         return result
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+@router.post("/{product_id}/ask/stream")
+async def ask_product_question_stream(product_id: str, question: ProductQuestion):
+    """Same as /ask, streamed as Server-Sent Events.
+
+    Emits `retrieval` (context chunks), `field` (each report field as soon as it
+    is generated) and finally `report` (the validated report, with `cached`).
+    """
+    product = await scraped_results_collection.find_one({"_id": ObjectId(product_id)})
+    if not product:
+        raise HTTPException(status_code=404, detail="Product not found")
+
+    from ..agents.rag_agent import analyze_product_stream
+
+    async def events():
+        try:
+            async for event, data in analyze_product_stream(question.question, product_id):
+                yield _sse(event, data)
+        except Exception as e:
+            yield _sse("error", {"detail": str(e)})
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        # Keep proxies from buffering the stream
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
 # unified report: summary from RAG + sentiment breakdown from scraped results + pricing information
 @router.get("/unified_report/{product_id}")
 async def get_unified_report(product_id: str):
     """Get a unified report for a product"""
     try:
     #   summary from RAG
-        summary = reports_collection.find_one({"product_id": ObjectId(product_id)})
-        sentiment = sentiments_collection.find_one({"product_id": ObjectId(product_id)})
+        summary = await reports_collection.find_one({"product_id": ObjectId(product_id)})
+        sentiment = await sentiments_collection.find_one({"product_id": ObjectId(product_id)})
         if not summary:
             raise HTTPException(status_code=404, detail="Product not found")
         from ..models.report import SummaryReportModel
@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Query, Response
+from bson import ObjectId
+from typing import Optional
+from ..db.review_store import review_store
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER
+
+router = APIRouter(prefix="/reviews", tags=["Reviews"])
+
+# page through a product's own reviews, competitors excluded (next page: ?cursor=<X-Next-Cursor>)
+@router.get("/{product_id}")
+async def list_reviews(product_id: str, response: Response,
+                       limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                       cursor: Optional[str] = None, platform: Optional[str] = None):
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=400, detail="Invalid product ID")
+    try:
+        reviews, next_cursor = await review_store.page(ObjectId(product_id), limit, cursor, platform)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return {"product_id": product_id, "reviews": reviews, "next_cursor": next_cursor}
+
+# total number of bucketed reviews for a product (its own scraped results, not competitors)
+@router.get("/{product_id}/count")
+async def count_reviews(product_id: str, platform: Optional[str] = None):
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=400, detail="Invalid product ID")
+    return {"product_id": product_id, "platform": platform,
+            "count": await review_store.count(ObjectId(product_id), platform)}
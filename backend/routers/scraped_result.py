@@ -1,19 +1,42 @@
 # routers/product.py
-from fastapi import APIRouter, HTTPException, status, Depends
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from pydantic import BaseModel
 from ..models.product import TrackedProductModel
 from ..models.scraped_result import ScrapedResultModel
 from ..models.sentiment import SentimentAnalysisModel
 from ..models.report import SummaryReportModel
 from ..utils.mongo import PyObjectId
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, fetch_page, ndjson_response
 from bson import ObjectId
-from typing import List
+from typing import List, Literal, Optional
 from datetime import datetime
 from ..db.database import scraped_results_collection, scraped_competitors_collection
+from ..db.review_store import review_store
 
 scraped_router = APIRouter(prefix="/scraped", tags=["Scraped Results"])
 
+# scraped results of a product, paged; reviews are left out unless include_reviews=true
+# (page through large review sets with GET /reviews/{product_id} instead)
 @scraped_router.get("/{product_id}", response_model=List[ScrapedResultModel])
-def get_scraped_data(product_id: str):
-    results = scraped_results_collection.find({"product_id": ObjectId(product_id)})
-    return [ScrapedResultModel(**res) for res in results]
\ No newline at end of file
+async def get_scraped_data(product_id: str, response: Response,
+                           limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                           cursor: Optional[str] = None, include_reviews: bool = False,
+                           format: Literal["json", "ndjson"] = "json"):
+    if not ObjectId.is_valid(product_id):
+        raise HTTPException(status_code=400, detail="Invalid product ID")
+    query = {"product_id": ObjectId(product_id)}
+    projection = None if include_reviews else {"reviews": 0}
+
+    async def load_reviews(res: dict):
+        res["reviews"] = await review_store.reviews_for(res)
+
+    if format == "ndjson":
+        return ndjson_response(scraped_results_collection, query, ScrapedResultModel, cursor, projection,
+                               prepare=load_reviews if include_reviews else None)
+    results, next_cursor = await fetch_page(scraped_results_collection, query, limit, cursor, projection)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if include_reviews:
+        for res in results:
+            await load_reviews(res)
+    return [ScrapedResultModel(**res) for res in results]
@@ -1,3 +1,4 @@
+import asyncio
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
 from ..models.sentiment import SentimentAnalysisModel
@@ -6,69 +7,91 @@ from bson import ObjectId
 from typing import List, Dict
 from datetime import datetime, timezone
 from ..db.database import scraped_results_collection, sentiments_collection
-import nltk
-from nltk.sentiment.vader import SentimentIntensityAnalyzer
+from ..db.review_store import review_store
 from collections import Counter
+from functools import lru_cache
+import os
 import re
 
-nltk.download('vader_lexicon')
-analyzer = SentimentIntensityAnalyzer()
+# VADER lexicon is cached here (downloaded once if missing) instead of fetched at import
+NLTK_DATA_DIR = os.getenv("NLTK_DATA_DIR", "./data/nltk_data")
+
+@lru_cache(maxsize=1)
+def get_analyzer():
+    import nltk
+    from nltk.sentiment.vader import SentimentIntensityAnalyzer
+    if NLTK_DATA_DIR not in nltk.data.path:
+        nltk.data.path.insert(0, NLTK_DATA_DIR)
+    try:
+        nltk.data.find("sentiment/vader_lexicon.zip")
+    except LookupError:
+        os.makedirs(NLTK_DATA_DIR, exist_ok=True)
+        nltk.download("vader_lexicon", download_dir=NLTK_DATA_DIR, quiet=True)
+    return SentimentIntensityAnalyzer()
 
 router = APIRouter(prefix="/sentiment", tags=["Sentiment"])
 
 def analyze_sentiment(text):
-    scores = analyzer.polarity_scores(text)
+    scores = get_analyzer().polarity_scores(text)
     return scores
 
-def extract_keywords(text, n=5):
+def keyword_counts(text):
     text = re.sub(r'[^\w\s]', '', text.lower())
     words = text.split()
     stop_words = set(['the', 'a', 'an', 'and', 'or', 'but', 'in', 'on', 'at', 'to', 'for', 'with', 'by', 'about', 'as', 'of', 'from'])
     words = [word for word in words if word not in stop_words]
-    word_freq = Counter(words)
+    return Counter(words)
+
+def extract_keywords(text, n=5):
+    word_freq = keyword_counts(text)
     return [word for word, _ in word_freq.most_common(n)]
 
 @router.post("/{scraped_id}", response_model=SentimentAnalysisModel)
 async def get_sentiment(scraped_id: str):
     try:
-        scraped_result = scraped_results_collection.find_one({"_id": ObjectId(scraped_id)})
+        scraped_result = await scraped_results_collection.find_one({"_id": ObjectId(scraped_id)})
         if not scraped_result:
             raise HTTPException(status_code=404, detail="Scraped result not found")
 
-        reviews = scraped_result.get("reviews", [])
-        if not reviews:
-            raise HTTPException(status_code=404, detail="No reviews found in the scraped result")
+        # First call loads (and if needed downloads) the lexicon; keep that off the event loop
+        await asyncio.to_thread(get_analyzer)
 
-        sentiment_scores = []
-        for review in reviews:
-            scores = analyze_sentiment(review)
-            sentiment_scores.append({
-                "text": review,
-                "scores": scores
-            })
+        # Reviews are streamed from their buckets; only running totals are kept in memory
+        summary = {"positive": 0, "negative": 0, "neutral": 0}
+        keywords = {"positive": Counter(), "negative": Counter()}
+        top_positive, top_negative = ("", float("-inf")), ("", float("inf"))
+        async for review in review_store.iter_document_reviews(scraped_result):
+            text = review.get("body", str(review)) if isinstance(review, dict) else str(review)
+            compound = analyze_sentiment(text)["compound"]
+            if compound > 0.05:
+                summary["positive"] += 1
+                keywords["positive"].update(keyword_counts(text))
+                top_positive = max(top_positive, (text, compound), key=lambda item: item[1])
+            elif compound < -0.05:
+                summary["negative"] += 1
+                keywords["negative"].update(keyword_counts(text))
+                top_negative = min(top_negative, (text, compound), key=lambda item: item[1])
+            else:
+                summary["neutral"] += 1
 
-        positive_reviews = [s["text"] for s in sentiment_scores if s["scores"]["compound"] > 0.05]
-        negative_reviews = [s["text"] for s in sentiment_scores if s["scores"]["compound"] < -0.05]
+        if not sum(summary.values()):
+            raise HTTPException(status_code=404, detail="No reviews found in the scraped result")
 
         sentiment_result = {
             "product_id": scraped_result["product_id"],
             "platform": scraped_result["platform"],
-            "summary": {
-                "positive": len(positive_reviews),
-                "negative": len(negative_reviews),
-                "neutral": len(sentiment_scores) - len(positive_reviews) - len(negative_reviews)
-            },
+            "summary": summary,
             "keywords": {
-                "positive": extract_keywords(" ".join(positive_reviews)),
-                "negative": extract_keywords(" ".join(negative_reviews))
+                "positive": [word for word, _ in keywords["positive"].most_common(5)],
+                "negative": [word for word, _ in keywords["negative"].most_common(5)]
             },
-            "top_positive_review": max(positive_reviews, key=lambda text: analyzer.polarity_scores(text)["compound"], default=""),
-            "top_negative_review": min(negative_reviews, key=lambda text: analyzer.polarity_scores(text)["compound"], default=""),
+            "top_positive_review": top_positive[0],
+            "top_negative_review": top_negative[0],
             "processed_at": datetime.now(timezone.utc)
         }
 
         # Upsert (update if exists, otherwise insert)
-        sentiments_collection.replace_one(
+        await sentiments_collection.replace_one(
             {"product_id": scraped_result["product_id"], "platform": scraped_result["platform"]},
             sentiment_result,
             upsert=True
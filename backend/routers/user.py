@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, status, Depends
+import asyncio
+from fastapi import APIRouter, HTTPException, status, Depends, Query, Response
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, List
+from typing import Optional, List, Literal
 from datetime import datetime, timezone
 from bson import ObjectId
 from ..db.database import users_collection
 from ..models.user import UserModel, SubscriptionModel
 from ..utils.mongo import PyObjectId
+from ..utils.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER, fetch_page, ndjson_response
 from ..utils.auth import hash_password, create_access_token, get_current_user, Token, verify_password
 
 router = APIRouter(prefix="/user", tags=["User"])
@@ -24,13 +26,13 @@ class UserLoginRequest(BaseModel):
 
 
 @router.post("/create", response_model=UserModel)
-def create_user(user: UserCreateRequest):
+async def create_user(user: UserCreateRequest):
     # Check for existing user with the same email
-    if users_collection.find_one({"email": user.email}):
+    if await users_collection.find_one({"email": user.email}):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
     
-    # Hash the password
-    hashed_password = hash_password(user.password)
+    # Hash the password (bcrypt is slow on purpose; keep it off the event loop)
+    hashed_password = await asyncio.to_thread(hash_password, user.password)
     
     # Prepare data for insertion
     data = user.model_dump(exclude={"password"})
@@ -42,8 +44,8 @@ def create_user(user: UserCreateRequest):
     })
     
     # Insert into MongoDB
-    result = users_collection.insert_one(data)
-    created_user = users_collection.find_one({"_id": result.inserted_id})
+    result = await users_collection.insert_one(data)
+    created_user = await users_collection.find_one({"_id": result.inserted_id})
     
     if created_user:
         # Ensure ObjectId fields are strings for Pydantic
@@ -55,23 +57,29 @@ def create_user(user: UserCreateRequest):
 
 # Login
 @router.post("/login", response_model=Token)
-def login_user(login: UserLoginRequest):
-    user = users_collection.find_one({"email": login.email})
-    if not user or not verify_password(login.password, user["password_hash"]):
+async def login_user(login: UserLoginRequest):
+    user = await users_collection.find_one({"email": login.email})
+    if not user or not await asyncio.to_thread(verify_password, login.password, user["password_hash"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid email or password")
     
     access_token = create_access_token(data={"user_id": str(user["_id"]), "email": user["email"]})
     return {"access_token": access_token, "token_type": "bearer"}
-# find all users
+# list users, one page at a time (next page: ?cursor=<X-Next-Cursor>)
 @router.get("/", response_model=List[UserModel])
-def list_users(current_user: UserModel = Depends(get_current_user)):
-    users = users_collection.find()
+async def list_users(response: Response, limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+                     cursor: Optional[str] = None, format: Literal["json", "ndjson"] = "json",
+                     current_user: UserModel = Depends(get_current_user)):
+    if format == "ndjson":
+        return ndjson_response(users_collection, {}, UserModel, cursor)
+    users, next_cursor = await fetch_page(users_collection, {}, limit, cursor)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
     return [UserModel(**user) for user in users]
 # find a user by id
 @router.get("/{user_id}", response_model=UserModel)
-def get_user(user_id: str, current_user: UserModel = Depends(get_current_user)):
+async def get_user(user_id: str, current_user: UserModel = Depends(get_current_user)):
     try:
-        user = users_collection.find_one({"_id": ObjectId(user_id)})
+        user = await users_collection.find_one({"_id": ObjectId(user_id)})
         if not user:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return UserModel(**user)
@@ -79,19 +87,19 @@ def get_user(user_id: str, current_user: UserModel = Depends(get_current_user)):
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user ID")
 # update a user
 @router.put("/{user_id}", response_model=UserModel)
-def update_user(user_id: str, update_data: UserCreateRequest, current_user: UserModel = Depends(get_current_user)):
+async def update_user(user_id: str, update_data: UserCreateRequest, current_user: UserModel = Depends(get_current_user)):
     try:
         # Check for email conflict with other users
-        if update_data.email and users_collection.find_one({"email": update_data.email, "_id": {"$ne": ObjectId(user_id)}}):
+        if update_data.email and await users_collection.find_one({"email": update_data.email, "_id": {"$ne": ObjectId(user_id)}}):
             raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Email already exists")
         
         # Hash password if provided
         update_dict = update_data.model_dump(exclude_unset=True)
         if "password" in update_dict:
-            update_dict["password_hash"] = hash_password(update_dict.pop("password"))
+            update_dict["password_hash"] = await asyncio.to_thread(hash_password, update_dict.pop("password"))
         update_dict["last_updated"] = datetime.now(timezone.utc)
         
-        result = users_collection.update_one(
+        result = await users_collection.update_one(
             {"_id": ObjectId(user_id)},
             {"$set": update_dict}
         )
@@ -99,7 +107,7 @@ def update_user(user_id: str, update_data: UserCreateRequest, current_user: User
         if result.modified_count == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found or unchanged")
         
-        updated_user = users_collection.find_one({"_id": ObjectId(user_id)})
+        updated_user = await users_collection.find_one({"_id": ObjectId(user_id)})
         if updated_user:
             return UserModel(**updated_user)
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
@@ -107,9 +115,9 @@ def update_user(user_id: str, update_data: UserCreateRequest, current_user: User
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid user ID")
 # delete a user
 @router.delete("/{user_id}")
-def delete_user(user_id: str, current_user: UserModel = Depends(get_current_user)):
+async def delete_user(user_id: str, current_user: UserModel = Depends(get_current_user)):
     try:
-        result = users_collection.delete_one({"_id": ObjectId(user_id)})
+        result = await users_collection.delete_one({"_id": ObjectId(user_id)})
         if result.deleted_count == 0:
             raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
         return {"message": "User deleted successfully"}
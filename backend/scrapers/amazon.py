@@ -1,22 +1,41 @@
 import asyncio
-from playwright.async_api import async_playwright
-from googletrans import Translator
-import pandas as pd
+from .browser_pool import browser_pool
+from .rate_limit import domain_limiter
+from .utils import scrape_pages
+from .waits import wait_ready
+from .extractors import extract_page, normalize_product, product_links
+from ..utils.fingerprint import dedupe_reviews
 from datetime import datetime
 import re
 import random
 from time import sleep
 
-async def scrape_product_amazon(product_name, max_products=1):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            viewport={"width": 1280, "height": 720},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36'
-        )
+async def _scrape_amazon_product(context, url, index):
+    """Extract one product page on its own tab so several can run at once."""
+    page = await context.new_page()
+    try:
+        # Politeness budget shared by all pages hitting this domain
+        await domain_limiter.acquire(url)
+        await page.goto(url, timeout=60000)
+        await page.wait_for_load_state("domcontentloaded")
+        # Wait for title/price/review containers instead of a fixed delay
+        await wait_ready(page, "amazon", "product")
+
+        # All fields in one page.evaluate instead of a round-trip per element
+        raw = await extract_page(page, "amazon", "product")
+        product_data = normalize_product("amazon", raw, url)
+        # Several selector fallbacks can match the same review
+        product_data['reviews'] = dedupe_reviews(product_data['reviews'])
+        print(f"Found {len(product_data['reviews'])} reviews and {len(product_data['specifications'])} specifications")
+
+        print(f"Completed processing product {index}")
+        return product_data
+    finally:
+        await page.close()
+
+async def scrape_product_amazon(product_name, max_products=1, context=None, progress=None):
+    async with browser_pool.lease("amazon", context) as context:
         page = await context.new_page()
-        translator = Translator()
-        all_products_data = []
         
         try:
             # Navigate directly to search results
@@ -24,9 +43,10 @@ async def scrape_product_amazon(product_name, max_products=1):
             search_url = f"https://www.amazon.com/s?k={product_name.replace(' ', '+')}"
             print(f"Navigating to: {search_url}")
             
+            await domain_limiter.acquire(search_url)
             await page.goto(search_url, timeout=60000)
             await page.wait_for_load_state("domcontentloaded")
-            await asyncio.sleep(3)  # Let the page settle
+            await wait_ready(page, "amazon", "search")
             
             # Take a screenshot for debugging if needed
             # await page.screenshot(path="screenshot.png")
@@ -34,215 +54,25 @@ async def scrape_product_amazon(product_name, max_products=1):
             
             # Get multiple product links
             print("Looking for product links...")
-            product_selectors = [
-                "h2 a.a-link-normal",
-                "div.s-result-item h2 a.a-link-normal",
-                "div[data-component-type='s-search-result'] h2 a.a-link-normal",
-                "h2 .a-link-normal[href*='/dp/']",
-                ".s-result-item .a-link-normal[href*='/dp/']"
-            ]
-            
-            product_urls = []
-            for selector in product_selectors:
-                if len(product_urls) >= max_products:
-                    break
-                    
-                try:
-                    print(f"Trying selector: {selector}")
-                    product_links = await page.locator(selector).all()
-                    
-                    for link in product_links:
-                        if len(product_urls) >= max_products:
-                            break
-                            
-                        href = await link.get_attribute("href")
-                        if href and ("/dp/" in href or "/gp/" in href):
-                            url = f"https://www.amazon.com{href}" if not href.startswith("http") else href
-                            if url not in product_urls:
-                                product_urls.append(url)
-                                print(f"Found product URL ({len(product_urls)} of {max_products}): {url}")
-                                # Add a small random delay between finding products
-                                await asyncio.sleep(random.uniform(0.5, 1.5))
-                                
-                except Exception as e:
-                    print(f"Selector {selector} failed: {str(e)}")
-                    continue
+            raw = await extract_page(page, "amazon", "search")
+            product_urls = product_links("amazon", raw, max_products)
+            for position, url in enumerate(product_urls, 1):
+                print(f"Found product URL ({position} of {max_products}): {url}")
             
             if not product_urls:
                 print("Could not find any products matching your search.")
                 return None
             
-            # Process each product
-            for index, url in enumerate(product_urls, 1):
-                print(f"\nProcessing product {index} of {len(product_urls)}...")
-                
-                try:
-                    # Random delay between products (3-7 seconds)
-                    delay = random.uniform(3, 7)
-                    print(f"Waiting for {delay:.1f} seconds before processing next product...")
-                    await asyncio.sleep(delay)
-                    
-                    await page.goto(url, timeout=60000)
-                    await page.wait_for_load_state("domcontentloaded")
-                    # Random delay after page load (2-5 seconds)
-                    await asyncio.sleep(random.uniform(2, 5))
-                    
-                    # Get product details
-                    title = "N/A"
-                    try:
-                        title_elem = page.locator("span#productTitle.a-size-large")
-                        if await title_elem.count() > 0:
-                            title = await title_elem.inner_text()
-                        else:
-                            title_input = page.locator("input#productTitle[type='hidden']")
-                            if await title_input.count() > 0:
-                                title = await title_input.get_attribute("value")
-                    except Exception as e:
-                        print(f"Error getting title: {e}")
-                    
-                    # Get brand
-                    brand = "N/A"
-                    brand_selectors = [
-                        "#bylineInfo",
-                        "#bylineInfo_feature_div .a-link-normal",
-                        "#brand",
-                        ".po-brand .a-span9"
-                    ]
-                    
-                    for selector in brand_selectors:
-                        try:
-                            brand_elem = page.locator(selector).first
-                            if await brand_elem.count() > 0:
-                                brand_text = await brand_elem.inner_text()
-                                if brand_text:
-                                    brand = re.sub(r'^Visit the |^Brand: |^by |^From ', '', brand_text.strip())
-                                    break
-                        except Exception as e:
-                            continue
-                    
-                    # Get price
-                    price = "N/A"
-                    try:
-                        price_whole = page.locator(".a-price .a-price-whole").first
-                        if await price_whole.count() > 0:
-                            whole = await price_whole.inner_text()
-                            try:
-                                fraction = await page.locator(".a-price .a-price-fraction").first.inner_text()
-                                price = f"${whole}{fraction}"
-                            except:
-                                price = f"${whole}"
-                    except Exception as e:
-                        print(f"Error getting price: {e}")
-                    
-                    # Get rating
-                    rating = "N/A"
-                    try:
-                        # Try multiple selectors for rating
-                        rating_selectors = [
-                            "span.a-icon-alt",  # Main rating selector
-                            "#acrPopover",      # Alternative rating location
-                            "i.a-icon-star span.a-icon-alt",  # Another common location
-                            "#averageCustomerReviews .a-icon-alt"  # Product page rating
-                        ]
-                        
-                        for selector in rating_selectors:
-                            rating_elem = page.locator(selector).first
-                            if await rating_elem.count() > 0:
-                                rating_text = await rating_elem.inner_text()
-                                if rating_text and "out of 5" in rating_text.lower():
-                                    rating = rating_text.split(" out")[0].strip()
-                                    print(f"Found rating: {rating}")
-                                    break
-                                
-                        if rating == "N/A":
-                            print("Could not find rating")
-                    except Exception as e:
-                        print(f"Error getting rating: {e}")
-                        pass
-                    
-                    # Get reviews
-                    reviews = []
-                    print("Collecting reviews...")
-                    
-                    review_selectors = [
-                        "div[data-hook='review'] span[data-hook='review-body']",
-                        "div.review-text-content span",
-                        "#cm-cr-dp-review-list div.review-data span.review-text",
-                        "div[data-hook='review-collapsed'] span"
-                    ]
-                    
-                    for selector in review_selectors:
-                        try:
-                            review_elements = await page.locator(selector).all()
-                            for elem in review_elements:
-                                try:
-                                    review_text = await elem.inner_text()
-                                    if review_text:
-                                        review_text = review_text.strip()
-                                        if review_text:
-                                            reviews.append(review_text)
-                                except Exception as e:
-                                    continue
-                                    
-                            if reviews:
-                                break
-                        except Exception as e:
-                            continue
-                    
-                    # Get product specifications
-                    specifications = {}
-                    try:
-                        # Wait for specifications table to load
-                        await page.wait_for_selector("table#productDetails_detailBullets_sections1", timeout=10000)
-                        
-                        # Get all specification rows
-                        spec_rows = await page.locator("table#productDetails_detailBullets_sections1 tr").all()
-                        
-                        for row in spec_rows:
-                            try:
-                                # Get the specification name (th) and value (td)
-                                name_elem = row.locator("th.a-color-secondary")
-                                value_elem = row.locator("td.a-size-base")
-                                
-                                if await name_elem.count() > 0 and await value_elem.count() > 0:
-                                    name = await name_elem.inner_text()
-                                    value = await value_elem.inner_text()
-                                    
-                                    if name and value:
-                                        # Clean up the name and value
-                                        name = name.strip().replace(':', '')
-                                        value = value.strip()
-                                        
-                                        # Add to specifications dictionary
-                                        specifications[name] = value
-                                        print(f"Found specification: {name} = {value}")
-                            except Exception as e:
-                                print(f"Error processing specification row: {e}")
-                                continue
-                    except Exception as e:
-                        print(f"Error getting specifications: {e}")
+            # Process the products on a bounded set of tabs
+            print(f"\nProcessing {len(product_urls)} products...")
+            if progress:
+                await progress(0, len(product_urls))
+            all_products_data = await scrape_pages(
+                product_urls,
+                lambda url, index: _scrape_amazon_product(context, url, index),
+                progress=progress
+            )
 
-                    # Store product data
-                    product_data = {
-                        'url': url,
-                        'title': title.strip() if title else "N/A",
-                        'brand': brand.strip() if brand else "N/A",
-                        'price': price.strip() if price else "N/A",
-                        'rating': rating.strip() if rating else "N/A",
-                        'reviews': reviews,
-                        'specifications': specifications  # Add specifications to the product data
-                    }
-                    
-                    all_products_data.append(product_data)
-                    print(f"Completed processing product {index}")
-                    
-                except Exception as e:
-                    print(f"Error processing product {index}: {e}")
-                    continue
-                
-                # Add a delay between products
-                await asyncio.sleep(2)
-            
             return all_products_data
             
         except Exception as e:
@@ -250,7 +80,7 @@ async def scrape_product_amazon(product_name, max_products=1):
             return None
             
         finally:
-            await browser.close()
+            await page.close()
 
 def save_to_csv(products_data, search_query):
     if not products_data:
@@ -0,0 +1,191 @@
+# scrapers/browser_pool.py
+# Process-wide Playwright browser/context pool. Scrapers used to launch their own
+# Chromium on every call; now ScraperEngine leases a context from here so the
+# browser startup cost is paid once per process instead of once per request.
+import asyncio
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, List, Optional
+
+from playwright.async_api import async_playwright, Browser, BrowserContext, Playwright
+
+from .routing import request_blocker
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36'
+
+BROWSER_ARGS = ['--disable-dev-shm-usage', '--no-sandbox', '--disable-setuid-sandbox']
+
+# Context options per platform; anything not listed uses "default"
+CONTEXT_OPTIONS: Dict[str, dict] = {
+    "default": {
+        "viewport": {"width": 1280, "height": 720},
+        "user_agent": USER_AGENT,
+    },
+    "ebay": {
+        "viewport": {"width": 1280, "height": 720},
+        "user_agent": USER_AGENT,
+        "bypass_csp": True,
+        "ignore_https_errors": True,
+    },
+}
+
+
+class BrowserPool:
+    """Shares one Chromium instance and hands out reusable contexts.
+
+    - `size` caps how many contexts can be leased at the same time
+    - contexts are recycled after `max_pages_per_context` pages
+    - a crashed/disconnected browser is relaunched on the next lease
+    """
+
+    def __init__(self, size: Optional[int] = None, max_pages_per_context: Optional[int] = None,
+                 headless: Optional[bool] = None):
+        self.size = size or int(os.getenv("SCRAPER_POOL_SIZE", "4"))
+        self.max_pages_per_context = max_pages_per_context or int(os.getenv("SCRAPER_CONTEXT_MAX_PAGES", "50"))
+        if headless is None:
+            headless = os.getenv("SCRAPER_HEADLESS", "true").lower() not in ("0", "false", "no")
+        self.headless = headless
+
+        self._playwright: Optional[Playwright] = None
+        self._browser: Optional[Browser] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._idle: Dict[str, List[BrowserContext]] = {}
+        self._page_counts: Dict[BrowserContext, int] = {}
+        self.stats = {
+            "leases": 0,
+            "waits": 0,
+            "in_use": 0,
+            "contexts_created": 0,
+            "recycles": 0,
+            "browser_launches": 0,
+            "browser_restarts": 0,
+        }
+
+    async def _ensure_started(self):
+        # asyncio primitives are created lazily so they bind to the running loop
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                print("⚠️ Browser disconnected, relaunching...")
+                self.stats["browser_restarts"] += 1
+                await self._drop_browser()
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=self.headless, args=BROWSER_ARGS)
+            self.stats["browser_launches"] += 1
+            print(f"✅ Browser pool started (size={self.size}, headless={self.headless})")
+
+    async def _drop_browser(self):
+        """Forget every context of the current browser and close it."""
+        self._idle = {}
+        self._page_counts = {}
+        browser, self._browser = self._browser, None
+        if browser is not None:
+            try:
+                await browser.close()
+            except Exception:
+                pass
+
+    async def _new_context(self, platform: str) -> BrowserContext:
+        options = CONTEXT_OPTIONS.get(platform, CONTEXT_OPTIONS["default"])
+        context = await self._browser.new_context(**options)
+        # Abort images/fonts/media/trackers the extractors never read
+        await request_blocker.install(context, platform)
+        self._page_counts[context] = 0
+        context.on("page", lambda _page: self._count_page(context))
+        self.stats["contexts_created"] += 1
+        return context
+
+    def _count_page(self, context: BrowserContext):
+        if context in self._page_counts:
+            self._page_counts[context] += 1
+
+    async def _acquire_context(self, platform: str) -> BrowserContext:
+        await self._ensure_started()
+        idle = self._idle.get(platform, [])
+        while idle:
+            context = idle.pop()
+            if context in self._page_counts:
+                return context
+        return await self._new_context(platform)
+
+    async def _release_context(self, platform: str, context: BrowserContext, healthy: bool):
+        # Leave nothing open for the next lease
+        for page in list(context.pages):
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+        worn_out = self._page_counts.get(context, 0) >= self.max_pages_per_context
+        alive = self._browser is not None and self._browser.is_connected() and context in self._page_counts
+        idle_total = sum(len(contexts) for contexts in self._idle.values())
+        if healthy and alive and not worn_out and idle_total < self.size:
+            self._idle.setdefault(platform, []).append(context)
+            return
+
+        self._page_counts.pop(context, None)
+        self.stats["recycles"] += 1
+        try:
+            await context.close()
+        except Exception:
+            pass
+
+    @asynccontextmanager
+    async def lease(self, platform: str = "default", context: Optional[BrowserContext] = None):
+        """Lease a browser context for `platform`.
+
+        If the caller already holds a context it is passed straight through, so
+        scraper functions can be called both from ScraperEngine and standalone.
+        """
+        if context is not None:
+            yield context
+            return
+
+        await self._ensure_started()
+        if self._slots.locked():
+            self.stats["waits"] += 1
+        async with self._slots:
+            context = await self._acquire_context(platform)
+            self.stats["leases"] += 1
+            self.stats["in_use"] += 1
+            healthy = True
+            try:
+                yield context
+            except BaseException:
+                # Don't hand a context that just blew up to the next caller
+                healthy = False
+                raise
+            finally:
+                self.stats["in_use"] -= 1
+                await self._release_context(platform, context, healthy)
+
+    def metrics(self) -> dict:
+        return {
+            **self.stats,
+            "size": self.size,
+            "idle": sum(len(contexts) for contexts in self._idle.values()),
+            "max_pages_per_context": self.max_pages_per_context,
+            "headless": self.headless,
+            "browser_connected": bool(self._browser and self._browser.is_connected()),
+        }
+
+    async def close(self):
+        for contexts in self._idle.values():
+            for context in contexts:
+                try:
+                    await context.close()
+                except Exception:
+                    pass
+        await self._drop_browser()
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+
+browser_pool = BrowserPool()
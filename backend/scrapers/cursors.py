@@ -0,0 +1,65 @@
+# scrapers/cursors.py
+# Per-product review high-water marks for incremental scraping. For every
+# (platform, product url) the scrape_cursors collection keeps hashes of the newest
+# reviews already stored. Paginators stop as soon as they reach a known review
+# and ScraperEngine appends only the new ones to the existing scraped_results doc.
+# Urls are the canonical ones extractors.product_links returns, stable across searches.
+#   SCRAPER_INCREMENTAL=false   always re-scrape and store full documents
+import os
+from datetime import datetime, timezone
+from typing import Iterable, List, Set
+
+from ..utils.fingerprint import dedupe_reviews, review_fingerprint
+
+INCREMENTAL = os.getenv("SCRAPER_INCREMENTAL", "true").lower() not in ("0", "false", "no")
+# How many recent review hashes to remember per product
+CURSOR_MAX_HASHES = int(os.getenv("SCRAPER_CURSOR_MAX_HASHES", "500"))
+
+
+# Cursor entries are review fingerprints, the same hashes review_fingerprints uses
+review_hash = review_fingerprint
+
+
+class ReviewCursorStore:
+    def __init__(self, collection=None):
+        self._collection = collection
+
+    @property
+    def collection(self):
+        # Imported lazily so scrapers can still run standalone without MongoDB
+        if self._collection is None:
+            from ..db.database import scrape_cursors_collection
+            self._collection = scrape_cursors_collection
+        return self._collection
+
+    async def known(self, platform: str, url: str) -> Set[str]:
+        """Hashes of reviews already stored for this product (empty on first scrape)."""
+        if not INCREMENTAL:
+            return set()
+        try:
+            cursor = await self.collection.find_one({"platform": platform, "url": url}, {"hashes": 1})
+        except Exception as e:
+            print(f"Error loading review cursor for {url}: {e}")
+            return set()
+        return set(cursor["hashes"]) if cursor else set()
+
+    async def advance(self, platform: str, url: str, new_reviews: Iterable[str]) -> None:
+        """Remember `new_reviews` (newest first) as seen."""
+        hashes: List[str] = [review_hash(review) for review in new_reviews]
+        update = {
+            "$set": {"last_scraped_at": datetime.now(timezone.utc)},
+            "$inc": {"review_count": len(hashes)},
+        }
+        if hashes:
+            update["$set"]["newest_hash"] = hashes[0]
+            # Newest first, capped so the document stays small
+            update["$push"] = {"hashes": {"$each": hashes, "$position": 0, "$slice": CURSOR_MAX_HASHES}}
+        await self.collection.update_one({"platform": platform, "url": url}, update, upsert=True)
+
+
+def new_reviews(reviews: Iterable[str], known: Set[str]) -> List[str]:
+    """Reviews whose fingerprint isn't in `known`, de-duplicated, original order kept."""
+    return dedupe_reviews(reviews, set(known))
+
+
+review_cursors = ReviewCursorStore()
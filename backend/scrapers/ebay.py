@@ -1,6 +1,11 @@
 import asyncio
-from playwright.async_api import async_playwright
-import pandas as pd
+from .browser_pool import browser_pool
+from .rate_limit import domain_limiter
+from .utils import scrape_pages
+from .waits import wait_ready
+from .extractors import extract_page, normalize_ebay_product, product_links
+from .http_fetch import http_fetcher
+from ..utils.fingerprint import dedupe_reviews
 from datetime import datetime
 import re
 import random
@@ -17,20 +22,98 @@ def delete_previous_csv_files():
         except Exception as e:
             print(f"Error deleting {file}: {e}")
 
-async def scrape_product_ebay(product_name, max_products=1, max_retries=3):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(
-            headless=False,
-            args=['--disable-dev-shm-usage', '--no-sandbox', '--disable-setuid-sandbox']
-        )
-        context = await browser.new_context(
-            viewport={"width": 1280, "height": 720},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36',
-            bypass_csp=True,
-            ignore_https_errors=True
-        )
+async def _collect_ebay_feedback(context, feedback_link):
+    """Reviews from the full feedback page: plain HTTP first, a browser tab if that falls short."""
+    raw_feedback = await http_fetcher.extract(feedback_link, "ebay", "reviews")
+    if raw_feedback is not None:
+        return dedupe_reviews(raw_feedback.get("reviews") or [])
+
+    feedback_page = await context.new_page()
+    try:
+        await domain_limiter.acquire(feedback_link)
+        await feedback_page.goto(feedback_link, wait_until='domcontentloaded')
+        await wait_ready(feedback_page, "ebay", "reviews")
+        raw_feedback = await extract_page(feedback_page, "ebay", "reviews")
+        return dedupe_reviews(raw_feedback.get("reviews") or [])
+    except Exception as e:
+        print(f"Error loading feedback page: {e}")
+        return []
+    finally:
+        await feedback_page.close()
+
+async def _load_ebay_product(context, url, max_retries=3):
+    """Render an item page in the browser and extract it (used when plain HTTP falls short)."""
+    page = await context.new_page()
+    try:
+        # Verify URL is accessible
+        for attempt in range(max_retries):
+            try:
+                # Politeness budget shared by all pages hitting this domain
+                await domain_limiter.acquire(url)
+                response = await page.goto(url, timeout=30000, wait_until='domcontentloaded')
+                if response.status == 404:
+                    print(f"Product page not found (404): {url}")
+                    continue
+
+                # Wait for title/price instead of a fixed delay
+                await wait_ready(page, "ebay", "product")
+
+                # Verify we're on a valid product page
+                title = await page.title()
+                if not title or title == '':
+                    raise Exception("Empty page loaded")
+
+                # Check if we're on a valid product page
+                if "Page Not Found" in title or "Error" in title:
+                    print(f"Invalid product page: {url}")
+                    continue
+
+                # Additional validation - check for product title element
+                title_elem = page.locator("h1.x-item-title__mainTitle, h1[itemprop='name']")
+                if await title_elem.count() == 0:
+                    print(f"No product title found on page: {url}")
+                    continue
+
+                break
+            except Exception as e:
+                if attempt == max_retries - 1:
+                    print(f"Failed to load product page after {max_retries} attempts: {url}")
+                    continue
+                # The domain limiter paces the retry
+                print(f"Attempt {attempt + 1} failed for {url}, retrying...")
+
+        return await extract_page(page, "ebay", "product")
+    finally:
+        await page.close()
+
+async def _scrape_ebay_product(context, url, index, max_retries=3):
+    """Extract one product page; several run at once on separate tabs."""
+    # Item pages are server-rendered, so try a plain HTTP fetch before opening a tab
+    raw = await http_fetcher.extract(url, "ebay", "product")
+    if raw is None:
+        raw = await _load_ebay_product(context, url, max_retries)
+    product_data = normalize_ebay_product(raw, url)
+    feedback_link = product_data.pop("feedback_link")
+    if product_data['seller_rating'] != "N/A":
+        print(f"Found seller rating: {product_data['seller_rating']}%")
+    print(f"Found {len(product_data['specifications'])} specifications")
+
+    # Prefer the full feedback page; otherwise keep the reviews shown on the product page
+    print("Collecting product reviews from product detail page...")
+    if feedback_link:
+        print(f"Opening feedback page: {feedback_link}")
+        product_data['reviews'] = await _collect_ebay_feedback(context, feedback_link)
+    else:
+        print("No 'See all feedback' button found, using reviews from product page...")
+        product_data['reviews'] = dedupe_reviews(product_data['reviews'])
+
+    print(f"\nCollected {len(product_data['reviews'])} reviews in total")
+    print(f"Completed processing product {index}")
+    return product_data
+
+async def scrape_product_ebay(product_name, max_products=1, max_retries=3, context=None, progress=None):
+    async with browser_pool.lease("ebay", context) as context:
         page = await context.new_page()
-        all_products_data = []
         
         try:
             # Navigate directly to eBay search results with retries
@@ -40,15 +123,13 @@ async def scrape_product_ebay(product_name, max_products=1, max_retries=3):
             
             for attempt in range(max_retries):
                 try:
+                    await domain_limiter.acquire(search_url)
                     await page.goto(search_url, timeout=30000, wait_until='domcontentloaded')
-                    await page.wait_for_load_state("domcontentloaded", timeout=30000)
-                    await asyncio.sleep(3)  # Let the page settle
                     break
                 except Exception as e:
                     if attempt == max_retries - 1:
                         raise e
                     print(f"Attempt {attempt + 1} failed, retrying...")
-                    await asyncio.sleep(2)
             
             # Take a screenshot for debugging if needed
             # await page.screenshot(path="screenshot.png")
@@ -58,50 +139,11 @@ async def scrape_product_ebay(product_name, max_products=1, max_retries=3):
             print("Looking for product links...")
             
             # Wait for the search results to load
-            await page.wait_for_selector("li.s-item", timeout=30000)
-            await asyncio.sleep(2)  # Give extra time for dynamic content
+            await wait_ready(page, "ebay", "search")
             
-            # Try different selectors for product links
-            selectors = [
-                "li.s-item a.s-item__link",
-                "li.s-item a[href*='itm']",
-                "div.s-item__info a[href*='itm']"
-            ]
-            
-            # First collect all potential URLs
-            potential_urls = []
-            for selector in selectors:
-                try:
-                    print(f"Trying selector: {selector}")
-                    links = await page.query_selector_all(selector)
-                    
-                    # Skip first 4 products (ads)
-                    for link in links[4:]:
-                        try:
-                            href = await link.get_attribute("href")
-                            if not href or 'itm' not in href:
-                                continue
-                                
-                            # Extract item ID from the URL
-                            item_id = None
-                            if 'itm/' in href:
-                                item_id = href.split('itm/')[-1].split('/')[0].split('?')[0]
-                            
-                            # Validate item ID format
-                            if not item_id or not item_id.isdigit() or len(item_id) < 8:
-                                continue
-                                
-                            normalized_url = f"https://www.ebay.com/itm/{item_id}"
-                            if normalized_url not in potential_urls:
-                                potential_urls.append(normalized_url)
-                                
-                        except Exception as e:
-                            print(f"Error processing link: {e}")
-                            continue
-                            
-                except Exception as e:
-                    print(f"Error with selector {selector}: {e}")
-                    continue
+            # Collect every candidate link in one round-trip (first 4 results are ads)
+            raw = await extract_page(page, "ebay", "search")
+            potential_urls = product_links("ebay", raw)
             
             print(f"Found {len(potential_urls)} potential product URLs (excluding first 4 ad listings)")
             
@@ -120,38 +162,22 @@ async def scrape_product_ebay(product_name, max_products=1, max_retries=3):
                     try:
                         print(f"Validating URL {i+1}/{max_validation_attempts}: {url}")
                         
-                        # Navigate to the page and wait for it to load
-                        await validation_page.goto(url, timeout=30000, wait_until='networkidle')
-                        await asyncio.sleep(2)  # Give extra time for dynamic content
-                        
-                        # Try multiple selectors for product title
-                        title_selectors = [
-                            "h1.x-item-title__mainTitle",
-                            "h1[itemprop='name']",
-                            "div.ux-layout-section__content h1",
-                            "div.ux-layout-section__content span.ux-textspans--BOLD",
-                            "div.ux-layout-section__content span.ux-textspans"
-                        ]
-                        
-                        title_found = False
-                        for selector in title_selectors:
-                            try:
-                                title_elem = validation_page.locator(selector)
-                                if await title_elem.count() > 0:
-                                    title_text = await title_elem.first.inner_text()
-                                    if title_text and len(title_text.strip()) > 0:
-                                        title_found = True
-                                        product_urls.append(url)
-                                        print(f"Found valid product URL ({len(product_urls)} of {max_products}): {url}")
-                                        print(f"Product title: {title_text[:50]}...")
-                                        if len(product_urls) >= max_products:
-                                            print("Found all required products, stopping validation.")
-                                            break
-                                        break
-                            except Exception as e:
-                                continue
-                        
-                        if not title_found:
+                        # Any of the known title elements marks a real product page;
+                        # check over plain HTTP first and render only if that falls short
+                        raw_title = await http_fetcher.extract(url, "ebay", "validate")
+                        if raw_title is None:
+                            await domain_limiter.acquire(url)
+                            await validation_page.goto(url, timeout=30000, wait_until='domcontentloaded')
+                            await wait_ready(validation_page, "ebay", "product")
+                            raw_title = await extract_page(validation_page, "ebay", "validate")
+                        title_text = raw_title.get("title")
+                        if title_text:
+                            product_urls.append(url)
+                            print(f"Found valid product URL ({len(product_urls)} of {max_products}): {url}")
+                            print(f"Product title: {title_text[:50]}...")
+                            if len(product_urls) >= max_products:
+                                print("Found all required products, stopping validation.")
+                        else:
                             print(f"Skipping URL - no product title found: {url}")
                             
                     except Exception as e:
@@ -161,7 +187,6 @@ async def scrape_product_ebay(product_name, max_products=1, max_retries=3):
                     # Clear the page before next validation
                     try:
                         await validation_page.goto('about:blank')
-                        await asyncio.sleep(1)
                     except Exception:
                         # If clearing fails, create a new page
                         await validation_page.close()
@@ -175,205 +200,22 @@ async def scrape_product_ebay(product_name, max_products=1, max_retries=3):
                 
             print(f"Found {len(product_urls)} valid product URLs")
             
-            # Process each product
-            for index, url in enumerate(product_urls, 1):
-                print(f"\nProcessing product {index} of {len(product_urls)}...")
-                try:
-                    # Random delay between products (3-7 seconds)
-                    delay = random.uniform(3, 7)
-                    print(f"Waiting for {delay:.1f} seconds before processing next product...")
-                    await asyncio.sleep(delay)
-                    
-                    # Verify URL is accessible
-                    for attempt in range(max_retries):
-                        try:
-                            response = await page.goto(url, timeout=30000, wait_until='domcontentloaded')
-                            if response.status == 404:
-                                print(f"Product page not found (404): {url}")
-                                continue
-                            
-                            await page.wait_for_load_state("domcontentloaded", timeout=30000)
-                            await asyncio.sleep(random.uniform(2, 3))
-                            
-                            # Verify we're on a valid product page
-                            title = await page.title()
-                            if not title or title == '':
-                                raise Exception("Empty page loaded")
-                            
-                            # Check if we're on a valid product page
-                            if "Page Not Found" in title or "Error" in title:
-                                print(f"Invalid product page: {url}")
-                                continue
-                            
-                            # Additional validation - check for product title element
-                            title_elem = page.locator("h1.x-item-title__mainTitle, h1[itemprop='name']")
-                            if await title_elem.count() == 0:
-                                print(f"No product title found on page: {url}")
-                                continue
-                                
-                            break
-                        except Exception as e:
-                            if attempt == max_retries - 1:
-                                print(f"Failed to load product page after {max_retries} attempts: {url}")
-                                continue
-                            print(f"Attempt {attempt + 1} failed for {url}, retrying...")
-                            await asyncio.sleep(2)
-                    
-                    # Get product details
-                    title = "N/A"
-                    try:
-                        title_elem = page.locator("h1.x-item-title__mainTitle, h1[itemprop='name']")
-                        if await title_elem.count() > 0:
-                            title = await title_elem.first.inner_text()
-                    except Exception as e:
-                        print(f"Error getting title: {e}")
-                    
-                    # Get brand
-                    brand = "N/A"
-                    try:
-                        brand_elem = page.locator("span.ux-textspans--BOLD")
-                        if await brand_elem.count() > 0:
-                            brand = await brand_elem.first.inner_text()
-                        else:
-                            # Try in item specifics
-                            brand_elem2 = page.locator("span.ux-textspans.ux-textspans--BOLD")
-                            if await brand_elem2.count() > 0:
-                                brand = await brand_elem2.first.inner_text()
-                    except Exception as e:
-                        print(f"Error getting brand: {e}")
-                    
-                    # Get price
-                    price = "N/A"
-                    try:
-                        price_elem = page.locator("[data-testid='x-price-primary'] span.ux-textspans")
-                        if await price_elem.count() > 0:
-                            price = await price_elem.first.inner_text()
-                    except Exception as e:
-                        print(f"Error getting price: {e}")
-                    
-                    # Get seller rating
-                    seller_rating = "N/A"
-                    try:
-                        # Get seller rating from the store information highlights
-                        rating_elem = page.locator("h4.x-store-information__highlights span.ux-textspans")
-                        if await rating_elem.count() > 0:
-                            rating_text = await rating_elem.first.inner_text()
-                            if rating_text:
-                                # Extract numeric rating (e.g., "98.5% positive feedback" -> "98.5")
-                                rating_match = re.search(r'(\d+(?:\.\d+)?)', rating_text)
-                                if rating_match:
-                                    seller_rating = rating_match.group(1)
-                                    print(f"Found seller rating: {seller_rating}%")
-                    except Exception as e:
-                        print(f"Error getting seller rating: {e}")
-                    
-                    # Get product specifications
-                    specifications = {}
-                    try:
-                        # Wait for specifications section to load
-                        await page.wait_for_selector("div.ux-layout-section-module-evo", timeout=10000)
-                        
-                        # Get all specification rows
-                        spec_rows = await page.locator("dl.ux-labels-values").all()
-                        
-                        for row in spec_rows:
-                            try:
-                                # Get specification name and value
-                                name_elem = row.locator("dt.ux-labels-values__labels span.ux-textspans")
-                                value_elem = row.locator("dd.ux-labels-values__values span.ux-textspans")
-                                
-                                if await name_elem.count() > 0 and await value_elem.count() > 0:
-                                    name = await name_elem.first.inner_text()
-                                    value = await value_elem.first.inner_text()
-                                    
-                                    if name and value:
-                                        # Clean up the name and value
-                                        name = name.strip()
-                                        value = value.strip()
-                                        
-                                        # Add to specifications dictionary
-                                        specifications[name] = value
-                                        print(f"Found specification: {name} = {value}")
-                            except Exception as e:
-                                print(f"Error processing specification row: {e}")
-                                continue
-                    except Exception as e:
-                        print(f"Error getting specifications: {e}")
-                    
-                    # Get product reviews from the detail page
-                    reviews = []
-                    print("Collecting product reviews from product detail page...")
-                    
-                    try:
-                        # First try to find and click the "See all feedback" button
-                        feedback_button = page.locator("a.fdbk-detail-list__btn-container__btn").first
-                        if await feedback_button.count() > 0:
-                            print("Found 'See all feedback' button, clicking it...")
-                            # Get the href attribute
-                            href = await feedback_button.get_attribute("href")
-                            if href:
-                                print(f"Opening feedback page: {href}")
-                                # Open the feedback page in a new tab
-                                feedback_page = await context.new_page()
-                                try:
-                                    await feedback_page.goto(href, wait_until='networkidle')
-                                    await asyncio.sleep(3)  # Wait for the feedback page to load
-                                    
-                                    # Get reviews from feedback page
-                                    review_elements = await feedback_page.locator("div.fdbk-container__details__comment span").all()
-                                    for element in review_elements:
-                                        try:
-                                            text = await element.inner_text()
-                                            if text and text.strip() and len(text.strip()) > 10:
-                                                reviews.append(text.strip())
-                                        except Exception as e:
-                                            print(f"Error extracting review text: {e}")
-                                            continue
-                                    
-                                except Exception as e:
-                                    print(f"Error loading feedback page: {e}")
-                                finally:
-                                    await feedback_page.close()
-                        else:
-                            print("No 'See all feedback' button found, trying to collect reviews from product page...")
-                            # Try to get reviews directly from product page
-                            review_elements = await page.locator("div.fdbk-container__details__comment span").all()
-                            for element in review_elements:
-                                try:
-                                    text = await element.inner_text()
-                                    if text and text.strip() and len(text.strip()) > 10:
-                                        reviews.append(text.strip())
-                                except Exception as e:
-                                    print(f"Error extracting review text: {e}")
-                                    continue
-                    
-                    except Exception as e:
-                        print(f"Error collecting reviews: {str(e)}")
-                    
-                    print(f"\nCollected {len(reviews)} reviews in total")
+            # Process the products on a bounded set of tabs
+            print(f"\nProcessing {len(product_urls)} products...")
+            if progress:
+                await progress(0, len(product_urls))
+            all_products_data = await scrape_pages(
+                product_urls,
+                lambda url, index: _scrape_ebay_product(context, url, index, max_retries),
+                progress=progress
+            )
 
-                    # Store product data
-                    product_data = {
-                        'url': url,
-                        'title': title.strip() if title else "N/A",
-                        'brand': brand.strip() if brand else "N/A",
-                        'price': price.strip() if price else "N/A",
-                        'seller_rating': seller_rating,
-                        'reviews': reviews,
-                        'specifications': specifications  # Add specifications to the product data
-                    }
-                    all_products_data.append(product_data)
-                    print(f"Completed processing product {index}")
-                except Exception as e:
-                    print(f"Error processing product {index}: {e}")
-                    continue
-                await asyncio.sleep(2)
             return all_products_data
         except Exception as e:
             print(f"Error: {e}")
             return None
         finally:
-            await browser.close()
+            await page.close()
 
 def save_to_csv(products_data, search_query):
     if not products_data:
@@ -454,7 +296,14 @@ if __name__ == "__main__":
     # Modify the max products in product_urls list
     max_products = num_products
     
-    results = asyncio.run(scrape_product_ebay(product_name, max_products))
+    async def run_standalone():
+        try:
+            return await scrape_product_ebay(product_name, max_products)
+        finally:
+            await browser_pool.close()
+            await http_fetcher.close()
+
+    results = asyncio.run(run_standalone())
     if results:
         print(f"\nSuccessfully collected data for {len(results)} products")
         save_to_csv(results, product_name)
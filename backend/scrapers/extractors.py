@@ -0,0 +1,347 @@
+# scrapers/extractors.py
+# Batched DOM extraction: every field of a page is read by one in-page JavaScript
+# routine (a single page.evaluate round-trip) using the selector specs in
+# selector_config.py. The normalize_* helpers turn the raw payload into the
+# product dicts the scrapers have always returned. extract_html() applies the same
+# specs to stored HTML (lxml + cssselect) for offline re-parsing of snapshots.
+import re
+from typing import List, Optional
+from urllib.parse import parse_qs, unquote, urlsplit
+
+from .selector_config import SELECTORS
+from .snapshots import snapshot_store
+
+EXTRACT_JS = """
+(spec) => {
+    const clean = (t) => (t || "").trim();
+    const visible = (el) => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+    const asItem = (s) => (typeof s === "string" ? { css: s } : s);
+    const query = (root, css) => {
+        try { return Array.from(root.querySelectorAll(css)); } catch (e) { return []; }
+    };
+    const valueOf = (el, attr) => clean(attr ? el.getAttribute(attr) : (el.innerText || el.textContent));
+    const accepts = (text, f) => {
+        if (!text) return false;
+        if (f.longer_than && text.length <= f.longer_than) return false;
+        if (f.contains && !text.toLowerCase().includes(f.contains.toLowerCase())) return false;
+        if (f.pattern && !new RegExp(f.pattern, "i").test(text)) return false;
+        return true;
+    };
+    const first = (root, f) => {
+        for (const s of f.selectors.map(asItem)) {
+            for (const el of query(root, s.css)) {
+                if (f.visible && !visible(el)) continue;
+                const text = valueOf(el, s.attr);
+                if (accepts(text, f)) return text;
+            }
+        }
+        return null;
+    };
+    const all = (root, f) => {
+        for (const s of f.selectors.map(asItem)) {
+            const texts = query(root, s.css).map((el) => valueOf(el, s.attr)).filter((t) => accepts(t, f));
+            if (texts.length) return texts;
+        }
+        return [];
+    };
+    const attrs = (root, f) => {
+        const out = [];
+        for (const s of f.selectors.map(asItem)) {
+            for (const el of query(root, s.css).slice(f.skip || 0)) {
+                const value = valueOf(el, s.attr);
+                if (value) out.push(value);
+            }
+        }
+        return out;
+    };
+    const pairs = (root, f) => {
+        const out = [];
+        for (const row of query(root, f.rows)) {
+            const name = row.querySelector(f.name);
+            const value = row.querySelector(f.value);
+            if (name && value) {
+                const n = valueOf(name), v = valueOf(value);
+                if (n && v) out.push([n, v]);
+            }
+        }
+        return out;
+    };
+    const items = (root, f) => {
+        const out = [];
+        for (const container of query(root, f.container)) {
+            let text = first(container, { selectors: f.selectors, longer_than: f.longer_than });
+            if (!text) text = valueOf(container);
+            if (accepts(text, f)) out.push(text);
+        }
+        return out;
+    };
+    const extractors = { first, all, attrs, pairs, items };
+    const result = {};
+    for (const [name, f] of Object.entries(spec)) {
+        try { result[name] = extractors[f.type](document, f); } catch (e) { result[name] = null; }
+    }
+    return result;
+}
+"""
+
+
+def page_spec(platform: str, page_type: str) -> dict:
+    return SELECTORS[platform][page_type]
+
+
+async def extract_page(page, platform: str, page_type: str) -> dict:
+    """Read every configured field of `page` in a single round-trip."""
+    await snapshot_store.capture(page, platform, page_type)
+    return await page.evaluate(EXTRACT_JS, page_spec(platform, page_type))
+
+
+# ---- offline (stored HTML) -----------------------------------------------
+# Mirrors EXTRACT_JS. There is no layout offline, so "visible" is ignored and
+# element text is text_content() with whitespace collapsed rather than innerText.
+
+def _html_text(el, attr: Optional[str] = None) -> str:
+    if attr:
+        return (el.get(attr) or "").strip()
+    return re.sub(r"\s+", " ", el.text_content() or "").strip()
+
+
+def _html_query(root, css: str) -> list:
+    try:
+        return root.cssselect(css)
+    except Exception:
+        return []
+
+
+def _html_accepts(text: str, f: dict) -> bool:
+    if not text:
+        return False
+    if f.get("longer_than") and len(text) <= f["longer_than"]:
+        return False
+    if f.get("contains") and f["contains"].lower() not in text.lower():
+        return False
+    if f.get("pattern") and not re.search(f["pattern"], text, re.IGNORECASE):
+        return False
+    return True
+
+
+def _html_selectors(f: dict) -> list:
+    return [{"css": s} if isinstance(s, str) else s for s in f.get("selectors", [])]
+
+
+def _html_first(root, f):
+    for s in _html_selectors(f):
+        for el in _html_query(root, s["css"]):
+            text = _html_text(el, s.get("attr"))
+            if _html_accepts(text, f):
+                return text
+    return None
+
+
+def _html_all(root, f):
+    for s in _html_selectors(f):
+        texts = [t for t in (_html_text(el, s.get("attr")) for el in _html_query(root, s["css"]))
+                 if _html_accepts(t, f)]
+        if texts:
+            return texts
+    return []
+
+
+def _html_attrs(root, f):
+    out = []
+    for s in _html_selectors(f):
+        for el in _html_query(root, s["css"])[f.get("skip", 0):]:
+            value = _html_text(el, s.get("attr"))
+            if value:
+                out.append(value)
+    return out
+
+
+def _html_pairs(root, f):
+    out = []
+    for row in _html_query(root, f["rows"]):
+        names, values = _html_query(row, f["name"]), _html_query(row, f["value"])
+        if names and values:
+            name, value = _html_text(names[0]), _html_text(values[0])
+            if name and value:
+                out.append([name, value])
+    return out
+
+
+def _html_items(root, f):
+    out = []
+    for container in _html_query(root, f["container"]):
+        text = _html_first(container, {"selectors": f.get("selectors", []), "longer_than": f.get("longer_than")})
+        if not text:
+            text = _html_text(container)
+        if _html_accepts(text, f):
+            out.append(text)
+    return out
+
+
+HTML_EXTRACTORS = {
+    "first": _html_first,
+    "all": _html_all,
+    "attrs": _html_attrs,
+    "pairs": _html_pairs,
+    "items": _html_items,
+}
+
+
+def extract_html(html: str, platform: str, page_type: str) -> dict:
+    """Same result shape as extract_page(), computed from stored HTML without a browser."""
+    # Only needed offline; lxml's cssselect support needs the `cssselect` package too
+    import lxml.html
+    import lxml.cssselect  # noqa: F401 - fail loudly instead of matching nothing
+
+    root = lxml.html.fromstring(html)
+    result = {}
+    for name, f in page_spec(platform, page_type).items():
+        try:
+            result[name] = HTML_EXTRACTORS[f["type"]](root, f)
+        except Exception:
+            result[name] = None
+    return result
+
+
+def _absolute(href: str, base: str) -> str:
+    return href if href.startswith("http") else f"{base}{href}"
+
+
+_ASIN = re.compile(r'/(?:dp|gp/product)/([A-Z0-9]{10})(?:[/?]|$)')
+
+
+def _amazon_url(href: str) -> str:
+    # https://www.amazon.com/dp/<ASIN>; hrefs carry per-search ref=/qid=/sr= parts
+    # (sponsored ones wrap the product path url-encoded)
+    match = _ASIN.search(unquote(href))
+    if match:
+        return f"https://www.amazon.com/dp/{match.group(1)}"
+    return _absolute(href, "https://www.amazon.com").split('?')[0]
+
+
+def _flipkart_url(href: str) -> str:
+    # Product path plus pid; iid/ssid/srno/qH and friends change every search session
+    parts = urlsplit(_absolute(href, "https://www.flipkart.com"))
+    pid = parse_qs(parts.query).get("pid")
+    return f"https://www.flipkart.com{parts.path}" + (f"?pid={pid[0]}" if pid else "")
+
+
+def _specifications(pairs, strip_colon: bool = False) -> dict:
+    specifications = {}
+    for name, value in pairs or []:
+        name = name.strip().replace(':', '') if strip_colon else name.strip()
+        if name and value:
+            specifications[name] = value.strip()
+    return specifications
+
+
+def _number(text: Optional[str]) -> Optional[str]:
+    match = re.search(r'(\d+(?:\.\d+)?)', text or "")
+    return match.group(1) if match else None
+
+
+# ---- search pages --------------------------------------------------------
+
+def canonical_product_url(platform: str, href: str) -> Optional[str]:
+    """Stable URL of a product link (None if `href` isn't one).
+
+    The same product gets the same URL on every search, so per-url state (review
+    cursors, fingerprints, the incremental scraped_results doc) carries over runs.
+    Canonical URLs map to themselves.
+    """
+    if platform == "amazon":
+        if "/dp/" in href or "/gp/" in href:
+            return _amazon_url(href)
+    elif platform == "flipkart":
+        return _flipkart_url(href)
+    elif platform == "ebay":
+        # Normalize to https://www.ebay.com/itm/<item id>
+        if 'itm/' in href:
+            item_id = href.split('itm/')[-1].split('/')[0].split('?')[0]
+            if item_id.isdigit() and len(item_id) >= 8:
+                return f"https://www.ebay.com/itm/{item_id}"
+    return None
+
+
+def product_links(platform: str, raw: dict, max_products: Optional[int] = None) -> List[str]:
+    """Turn the raw search-page links into canonical, de-duplicated product URLs."""
+    urls = []
+    for href in raw.get("links") or []:
+        url = canonical_product_url(platform, href)
+        if url and url not in urls:
+            urls.append(url)
+            if max_products and len(urls) >= max_products:
+                break
+    return urls
+
+
+# ---- product pages -------------------------------------------------------
+
+def normalize_amazon_product(raw: dict, url: str) -> dict:
+    brand = raw.get("brand")
+    if brand:
+        brand = re.sub(r'^Visit the |^Brand: |^by |^From ', '', brand.strip())
+
+    whole, fraction = raw.get("price_whole"), raw.get("price_fraction")
+    price = (f"${whole}{fraction}" if fraction else f"${whole}") if whole else None
+
+    rating = raw.get("rating")
+    if rating:
+        rating = rating.split(" out")[0].strip()
+
+    return {
+        'url': url,
+        'title': (raw.get("title") or "N/A").strip(),
+        'brand': (brand or "N/A").strip(),
+        'price': (price or "N/A").strip(),
+        'rating': (rating or "N/A").strip(),
+        'reviews': raw.get("reviews") or [],
+        'specifications': _specifications(raw.get("specifications"), strip_colon=True)
+    }
+
+
+def normalize_flipkart_product(raw: dict, url: str) -> dict:
+    price = raw.get("price")
+    if price:
+        price = price.replace('₹', '').replace(',', '').strip()
+
+    brand = raw.get("brand")
+    if brand:
+        brand = re.sub(r'^(Brand|by|from)\s+', '', brand.strip(), flags=re.IGNORECASE)
+
+    review_link = raw.get("review_link")
+    reviews = raw.get("reviews") or []
+    return {
+        'url': url,
+        'title': (raw.get("title") or "N/A").strip(),
+        'brand': (brand or "N/A").strip(),
+        'price': price or "N/A",
+        'rating': _number(raw.get("rating")) or "N/A",
+        'total_reviews_found': len(reviews),
+        'reviews': reviews,
+        'specifications': _specifications(raw.get("specifications")),
+        'review_link': _absolute(review_link, "https://www.flipkart.com") if review_link else None,
+    }
+
+
+def normalize_ebay_product(raw: dict, url: str) -> dict:
+    return {
+        'url': url,
+        'title': (raw.get("title") or "N/A").strip(),
+        'brand': (raw.get("brand") or "N/A").strip(),
+        'price': (raw.get("price") or "N/A").strip(),
+        'seller_rating': _number(raw.get("seller_rating")) or "N/A",
+        'reviews': raw.get("reviews") or [],
+        'specifications': _specifications(raw.get("specifications")),
+        'feedback_link': raw.get("feedback_link"),
+    }
+
+
+NORMALIZERS = {
+    "amazon": normalize_amazon_product,
+    "flipkart": normalize_flipkart_product,
+    "ebay": normalize_ebay_product,
+}
+
+def normalize_product(platform: str, raw: dict, url: str) -> dict:
+    return NORMALIZERS[platform](raw, url)
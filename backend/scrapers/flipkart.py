@@ -1,7 +1,12 @@
 import asyncio
-from playwright.async_api import async_playwright
-from googletrans import Translator
-import pandas as pd
+from .browser_pool import browser_pool
+from .rate_limit import domain_limiter
+from .utils import scrape_pages
+from .waits import wait_ready
+from .extractors import extract_page, normalize_flipkart_product, product_links
+from .http_fetch import http_fetcher
+from .cursors import INCREMENTAL, review_cursors
+from ..utils.fingerprint import review_fingerprint
 from datetime import datetime
 import re
 import random
@@ -37,16 +42,135 @@ def cleanup_old_files():
     
     print(f"Cleanup complete. Removed {total_removed} files.\n")
 
-async def scrape_product_flipkart(product_name, max_products=1):
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=False)
-        context = await browser.new_context(
-            viewport={"width": 1280, "height": 720},
-            user_agent='Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/112.0.0.0 Safari/537.36'
-        )
+async def _load_flipkart_reviews(page, url):
+    """Extract one review page: plain HTTP first, the product's browser tab if that falls short."""
+    raw = await http_fetcher.extract(url, "flipkart", "reviews")
+    if raw is not None:
+        return raw
+    await domain_limiter.acquire(url)
+    await page.goto(url, wait_until="domcontentloaded")
+    await wait_ready(page, "flipkart", "reviews")
+    return await extract_page(page, "flipkart", "reviews")
+
+async def _scrape_flipkart_product(context, url, index, incremental=False):
+    """Extract one product page on its own tab so several can run at once.
+
+    incremental: newest reviews first, stopping at the first one the last scrape
+    stored. Only for single-product scrapes; competitor snapshots keep every review.
+    """
+    page = await context.new_page()
+    try:
+        # Politeness budget shared by all pages hitting this domain
+        await domain_limiter.acquire(url)
+        await page.goto(url, timeout=60000)
+        await page.wait_for_load_state("domcontentloaded")
+
+        # Wait for title/price/review containers instead of fixed delays
+        await wait_ready(page, "flipkart", "product")
+        print("\nExtracting product details...")
+
+        # Take a debug screenshot
+        # await page.screenshot(path="price_debug.png")
+
+        # All product fields in one page.evaluate instead of a round-trip per element
+        raw = await extract_page(page, "flipkart", "product")
+        product_data = normalize_flipkart_product(raw, url)
+        review_url = product_data.pop("review_link")
+        print(f"[DEBUG] Found title: {product_data['title']}, price: {product_data['price']}, rating: {product_data['rating']}")
+
+        # Reviews collection
+        reviews = []
+        print("\nCollecting reviews...")
+
+        try:
+            # If no review link found, try constructing the URL
+            if not review_url and '/p/' in page.url:
+                review_url = page.url.replace('/p/', '/product-reviews/')
+                if '?' in review_url:
+                    review_url = review_url.split('?')[0]
+
+            if review_url and incremental and 'sortOrder=' not in review_url:
+                # Newest first, so pagination can stop at the first review we already have
+                review_url += ('&' if '?' in review_url else '?') + 'sortOrder=MOST_RECENT'
+
+            if review_url:
+                print(f"Navigating to reviews page: {review_url}")
+                known = await review_cursors.known("flipkart", url) if incremental else set()
+                reached_known = False
+                seen = set()  # fingerprints collected this run
+                current_url = review_url
+                page_num = 1
+                max_pages = 10  # Limit to 10 pages to avoid infinite loops
+
+                while len(reviews) < 100 and page_num <= max_pages:
+                    print(f"\nProcessing reviews page {page_num}...")
+
+                    # One round-trip for every review on the page plus the next-page link
+                    raw_reviews = await _load_flipkart_reviews(page, current_url)
+                    page_reviews = raw_reviews.get("reviews") or []
+                    print(f"Found {len(page_reviews)} reviews on current page")
+
+                    # If no reviews found on current page, stop the collection
+                    if not page_reviews:
+                        print("No reviews found on current page. Stopping review collection.")
+                        break
+
+                    reviews_found_on_page = 0
+                    for cleaned_review in page_reviews:
+                        fingerprint = review_fingerprint(cleaned_review)
+                        if fingerprint in known:
+                            reached_known = True
+                            continue
+                        if fingerprint not in seen:
+                            seen.add(fingerprint)
+                            reviews.append(cleaned_review)
+                            reviews_found_on_page += 1
+                            if len(reviews) >= 100:
+                                break
+
+                    print(f"Successfully extracted {reviews_found_on_page} reviews from page {page_num}")
+
+                    if len(reviews) >= 100:
+                        break
+
+                    if reached_known:
+                        print("Reached reviews stored by the last scrape, stopping review collection.")
+                        break
+
+                    # Try URL-based navigation first, then the "next" link
+                    next_url = None
+                    if 'page=' in current_url:
+                        next_url = re.sub(r'page=\d+', f'page={page_num + 1}', current_url)
+                    elif raw_reviews.get("next_page"):
+                        next_url = raw_reviews["next_page"]
+                        if not next_url.startswith('http'):
+                            next_url = f"https://www.flipkart.com{next_url}"
+
+                    if not next_url or next_url == current_url:
+                        print("No more review pages available")
+                        break
+
+                    current_url = next_url
+                    page_num += 1
+
+            else:
+                print("Could not find or construct review page URL")
+
+        except Exception as e:
+            print(f"Error in review collection: {e}")
+
+        print(f"\nCollected {len(reviews)} reviews in total")
+
+        product_data['reviews'] = reviews
+        product_data['total_reviews_found'] = len(reviews)
+        print(f"Completed processing product {index}")
+        return product_data
+    finally:
+        await page.close()
+
+async def scrape_product_flipkart(product_name, max_products=1, context=None, progress=None):
+    async with browser_pool.lease("flipkart", context) as context:
         page = await context.new_page()
-        translator = Translator()
-        all_products_data = []
         
         try:
             # Navigate directly to search results
@@ -54,436 +178,38 @@ async def scrape_product_flipkart(product_name, max_products=1):
             search_url = f"https://www.flipkart.com/search?q={product_name.replace(' ', '+')}"
             print(f"Navigating to: {search_url}")
             
+            await domain_limiter.acquire(search_url)
             await page.goto(search_url, timeout=60000)
             await page.wait_for_load_state("domcontentloaded")
-            await asyncio.sleep(3)  # Let the page settle
+            await wait_ready(page, "flipkart", "search")
             
             # Take a screenshot for debugging if needed
             # await page.screenshot(path="screenshot.png")
             # print("Saved screenshot to screenshot.png for debugging")
             
-            # Get multiple product links
+            # Get multiple product links (grid view, list view, then any /p/ link)
             print("Looking for product links...")
-            product_urls = []
-            # Close login popup if present
-            try:
-                close_btn = page.locator("button._2KpZ6l._2doB4z")
-                if await close_btn.count() > 0:
-                    await close_btn.click()
-                    await asyncio.sleep(1)
-            except Exception:
-                pass
-
-            # Try to get all product links from the search result page
-            # 1. Try for grid view (most electronics)
-            grid_links = await page.locator("a._1fQZEK").all()
-            print(f"Found {len(grid_links)} grid view product links")
-            for link in grid_links:
-                if len(product_urls) >= max_products:
-                    break
-                href = await link.get_attribute("href")
-                if href:
-                    full_url = f"https://www.flipkart.com{href}" if not href.startswith('http') else href
-                    if full_url not in product_urls:
-                        product_urls.append(full_url)
-                        print(f"Found product URL ({len(product_urls)} of {max_products}): {full_url}")
-                        await asyncio.sleep(random.uniform(0.5, 1.5))
-
-            # 2. Try for list view (fashion, some other categories)
-            if len(product_urls) < max_products:
-                list_links = await page.locator("a.s1Q9rs").all()
-                print(f"Found {len(list_links)} list view product links")
-                for link in list_links:
-                    if len(product_urls) >= max_products:
-                        break
-                    href = await link.get_attribute("href")
-                    if href:
-                        full_url = f"https://www.flipkart.com{href}" if not href.startswith('http') else href
-                        if full_url not in product_urls:
-                            product_urls.append(full_url)
-                            print(f"Found product URL ({len(product_urls)} of {max_products}): {full_url}")
-                            await asyncio.sleep(random.uniform(0.5, 1.5))
-
-            # 3. Fallback: any anchor with /p/ in href
-            if len(product_urls) < max_products:
-                all_links = await page.locator("a[href*='/p/']").all()
-                print(f"Found {len(all_links)} fallback product links")
-                for link in all_links:
-                    if len(product_urls) >= max_products:
-                        break
-                    href = await link.get_attribute("href")
-                    if href:
-                        full_url = f"https://www.flipkart.com{href}" if not href.startswith('http') else href
-                        if full_url not in product_urls:
-                            product_urls.append(full_url)
-                            print(f"Found product URL ({len(product_urls)} of {max_products}): {full_url}")
-                            await asyncio.sleep(random.uniform(0.5, 1.5))
+            raw = await extract_page(page, "flipkart", "search")
+            product_urls = product_links("flipkart", raw, max_products)
+            for position, url in enumerate(product_urls, 1):
+                print(f"Found product URL ({position} of {max_products}): {url}")
 
             if not product_urls:
                 print("Could not find any products matching your search.")
                 return None
             
-            # Process each product
-            for index, url in enumerate(product_urls, 1):
-                print(f"\nProcessing product {index} of {len(product_urls)}...")
-                
-                try:
-                    # Random delay between products (3-7 seconds)
-                    delay = random.uniform(3, 7)
-                    print(f"Waiting for {delay:.1f} seconds before processing next product...")
-                    await asyncio.sleep(delay)
-                    
-                    await page.goto(url, timeout=60000)
-                    await page.wait_for_load_state("domcontentloaded")
-                    # Random delay after page load (2-5 seconds)
-                    await asyncio.sleep(random.uniform(2, 5))
-                    
-
-                    # Wait for product details to load
-                    print("\nExtracting product details...")
-                    
-                    # More robust waiting strategy
-                    try:
-                        # Wait for various key product elements
-                        await asyncio.gather(
-                            page.wait_for_selector("._1YokD2._3Mn1Gg", timeout=10000),
-                            page.wait_for_selector("._1AtVbE.col-12-12", timeout=10000),
-                            page.wait_for_selector("._30jeq3._16Jk6d", timeout=10000)
-                        )
-                    except Exception as e:
-                        print(f"Warning: Not all elements loaded immediately: {e}")
-                        # Add extra wait time for dynamic content
-                        await asyncio.sleep(5)
-                    
-                    # Take a debug screenshot
-                    # await page.screenshot(path="price_debug.png")
-                    
-                    # Get product details
-                    title = "N/A"
-                    try:
-                        title_selectors = [
-                            "span.B_NuCI",
-                            "._4rR01T",
-                            ".yhB1nd",
-                            "h1",
-                            "._29OxBi h1"
-                        ]
-                        for selector in title_selectors:
-                            try:
-                                element = page.locator(selector).first
-                                if await element.is_visible():
-                                    text = await element.inner_text()
-                                    if text and len(text.strip()) > 3:
-                                        title = text.strip()
-                                        print(f"[DEBUG] Found title with selector {selector}: {title}")
-                                        break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        print(f"Error getting title: {e}")
-
-                    # Get product specifications
-                    specifications = {}
-                    try:
-                        # Wait for specifications section to load
-                        await page.wait_for_selector("div._3Fm-hO", timeout=10000)
-                        
-                        # Get all specification rows directly
-                        spec_rows = await page.locator("tr.WJdYP6").all()
-                        
-                        for row in spec_rows:
-                            try:
-                                # Get specification name and value with escaped selectors
-                                name_elem = row.locator("td[class*='+fFi1w']")
-                                value_elem = row.locator("td.Izz52n li.HPETK2")
-                                
-                                if await name_elem.count() > 0 and await value_elem.count() > 0:
-                                    name = await name_elem.inner_text()
-                                    value = await value_elem.inner_text()
-                                    
-                                    if name and value:
-                                        # Clean up the name and value
-                                        name = name.strip()
-                                        value = value.strip()
-                                        
-                                        # Add to specifications dictionary
-                                        specifications[name] = value
-                                        print(f"Found specification: {name} = {value}")
-                            except Exception as e:
-                                print(f"Error processing specification row: {e}")
-                                continue
-                    except Exception as e:
-                        print(f"Error getting specifications: {e}")
-
-                    # Price extraction with updated selectors
-                    price = "N/A"
-                    try:
-                        price_selectors = [
-                            "div.hl05eU div.Nx9bqj.CxhGGd",  # Current price
-                            "div._30jeq3._16Jk6d",  # Fallback price selector
-                            "div[class*='_30jeq3']"
-                        ]
-                        for selector in price_selectors:
-                            try:
-                                element = page.locator(selector).first
-                                if await element.is_visible():
-                                    text = await element.inner_text()
-                                    if text and '₹' in text:
-                                        price = text.strip().replace('₹', '').replace(',', '').strip()
-                                        print(f"[DEBUG] Found price with selector {selector}: {price}")
-                                        break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        print(f"Error getting price: {e}")
-
-                    # Rating extraction with updated selectors
-                    rating = "N/A"
-                    try:
-                        rating_selectors = [
-                            "div.XQDdHH",  # New rating selector
-                            "._3LWZlK",    # Fallback rating selector
-                            "div[class*='rating'] span"
-                        ]
-                        for selector in rating_selectors:
-                            try:
-                                element = page.locator(selector).first
-                                if await element.is_visible():
-                                    text = await element.inner_text()
-                                    if text:
-                                        # Extract just the number from the rating
-                                        rating_match = re.search(r'(\d+(?:\.\d+)?)', text)
-                                        if rating_match:
-                                            rating = rating_match.group(1)
-                                            print(f"[DEBUG] Found rating with selector {selector}: {rating}")
-                                            break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        print(f"Error getting rating: {e}")
+            # Process the products on a bounded set of tabs. Only a single-product scrape is
+            # incremental (ScraperEngine appends to the existing doc); competitors are full snapshots
+            incremental = INCREMENTAL and max_products == 1
+            print(f"\nProcessing {len(product_urls)} products...")
+            if progress:
+                await progress(0, len(product_urls))
+            all_products_data = await scrape_pages(
+                product_urls,
+                lambda url, index: _scrape_flipkart_product(context, url, index, incremental),
+                progress=progress
+            )
 
-                    # Brand extraction with updated selectors
-                    brand = "N/A"
-                    try:
-                        brand_selectors = [
-                            "span.G6XhRU",  # Primary brand selector
-                            "._2J4LW6",     # Alternative brand selector
-                            "a._1fGeJ5.PP89tw",  # Another brand location
-                            "span[class*='brand']"  # Generic brand class
-                        ]
-                        for selector in brand_selectors:
-                            try:
-                                element = page.locator(selector).first
-                                if await element.is_visible():
-                                    text = await element.inner_text()
-                                    if text and len(text.strip()) > 1:
-                                        brand = text.strip()
-                                        brand = re.sub(r'^(Brand|by|from)\s+', '', brand, flags=re.IGNORECASE)
-                                        print(f"[DEBUG] Found brand with selector {selector}: {brand}")
-                                        break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        print(f"Error getting brand: {e}")
-
-                    # Total reviews extraction with improved selectors
-                    total_reviews = "N/A"
-                    try:
-                        review_count_selectors = [
-                            "._2_R_DZ span",
-                            "._3nUwsX span",
-                            "span._2_R_DZ span",
-                            "[class*='review-count']"
-                        ]
-                        for selector in review_count_selectors:
-                            try:
-                                element = page.locator(selector).first
-                                if await element.is_visible():
-                                    text = await element.inner_text()
-                                    if text:
-                                        # Try to extract review count using regex
-                                        matches = re.search(r'([\d,]+).*reviews?', text, re.IGNORECASE)
-                                        if matches:
-                                            total_reviews = matches.group(1).replace(',', '')
-                                            print(f"[DEBUG] Found total reviews with selector {selector}: {total_reviews}")
-                                            break
-                            except Exception:
-                                continue
-                    except Exception as e:
-                        print(f"Error getting total reviews: {e}")
-
-                    # Reviews collection with improved navigation and selectors
-                    reviews = []
-                    print("\nCollecting reviews...")
-                    
-                    try:
-                        current_url = page.url
-                        review_url = None
-                        
-                        # First try to find the review link on the product page
-                        review_link_selectors = [
-                            "a._1fQZEK[href*='product-reviews']",
-                            "a._2_R_DZ[href*='product-reviews']",
-                            "._3UAT2v a[href*='product-reviews']",
-                            "a[href*='product-reviews']"
-                        ]
-                        
-                        for selector in review_link_selectors:
-                            try:
-                                element = page.locator(selector).first
-                                if await element.count() > 0:
-                                    href = await element.get_attribute("href")
-                                    if href:
-                                        review_url = href if href.startswith('http') else f"https://www.flipkart.com{href}"
-                                        print(f"Found review link: {review_url}")
-                                        break
-                            except Exception:
-                                continue
-                        
-                        # If no review link found, try constructing the URL
-                        if not review_url and '/p/' in current_url:
-                            review_url = current_url.replace('/p/', '/product-reviews/')
-                            if '?' in review_url:
-                                review_url = review_url.split('?')[0]
-                        
-                        if review_url:
-                            print(f"Navigating to reviews page: {review_url}")
-                            await page.goto(review_url)
-                            await page.wait_for_load_state("networkidle")
-                            await asyncio.sleep(3)
-                            
-                            page_num = 1
-                            max_pages = 10  # Limit to 10 pages to avoid infinite loops
-                            
-                            while len(reviews) < 100 and page_num <= max_pages:
-                                print(f"\nProcessing reviews page {page_num}...")
-                                
-                                # Wait for reviews to load
-                                try:
-                                    await page.wait_for_selector("div.col.EPCmJX", timeout=10000)
-                                except Exception as e:
-                                    print(f"Warning: Reviews container not found: {e}")
-                                    await asyncio.sleep(2)
-                                
-                                # Get all review elements
-                                review_elements = await page.locator("div.col.EPCmJX").all()
-                                print(f"Found {len(review_elements)} reviews on current page")
-                                
-                                # If no reviews found on current page, stop the collection
-                                if len(review_elements) == 0:
-                                    print("No reviews found on current page. Stopping review collection.")
-                                    break
-                                
-                                reviews_found_on_page = 0
-                                for element in review_elements:
-                                    try:
-                                        # Get review text - try multiple selectors
-                                        review_text = None
-                                        selectors = [
-                                            "div._11pzQk",
-                                            "div.t-ZTKy",
-                                            "div[class*='review-text']",
-                                            "div.row div._11pzQk",
-                                            "div.row div.t-ZTKy",
-                                            "div.row div[class*='review-text']"
-                                        ]
-                                        
-                                        for selector in selectors:
-                                            try:
-                                                text_element = element.locator(selector).first
-                                                if await text_element.count() > 0:
-                                                    review_text = await text_element.inner_text()
-                                                    print(f"DEBUG: Found text with selector {selector}: {review_text[:50]}...")
-                                                    if review_text and len(review_text.strip()) > 5:
-                                                        break
-                                            except Exception as e:
-                                                print(f"DEBUG: Error with selector {selector}: {str(e)}")
-                                                continue
-                                        
-                                        if not review_text:
-                                            # Try getting all text from the review element
-                                            try:
-                                                review_text = await element.inner_text()
-                                                print(f"DEBUG: Got all text from element: {review_text[:50]}...")
-                                            except Exception as e:
-                                                print(f"DEBUG: Error getting all text: {str(e)}")
-                                        
-                                        if review_text and len(review_text.strip()) > 5:
-                                            cleaned_review = review_text.strip()
-                                            if cleaned_review not in reviews:
-                                                reviews.append(cleaned_review)
-                                                reviews_found_on_page += 1
-                                                print(f"Found review #{len(reviews)}: {cleaned_review[:50]}...")
-                                                
-                                                if len(reviews) >= 100:
-                                                    break
-                                        else:
-                                            print(f"DEBUG: Review text too short or empty: {review_text}")
-                                    except Exception as e:
-                                        print(f"Error extracting review text: {e}")
-                                        continue
-                                
-                                print(f"Successfully extracted {reviews_found_on_page} reviews from page {page_num}")
-                                
-                                if len(reviews) >= 100:
-                                    break
-                                
-                                # Try to navigate to next page
-                                next_page_found = False
-                                
-                                # Try URL-based navigation first
-                                if 'page=' in page.url:
-                                    next_url = re.sub(r'page=\d+', f'page={page_num + 1}', page.url)
-                                    if next_url != page.url:
-                                        await page.goto(next_url)
-                                        await page.wait_for_load_state("networkidle")
-                                        await asyncio.sleep(2)
-                                        next_page_found = True
-                                
-                                # If URL navigation didn't work, try clicking next button
-                                if not next_page_found:
-                                    next_button = page.locator("a._9QVEpD").first
-                                    if await next_button.count() > 0:
-                                        await next_button.click()
-                                        await page.wait_for_load_state("networkidle")
-                                        await asyncio.sleep(2)
-                                        next_page_found = True
-                                
-                                if next_page_found:
-                                    page_num += 1
-                                else:
-                                    print("No more review pages available")
-                                    break
-                                    
-                        else:
-                            print("Could not find or construct review page URL")
-                    
-                    except Exception as e:
-                        print(f"Error in review collection: {e}")
-                    
-                    print(f"\nCollected {len(reviews)} reviews in total")
-
-                    # Store product data
-                    product_data = {
-                        'url': url,
-                        'title': title.strip() if title else "N/A",
-                        'brand': brand.strip() if brand else "N/A",
-                        'price': price.strip() if price else "N/A",
-                        'rating': rating.strip() if rating else "N/A",
-                        'total_reviews_found': len(reviews) if reviews else 0,
-                        'reviews': reviews,
-                        'specifications': specifications  # Add specifications to the product data
-                    }
-                    all_products_data.append(product_data)
-                    print(f"Completed processing product {index}")
-                    
-                except Exception as e:
-                    print(f"Error processing product {index}: {e}")
-                    continue
-                
-                # Add a delay between products
-                await asyncio.sleep(2)
-            
             return all_products_data
             
         except Exception as e:
@@ -491,7 +217,7 @@ async def scrape_product_flipkart(product_name, max_products=1):
             return None
             
         finally:
-            await browser.close()
+            await page.close()
 
 def save_to_csv(products_data, search_query):
     if not products_data:
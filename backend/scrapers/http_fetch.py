@@ -0,0 +1,137 @@
+# scrapers/http_fetch.py
+# Tiered fetching: pages that are rendered server-side (eBay items and feedback,
+# Flipkart review pages) are fetched with a pooled keep-alive HTTP client and
+# parsed with lxml. Only when that fails or misses a required field do the
+# scrapers open a Playwright page. Routing is per platform/page type:
+#   SCRAPER_HTTP_FETCH=false                              always use the browser
+#   SCRAPER_HTTP_ROUTES="ebay=validate+product+reviews;flipkart=reviews"
+import asyncio
+import os
+from typing import Dict, Optional, Set
+
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+from .browser_pool import USER_AGENT
+from .extractors import extract_html
+from .rate_limit import domain_limiter
+from .snapshots import snapshot_store
+
+HTTP_FETCH_ENABLED = os.getenv("SCRAPER_HTTP_FETCH", "true").lower() not in ("0", "false", "no")
+HTTP_TIMEOUT = float(os.getenv("SCRAPER_HTTP_TIMEOUT", "20"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("SCRAPER_HTTP_MAX_CONNECTIONS", "20"))
+
+DEFAULT_ROUTES = "ebay=validate+product+reviews;flipkart=reviews"
+
+# Fields that must come back non-empty for an HTTP result to be trusted
+REQUIRED_FIELDS: Dict[str, Dict[str, list]] = {
+    "ebay": {
+        "validate": ["title"],
+        "product": ["title", "price"],
+        "reviews": ["reviews"],
+    },
+    "flipkart": {
+        "reviews": ["reviews"],
+    },
+}
+
+HEADERS = {
+    "User-Agent": USER_AGENT,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+
+def parse_routes(spec: str) -> Dict[str, Set[str]]:
+    routes = {}
+    for item in spec.split(";"):
+        if "=" not in item:
+            continue
+        platform, page_types = item.split("=", 1)
+        routes[platform.strip()] = {p.strip() for p in page_types.split("+") if p.strip()}
+    return routes
+
+
+class HttpFetcher:
+    def __init__(self, routes: Optional[Dict[str, Set[str]]] = None, enabled: bool = HTTP_FETCH_ENABLED):
+        self.routes = routes if routes is not None else parse_routes(os.getenv("SCRAPER_HTTP_ROUTES", DEFAULT_ROUTES))
+        self.enabled = enabled and httpx is not None
+        self._client = None
+        self.stats: Dict[str, dict] = {}
+
+    def handles(self, platform: str, page_type: str) -> bool:
+        return self.enabled and page_type in self.routes.get(platform, set())
+
+    def _client_for(self):
+        # Created lazily so it binds to the running loop; reused for keep-alive
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=HEADERS,
+                timeout=HTTP_TIMEOUT,
+                follow_redirects=True,
+                limits=httpx.Limits(max_connections=HTTP_MAX_CONNECTIONS,
+                                    max_keepalive_connections=HTTP_MAX_CONNECTIONS),
+            )
+        return self._client
+
+    def _record(self, platform: str, page_type: str, outcome: str):
+        stats = self.stats.setdefault(f"{platform}/{page_type}", {"attempts": 0, "http_ok": 0, "fallbacks": {}})
+        stats["attempts"] += 1
+        if outcome == "ok":
+            stats["http_ok"] += 1
+        else:
+            stats["fallbacks"][outcome] = stats["fallbacks"].get(outcome, 0) + 1
+
+    async def extract(self, url: str, platform: str, page_type: str) -> Optional[dict]:
+        """Fetch and extract `url` over plain HTTP.
+
+        Returns the same raw dict as extract_page(), or None when the caller
+        should fall back to the browser (route disabled, HTTP error, bot wall,
+        or a required field came back empty).
+        """
+        if not self.handles(platform, page_type):
+            return None
+        try:
+            await domain_limiter.acquire(url)
+            response = await self._client_for().get(url)
+            if response.status_code != 200:
+                self._record(platform, page_type, f"status_{response.status_code}")
+                return None
+            html = response.text
+            # Parse off the event loop; lxml releases the GIL for most of it
+            raw = await asyncio.to_thread(extract_html, html, platform, page_type)
+        except Exception as e:
+            print(f"HTTP fetch failed for {url}, falling back to browser: {e}")
+            self._record(platform, page_type, "error")
+            return None
+
+        missing = [field for field in REQUIRED_FIELDS.get(platform, {}).get(page_type, []) if not raw.get(field)]
+        if missing:
+            self._record(platform, page_type, "missing_fields")
+            return None
+
+        self._record(platform, page_type, "ok")
+        if snapshot_store.enabled:
+            try:
+                await asyncio.to_thread(snapshot_store.save, str(response.url), platform, page_type, html)
+            except Exception as e:
+                print(f"Error saving snapshot of {url}: {e}")
+        return raw
+
+    def metrics(self) -> dict:
+        routes = {platform: sorted(page_types) for platform, page_types in self.routes.items()}
+        by_route = {}
+        for key, stats in self.stats.items():
+            fallbacks = sum(stats["fallbacks"].values())
+            by_route[key] = {**stats, "fallback_rate": round(fallbacks / stats["attempts"], 3) if stats["attempts"] else 0.0}
+        return {"enabled": self.enabled, "routes": routes, "by_route": by_route}
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+http_fetcher = HttpFetcher()
@@ -0,0 +1,84 @@
+# scrapers/offline.py
+# Re-run extraction over stored snapshots (see snapshots.py) without a browser,
+# spread over all CPU cores. Use it after fixing a selector in selector_config.py:
+#   python -m backend.scrapers.offline --platform flipkart --page-type product --out fixed.jsonl
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Optional
+
+from .extractors import extract_html, normalize_product, product_links
+from .snapshots import SnapshotStore, SNAPSHOT_DIR
+
+
+def reparse_entry(entry: dict, root: str = SNAPSHOT_DIR) -> dict:
+    """Extract one snapshot. Runs in a worker process, so it only takes plain data."""
+    store = SnapshotStore(root, enabled=False)
+    platform, page_type = entry["platform"], entry["page_type"]
+    result = {"url": entry["url"], "platform": platform, "page_type": page_type,
+              "fetched_at": entry["fetched_at"], "sha256": entry["sha256"]}
+    try:
+        raw = extract_html(store.load(entry), platform, page_type)
+        if page_type == "product":
+            result["data"] = normalize_product(platform, raw, entry["url"])
+        elif page_type == "search":
+            result["data"] = {"links": product_links(platform, raw)}
+        else:
+            result["data"] = raw
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def reparse(platform: Optional[str] = None, page_type: Optional[str] = None, since: Optional[str] = None,
+            latest_only: bool = False, workers: Optional[int] = None, root: str = SNAPSHOT_DIR) -> Iterator[dict]:
+    """Yield re-extracted results for every matching snapshot, in index order."""
+    entries: List[dict] = list(SnapshotStore(root, enabled=False).entries(platform, page_type, since=since))
+    if latest_only:
+        # Keep only the newest fetch of each url
+        newest = {}
+        for entry in entries:
+            newest[(entry["url"], entry["page_type"])] = entry
+        entries = list(newest.values())
+    if not entries:
+        return
+
+    workers = workers or os.cpu_count() or 1
+    # Parsing is CPU bound; hand out work in chunks to keep IPC overhead low
+    chunksize = max(1, len(entries) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(reparse_entry, entries, [root] * len(entries), chunksize=chunksize)
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="Re-run extraction over stored HTML snapshots")
+    parser.add_argument("--platform", choices=["amazon", "flipkart", "ebay"])
+    parser.add_argument("--page-type", choices=["search", "validate", "product", "reviews"])
+    parser.add_argument("--since", help="only snapshots fetched at/after this ISO timestamp")
+    parser.add_argument("--latest", action="store_true", help="only the newest snapshot of each url")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--root", default=SNAPSHOT_DIR)
+    parser.add_argument("--out", help="write JSONL here instead of stdout")
+    args = parser.parse_args(argv)
+
+    out = open(args.out, "w", encoding="utf-8") if args.out else sys.stdout
+    started = time.perf_counter()
+    done = failed = 0
+    try:
+        for result in reparse(args.platform, args.page_type, args.since, args.latest, args.workers, args.root):
+            done += 1
+            failed += "error" in result
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+    finally:
+        if args.out:
+            out.close()
+    elapsed = time.perf_counter() - started
+    rate = done / elapsed if elapsed else 0.0
+    print(f"Re-parsed {done} snapshots ({failed} failed) in {elapsed:.1f}s ({rate:.1f}/s)", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
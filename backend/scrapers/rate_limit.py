@@ -0,0 +1,122 @@
+# scrapers/rate_limit.py
+# Per-host politeness budget. Instead of fixed sleeps every navigation takes a
+# token from its host's bucket, so parallel pages share one request budget per
+# site. Rates are configured per host, e.g.
+#   SCRAPER_RATE_LIMITS="amazon.com=0.5:2:1.5,flipkart.com=1"
+# meaning host=qps[:burst[:jitter_seconds]]. qps must be > 0.
+import asyncio
+import os
+import random
+import time
+from typing import Dict, Tuple
+from urllib.parse import urlparse
+
+DEFAULT_QPS = float(os.getenv("SCRAPER_DOMAIN_QPS", "0.5"))
+DEFAULT_BURST = int(os.getenv("SCRAPER_DOMAIN_BURST", "2"))
+# Extra random delay (0..jitter seconds) after each token so requests don't tick like a metronome
+DEFAULT_JITTER = float(os.getenv("SCRAPER_RATE_JITTER", "1.0"))
+
+
+def parse_rate_limits(spec: str) -> Dict[str, Tuple[float, int, float]]:
+    limits = {}
+    for item in spec.split(","):
+        if "=" not in item:
+            continue
+        host, values = item.split("=", 1)
+        parts = values.split(":")
+        try:
+            qps = float(parts[0])
+            burst = int(parts[1]) if len(parts) > 1 and parts[1] else DEFAULT_BURST
+            jitter = float(parts[2]) if len(parts) > 2 and parts[2] else DEFAULT_JITTER
+        except ValueError:
+            print(f"Ignoring invalid rate limit entry: {item}")
+            continue
+        if qps <= 0:
+            print(f"Ignoring rate limit entry with qps <= 0: {item}")
+            continue
+        limits[domain_of("//" + host.strip())] = (qps, burst, jitter)
+    return limits
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> float:
+        """Take one token, sleeping until it is available. Returns the time waited."""
+        # No await between reading and updating the bucket, so this is atomic on
+        # the event loop. Waiters reserve their token up front (tokens can go
+        # negative) which keeps them in FIFO order without a lock.
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            await asyncio.sleep(wait)
+        return wait
+
+
+def domain_of(url: str) -> str:
+    host = urlparse(url).netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class DomainRateLimiter:
+    def __init__(self, rate: float = DEFAULT_QPS, burst: int = DEFAULT_BURST, jitter: float = DEFAULT_JITTER,
+                 limits: Dict[str, Tuple[float, int, float]] = None):
+        if rate <= 0:
+            raise ValueError(f"Default scraper rate must be > 0 qps (SCRAPER_DOMAIN_QPS), got {rate}")
+        self.rate = rate
+        self.burst = burst
+        self.jitter = jitter
+        if limits is None:
+            limits = parse_rate_limits(os.getenv("SCRAPER_RATE_LIMITS", ""))
+        for host, (qps, _, _) in limits.items():
+            if qps <= 0:
+                raise ValueError(f"Rate limit for {host} must be > 0 qps, got {qps}")
+        self.limits = limits
+        self._buckets: Dict[str, TokenBucket] = {}
+        self.stats: Dict[str, dict] = {}
+
+    def _limits_for(self, domain: str) -> Tuple[float, int, float]:
+        # "amazon.com" also covers subdomains such as "smile.amazon.com"
+        for host, limits in self.limits.items():
+            if domain == host or domain.endswith("." + host):
+                return limits
+        return self.rate, self.burst, self.jitter
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        if domain not in self._buckets:
+            rate, burst, _ = self._limits_for(domain)
+            self._buckets[domain] = TokenBucket(rate, burst)
+            self.stats[domain] = {"requests": 0, "waits": 0, "wait_seconds": 0.0}
+        return self._buckets[domain]
+
+    async def acquire(self, url: str):
+        """Call before every navigation (goto, click-through) to `url`."""
+        domain = domain_of(url)
+        waited = await self._bucket(domain).acquire()
+        _, _, jitter = self._limits_for(domain)
+        if jitter > 0:
+            delay = random.uniform(0, jitter)
+            await asyncio.sleep(delay)
+            waited += delay
+        stats = self.stats[domain]
+        stats["requests"] += 1
+        if waited:
+            stats["waits"] += 1
+            stats["wait_seconds"] = round(stats["wait_seconds"] + waited, 3)
+
+    def metrics(self) -> dict:
+        return {
+            "default": {"qps": self.rate, "burst": self.burst, "jitter": self.jitter},
+            "hosts": {host: {"qps": q, "burst": b, "jitter": j} for host, (q, b, j) in self.limits.items()},
+            "domains": self.stats,
+        }
+
+
+domain_limiter = DomainRateLimiter()
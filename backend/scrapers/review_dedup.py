@@ -0,0 +1,89 @@
+# scrapers/review_dedup.py
+# Cross-run review dedup. Every stored review's fingerprint is inserted into
+# review_fingerprints, which has a unique index on (product_id, platform, url,
+# fingerprint); a duplicate-key error means the review was already stored for that
+# product by an earlier run. Dedup never crosses products: "Good product" on one
+# listing says nothing about another. Urls are keyed in canonical form
+# (extractors.canonical_product_url) since search-result links change every run.
+from datetime import datetime, timezone
+from typing import List, Optional
+
+from bson import ObjectId
+from pymongo import ASCENDING
+from pymongo.errors import BulkWriteError
+
+from ..utils.fingerprint import dedupe_reviews, review_fingerprint
+from .extractors import canonical_product_url
+
+DUPLICATE_KEY = 11000
+INDEX_NAME = "product_platform_url_fingerprint_unique"
+
+
+def _url_key(platform: str, url: Optional[str]) -> Optional[str]:
+    return (canonical_product_url(platform, url) or url) if url else url
+
+
+class ReviewFingerprintStore:
+    def __init__(self, collection=None):
+        self._collection = collection
+        self._index_ready = False
+
+    @property
+    def collection(self):
+        # Imported lazily so scrapers can still run standalone without MongoDB
+        if self._collection is None:
+            from ..db.database import review_fingerprints_collection
+            self._collection = review_fingerprints_collection
+        return self._collection
+
+    async def ensure_index(self):
+        if not self._index_ready:
+            await self.collection.create_index(
+                [("product_id", ASCENDING), ("platform", ASCENDING), ("url", ASCENDING), ("fingerprint", ASCENDING)],
+                unique=True,
+                name=INDEX_NAME,
+            )
+            self._index_ready = True
+
+    async def claim(self, platform: str, reviews: List, product_id: Optional[ObjectId] = None,
+              url: Optional[str] = None) -> List:
+        """Record `reviews` as stored and return only the ones no earlier run stored."""
+        reviews = dedupe_reviews(reviews)
+        if not reviews:
+            return []
+        await self.ensure_index()
+        url = _url_key(platform, url)
+        now = datetime.now(timezone.utc)
+        docs = [{
+            "platform": platform,
+            "fingerprint": review_fingerprint(review),
+            "product_id": product_id,
+            "url": url,
+            "first_seen_at": now,
+        } for review in reviews]
+
+        try:
+            # Unordered so one duplicate doesn't stop the rest from being inserted
+            await self.collection.insert_many(docs, ordered=False)
+            return reviews
+        except BulkWriteError as e:
+            errors = e.details.get("writeErrors", [])
+            if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                raise
+            duplicates = {error["index"] for error in errors}
+            return [review for index, review in enumerate(reviews) if index not in duplicates]
+
+    async def release(self, platform: str, reviews: List, product_id: Optional[ObjectId] = None,
+                      url: Optional[str] = None) -> None:
+        """Undo claim() for reviews that could not be stored, so a later run stores them."""
+        if not reviews:
+            return
+        await self.collection.delete_many({
+            "product_id": product_id,
+            "platform": platform,
+            "url": _url_key(platform, url),
+            "fingerprint": {"$in": [review_fingerprint(review) for review in reviews]},
+        })
+
+
+review_fingerprints = ReviewFingerprintStore()
@@ -0,0 +1,134 @@
+# scrapers/routing.py
+# Request blocking for scraper browser contexts. The extractors only read the DOM,
+# so images, video, fonts and third-party analytics are aborted before they are
+# downloaded. Stylesheets are kept: Flipkart's price lookup skips hidden elements.
+#   SCRAPER_BLOCK_RESOURCES=false        turn blocking off
+#   SCRAPER_BLOCKED_DOMAINS="a.com,b.net" extra tracker hosts to abort
+import os
+from typing import Dict, List, Optional, Set
+
+from .rate_limit import domain_of
+
+BLOCK_RESOURCES = os.getenv("SCRAPER_BLOCK_RESOURCES", "true").lower() not in ("0", "false", "no")
+
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+TRACKER_DOMAINS = {
+    "google-analytics.com", "googletagmanager.com", "googletagservices.com",
+    "doubleclick.net", "googlesyndication.com", "adservice.google.com",
+    "facebook.net", "connect.facebook.net", "bat.bing.com", "scorecardresearch.com",
+    "criteo.com", "criteo.net", "taboola.com", "outbrain.com", "hotjar.com",
+    "newrelic.com", "nr-data.net", "quantserve.com", "adsrvr.org",
+}
+
+# platform -> policy; anything not listed uses "default"
+BLOCK_POLICIES: Dict[str, dict] = {
+    "default": {
+        "resource_types": BLOCKED_RESOURCE_TYPES,
+        "domains": TRACKER_DOMAINS,
+    },
+    "amazon": {
+        "resource_types": BLOCKED_RESOURCE_TYPES,
+        # Amazon's own ad/metrics endpoints
+        "domains": TRACKER_DOMAINS | {"amazon-adsystem.com", "fls-na.amazon.com", "unagi.amazon.com"},
+    },
+    "flipkart": {
+        "resource_types": BLOCKED_RESOURCE_TYPES,
+        "domains": TRACKER_DOMAINS | {"1.rome.api.flipkart.com"},
+    },
+    "ebay": {
+        "resource_types": BLOCKED_RESOURCE_TYPES,
+        "domains": TRACKER_DOMAINS | {"srv.main.ebayrtm.com", "pulsar.ebay.com", "ebayadservices.com"},
+    },
+}
+
+# Aborted requests never report a size, so savings are estimated per resource type
+AVG_BYTES = {
+    "image": 60_000,
+    "media": 500_000,
+    "font": 40_000,
+    "script": 30_000,
+    "xhr": 5_000,
+    "fetch": 5_000,
+}
+DEFAULT_AVG_BYTES = 10_000
+
+
+def _extra_domains() -> Set[str]:
+    spec = os.getenv("SCRAPER_BLOCKED_DOMAINS", "")
+    return {domain_of("//" + host.strip()) for host in spec.split(",") if host.strip()}
+
+
+def _host_matches(host: str, domains: Set[str]) -> bool:
+    # Match the host itself and any of its parent domains
+    parts = host.split(".")
+    return any(".".join(parts[i:]) in domains for i in range(len(parts) - 1))
+
+
+class RequestBlocker:
+    """Installs a per-platform abort policy on a context and counts what it blocked."""
+
+    def __init__(self, policies: Optional[Dict[str, dict]] = None, enabled: bool = BLOCK_RESOURCES):
+        self.policies = policies or BLOCK_POLICIES
+        self.enabled = enabled
+        extra = _extra_domains()
+        if extra:
+            self.policies = {platform: {**policy, "domains": policy["domains"] | extra}
+                             for platform, policy in self.policies.items()}
+        self.stats: Dict[str, dict] = {}
+
+    def policy_for(self, platform: str) -> dict:
+        return self.policies.get(platform, self.policies["default"])
+
+    def should_block(self, platform: str, resource_type: str, url: str) -> Optional[str]:
+        """Return why a request should be aborted ("type" or "domain"), or None."""
+        policy = self.policy_for(platform)
+        if resource_type in policy["resource_types"]:
+            return "type"
+        if _host_matches(domain_of(url), policy["domains"]):
+            return "domain"
+        return None
+
+    def _record(self, platform: str, resource_type: str, reason: Optional[str]):
+        stats = self.stats.setdefault(platform, {
+            "requests": 0, "blocked": 0, "blocked_by_domain": 0,
+            "blocked_by_type": {}, "estimated_bytes_saved": 0,
+        })
+        stats["requests"] += 1
+        if reason is None:
+            return
+        stats["blocked"] += 1
+        if reason == "domain":
+            stats["blocked_by_domain"] += 1
+        else:
+            stats["blocked_by_type"][resource_type] = stats["blocked_by_type"].get(resource_type, 0) + 1
+        stats["estimated_bytes_saved"] += AVG_BYTES.get(resource_type, DEFAULT_AVG_BYTES)
+
+    async def install(self, context, platform: str):
+        if not self.enabled:
+            return
+
+        async def handle(route):
+            request = route.request
+            reason = self.should_block(platform, request.resource_type, request.url)
+            self._record(platform, request.resource_type, reason)
+            try:
+                if reason:
+                    await route.abort("blockedbyclient")
+                else:
+                    await route.continue_()
+            except Exception:
+                # The page may already be closed when the route fires
+                pass
+
+        await context.route("**/*", handle)
+
+    def metrics(self) -> dict:
+        totals = {"requests": 0, "blocked": 0, "estimated_bytes_saved": 0}
+        for stats in self.stats.values():
+            for key in totals:
+                totals[key] += stats[key]
+        return {"enabled": self.enabled, **totals, "platforms": self.stats}
+
+
+request_blocker = RequestBlocker()
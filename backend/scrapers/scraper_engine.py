@@ -1,32 +1,66 @@
 # scrapers/scraper_engine.py
+import asyncio
+import os
+from typing import Awaitable, Callable, Dict, Iterable, Optional
 
 from .amazon import scrape_product_amazon
 from .flipkart import scrape_product_flipkart
 from .ebay import scrape_product_ebay
+from .browser_pool import browser_pool
+from .cursors import INCREMENTAL, new_reviews, review_cursors
+from .review_dedup import review_fingerprints
+from ..agents.answer_cache import answer_cache
+from ..utils.fingerprint import dedupe_reviews
 from datetime import datetime,timezone
 
 from bson import ObjectId
+from pymongo import ReturnDocument
 from ..db.database import scraped_results_collection, agent_run_log_collection, scraped_competitors_collection
+from ..db.review_store import review_store
+
+SCRAPERS = {
+    "amazon": scrape_product_amazon,
+    "flipkart": scrape_product_flipkart,
+    "ebay": scrape_product_ebay,
+}
+
+# Fan-out limits: how many platform scrapes may run at once (process-wide and per
+# platform) and how long a single platform is allowed to take
+MAX_CONCURRENT_PLATFORMS = int(os.getenv("SCRAPER_MAX_CONCURRENT_PLATFORMS", "3"))
+PER_PLATFORM_CONCURRENCY = int(os.getenv("SCRAPER_PER_PLATFORM_CONCURRENCY", "2"))
+PLATFORM_TIMEOUT = float(os.getenv("SCRAPER_PLATFORM_TIMEOUT", "600"))
+
+_global_slots: Optional[asyncio.Semaphore] = None
+_platform_slots: Dict[str, asyncio.Semaphore] = {}
+
+def _slots_for(platform: str):
+    global _global_slots
+    if _global_slots is None:
+        _global_slots = asyncio.Semaphore(MAX_CONCURRENT_PLATFORMS)
+    if platform not in _platform_slots:
+        _platform_slots[platform] = asyncio.Semaphore(PER_PLATFORM_CONCURRENCY)
+    return _global_slots, _platform_slots[platform]
 
 class ScraperEngine:
-    def __init__(self, platform: str, query: str, product_id: str, competitor_num: int = 1):
+    def __init__(self, platform: str, query: str, product_id: str, competitor_num: int = 1, progress=None):
         self.platform = platform
         self.query = query
         self.product_id = ObjectId(product_id)
         self.competitor_num = competitor_num
+        # optional async callback(done, total) called as product pages are processed
+        self.progress = progress
 
     async def run(self):
         results = None
         try:
-            if self.platform == "amazon":
-                results = await scrape_product_amazon(self.query, self.competitor_num)
-            elif self.platform == "flipkart":
-                results = await scrape_product_flipkart(self.query, self.competitor_num)
-            elif self.platform == "ebay":
-                results = await scrape_product_ebay(self.query, self.competitor_num)
-            else:
+            scraper = SCRAPERS.get(self.platform)
+            if scraper is None:
                 return {"error": "Unsupported platform"}
 
+            # Lease a context from the shared pool instead of launching a browser per call
+            async with browser_pool.lease(self.platform) as context:
+                results = await scraper(self.query, self.competitor_num, context=context, progress=self.progress)
+
             if results:
                 # Ensure results is a list
                 if not isinstance(results, list):
@@ -34,45 +68,61 @@ class ScraperEngine:
 
                 # If only one product, save to scraped_results_collection
                 if len(results) == 1:
-                    scraped_results_collection.insert_one({
-                        "product_id": self.product_id,
-                        "platform": self.platform,
-                        "url": results[0].get("url"),
-                        "title": results[0].get("title"),
-                        "brand": results[0].get("brand"),
-                        "price": results[0].get("price"),
-                        "rating": results[0].get("rating"),
-                        "reviews": results[0].get("reviews", []),
-                        "specifications": results[0].get("specifications", {}),
-                        "scraped_at": datetime.now(timezone.utc)
-                    })
+                    if INCREMENTAL:
+                        await self._save_incremental(results[0])
+                    else:
+                        # Reviews go to the review_buckets collection, not into this document
+                        reviews = dedupe_reviews(results[0].get("reviews", []))
+                        saved = await scraped_results_collection.insert_one({
+                            "product_id": self.product_id,
+                            "platform": self.platform,
+                            "url": results[0].get("url"),
+                            "title": results[0].get("title"),
+                            "brand": results[0].get("brand"),
+                            "price": results[0].get("price"),
+                            "rating": results[0].get("rating"),
+                            "review_count": len(reviews),
+                            "specifications": results[0].get("specifications", {}),
+                            "scraped_at": datetime.now(timezone.utc)
+                        })
+                        await review_store.append(saved.inserted_id, self.product_id, self.platform,
+                                                  results[0].get("url"), reviews)
                 # If multiple products, save to scraped_competitors_collection
                 else:
-                    # Prepare products list
-                    products = []
+                    # Prepare products list; each product's reviews are bucketed separately
+                    products, product_reviews = [], []
                     for result in results:
+                        reviews = dedupe_reviews(result.get("reviews", []))
+                        product_reviews.append((result.get("url"), reviews))
                         products.append({
                             "url": result.get("url"),
                             "title": result.get("title"),
                             "price": result.get("price"),
                             "specifications": result.get("specifications", {}),
                             "rating": result.get("rating"),
-                            "reviews": result.get("reviews", [])
+                            "review_count": len(reviews)
                         })
                     
                     # Save all products under one document
-                    scraped_competitors_collection.insert_one({
+                    saved = await scraped_competitors_collection.insert_one({
                         "product_id": self.product_id,
                         "platform": self.platform,
                         "products": products,
                         "scraped_at": datetime.now(timezone.utc)
                     })
+                    for url, reviews in product_reviews:
+                        await review_store.append(saved.inserted_id, self.product_id, self.platform, url, reviews,
+                                                  source="competitors")
+
+                # Cached answers about this product are stale now
+                await answer_cache.invalidate(self.product_id)
 
                 # Log result
-                agent_run_log_collection.insert_one({
+                await agent_run_log_collection.insert_one({
                     "platform": self.platform,
                     "query": self.query,
-                    "result": results,
+                    # Reviews are already in review_buckets; keep the log document small
+                    "result": [{key: value for key, value in r.items() if key != "reviews"} for r in results],
                     "status": "success" if results and not any("error" in r for r in results) else "failed",
                     "ran_at": datetime.now(timezone.utc)
                 })
@@ -83,7 +133,7 @@ class ScraperEngine:
         except Exception as e:
             error_result = {"error": str(e)}
             # Log error
-            agent_run_log_collection.insert_one({
+            await agent_run_log_collection.insert_one({
                 "platform": self.platform,
                 "query": self.query,
                 "result": error_result,
@@ -91,3 +141,105 @@ class ScraperEngine:
                 "ran_at": datetime.now(timezone.utc)
             })
             return error_result
+
+    async def _save_incremental(self, result: dict):
+        """Refresh the product's existing scraped_results doc and append only unseen reviews.
+
+        The document keeps its _id across re-scrapes, so sentiment/RAG lookups by
+        id see the new reviews (stored in its review buckets) too.
+        """
+        url = result.get("url")
+        fresh = new_reviews(result.get("reviews", []), await review_cursors.known(self.platform, url))
+        claimed = False
+        try:
+            # The unique fingerprint index also catches reviews older than the cursor window
+            fresh = await review_fingerprints.claim(self.platform, fresh, self.product_id, url)
+            claimed = True
+        except Exception as e:
+            print(f"Error checking review fingerprints: {e}")
+        try:
+            await self._store_incremental(result, url, fresh)
+        except Exception:
+            # Claimed but not stored: give the fingerprints back or these reviews are lost for good
+            if claimed:
+                try:
+                    await review_fingerprints.release(self.platform, fresh, self.product_id, url)
+                except Exception as e:
+                    print(f"Error releasing review fingerprints for {url}: {e}")
+            raise
+        await review_cursors.advance(self.platform, url, fresh)
+        result["new_reviews"] = len(fresh)
+        print(f"💾 {self.platform}: {len(fresh)} new review(s) for {url}")
+
+    async def _store_incremental(self, result: dict, url: str, fresh: list):
+        """Update the scraped_results doc and bucket the fresh reviews."""
+        now = datetime.now(timezone.utc)
+        saved = await scraped_results_collection.find_one_and_update(
+            {"product_id": self.product_id, "platform": self.platform, "url": url},
+            {
+                "$set": {
+                    "title": result.get("title"),
+                    "brand": result.get("brand"),
+                    "price": result.get("price"),
+                    "rating": result.get("rating"),
+                    "specifications": result.get("specifications", {}),
+                    "scraped_at": now,
+                },
+                "$inc": {"review_count": len(fresh)},
+                "$setOnInsert": {"first_scraped_at": now},
+            },
+            projection={"_id": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        await review_store.append(saved["_id"], self.product_id, self.platform, url, fresh)
+
+
+async def run_platforms(platforms: Iterable[str], query: str, product_id: str,
+                        competitor_num: int = 1, timeout: Optional[float] = None,
+                        on_progress: Optional[Callable[[str, dict], Awaitable[None]]] = None) -> dict:
+    """Scrape every platform as its own task and collect whatever finishes.
+
+    A platform that fails or times out gets an {"error": ...} entry; the others
+    still return their results. `on_progress(platform, update)` is awaited with
+    status/product-count updates so callers (the job worker) can report them.
+    """
+    timeout = timeout or PLATFORM_TIMEOUT
+
+    async def report(platform: str, update: dict):
+        if on_progress:
+            try:
+                await on_progress(platform, update)
+            except Exception as e:
+                print(f"Error reporting progress for {platform}: {e}")
+
+    async def run_one(platform: str):
+        async def product_progress(done: int, total: int):
+            await report(platform, {"products_done": done, "products_total": total})
+
+        global_slots, platform_slots = _slots_for(platform)
+        # Per-platform slot first: a job queued behind a busy platform must not sit on a
+        # global slot that other platforms could use
+        async with platform_slots, global_slots:
+            await report(platform, {"status": "running"})
+            engine = ScraperEngine(platform, query, product_id, competitor_num, progress=product_progress)
+            return await asyncio.wait_for(engine.run(), timeout)
+
+    # dict.fromkeys drops duplicate platforms but keeps their order
+    tasks = {platform: asyncio.create_task(run_one(platform)) for platform in dict.fromkeys(platforms)}
+    results = {}
+    for platform, task in tasks.items():
+        try:
+            results[platform] = await task
+        except asyncio.TimeoutError:
+            results[platform] = {"error": f"Timed out after {timeout:.0f}s"}
+        except Exception as e:
+            results[platform] = {"error": str(e)}
+
+        result = results[platform]
+        if not result or (isinstance(result, dict) and "error" in result):
+            error = result.get("error") if isinstance(result, dict) else "No products found"
+            await report(platform, {"status": "failed", "error": error})
+        else:
+            await report(platform, {"status": "completed"})
+    return results
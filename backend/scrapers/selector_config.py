@@ -0,0 +1,197 @@
+# scrapers/selector_config.py
+# Selector fallbacks for every platform and page type, used by extractors.py to
+# pull all fields of a page in one go. Each field is a spec dict:
+#
+#   {"type": "first", "selectors": [...]}   first matching text (or attribute) wins
+#   {"type": "all", "selectors": [...]}     all texts of the first selector that matches anything
+#   {"type": "attrs", "selectors": [...]}   attribute of every match of every selector, in order
+#   {"type": "pairs", "rows": css, "name": css, "value": css}       name/value rows (specs tables)
+#   {"type": "items", "container": css, "selectors": [...]}        one text per container element
+#
+# A selector is either a CSS string (element text) or {"css": ..., "attr": ...}.
+# Optional filters: "longer_than" (text length), "contains" (substring),
+# "pattern" (regex, case-insensitive), "visible" (skip hidden elements, live pages
+# only) and "skip" (for attrs: ignore the first N matches of each selector).
+
+SELECTORS = {
+    "amazon": {
+        "search": {
+            "links": {
+                "type": "attrs",
+                "selectors": [
+                    {"css": "h2 a.a-link-normal", "attr": "href"},
+                    {"css": "div.s-result-item h2 a.a-link-normal", "attr": "href"},
+                    {"css": "div[data-component-type='s-search-result'] h2 a.a-link-normal", "attr": "href"},
+                    {"css": "h2 .a-link-normal[href*='/dp/']", "attr": "href"},
+                    {"css": ".s-result-item .a-link-normal[href*='/dp/']", "attr": "href"},
+                ],
+            },
+        },
+        "product": {
+            "title": {
+                "type": "first",
+                "selectors": [
+                    "span#productTitle.a-size-large",
+                    {"css": "input#productTitle[type='hidden']", "attr": "value"},
+                ],
+            },
+            "brand": {
+                "type": "first",
+                "selectors": ["#bylineInfo", "#bylineInfo_feature_div .a-link-normal", "#brand", ".po-brand .a-span9"],
+            },
+            "price_whole": {"type": "first", "selectors": [".a-price .a-price-whole"]},
+            "price_fraction": {"type": "first", "selectors": [".a-price .a-price-fraction"]},
+            "rating": {
+                "type": "first",
+                "selectors": [
+                    "span.a-icon-alt",  # Main rating selector
+                    "#acrPopover",      # Alternative rating location
+                    "i.a-icon-star span.a-icon-alt",
+                    "#averageCustomerReviews .a-icon-alt",
+                ],
+                "contains": "out of 5",
+            },
+            "reviews": {
+                "type": "all",
+                "selectors": [
+                    "div[data-hook='review'] span[data-hook='review-body']",
+                    "div.review-text-content span",
+                    "#cm-cr-dp-review-list div.review-data span.review-text",
+                    "div[data-hook='review-collapsed'] span",
+                ],
+            },
+            "specifications": {
+                "type": "pairs",
+                "rows": "table#productDetails_detailBullets_sections1 tr",
+                "name": "th.a-color-secondary",
+                "value": "td.a-size-base",
+            },
+        },
+    },
+    "flipkart": {
+        "search": {
+            "links": {
+                "type": "attrs",
+                "selectors": [
+                    {"css": "a._1fQZEK", "attr": "href"},       # grid view (most electronics)
+                    {"css": "a.s1Q9rs", "attr": "href"},        # list view (fashion etc.)
+                    {"css": "a[href*='/p/']", "attr": "href"},  # any product link
+                ],
+            },
+        },
+        "product": {
+            "title": {
+                "type": "first",
+                "selectors": ["span.B_NuCI", "._4rR01T", ".yhB1nd", "h1", "._29OxBi h1"],
+                "visible": True,
+                "longer_than": 3,
+            },
+            "price": {
+                "type": "first",
+                "selectors": ["div.hl05eU div.Nx9bqj.CxhGGd", "div._30jeq3._16Jk6d", "div[class*='_30jeq3']"],
+                "visible": True,
+                "contains": "₹",
+            },
+            "rating": {
+                "type": "first",
+                "selectors": ["div.XQDdHH", "._3LWZlK", "div[class*='rating'] span"],
+                "visible": True,
+                "pattern": r"\d+(?:\.\d+)?",
+            },
+            "brand": {
+                "type": "first",
+                "selectors": ["span.G6XhRU", "._2J4LW6", "a._1fGeJ5.PP89tw", "span[class*='brand']"],
+                "visible": True,
+                "longer_than": 1,
+            },
+            "review_link": {
+                "type": "first",
+                "selectors": [
+                    {"css": "a._1fQZEK[href*='product-reviews']", "attr": "href"},
+                    {"css": "a._2_R_DZ[href*='product-reviews']", "attr": "href"},
+                    {"css": "._3UAT2v a[href*='product-reviews']", "attr": "href"},
+                    {"css": "a[href*='product-reviews']", "attr": "href"},
+                ],
+            },
+            "specifications": {
+                "type": "pairs",
+                "rows": "tr.WJdYP6",
+                "name": "td[class*='+fFi1w']",
+                "value": "td.Izz52n li.HPETK2",
+            },
+        },
+        "reviews": {
+            "reviews": {
+                "type": "items",
+                "container": "div.col.EPCmJX",
+                "selectors": [
+                    "div._11pzQk",
+                    "div.t-ZTKy",
+                    "div[class*='review-text']",
+                    "div.row div._11pzQk",
+                    "div.row div.t-ZTKy",
+                    "div.row div[class*='review-text']",
+                ],
+                "longer_than": 5,
+            },
+            "next_page": {"type": "first", "selectors": [{"css": "a._9QVEpD", "attr": "href"}]},
+        },
+    },
+    "ebay": {
+        "search": {
+            "links": {
+                "type": "attrs",
+                "selectors": [
+                    {"css": "li.s-item a.s-item__link", "attr": "href"},
+                    {"css": "li.s-item a[href*='itm']", "attr": "href"},
+                    {"css": "div.s-item__info a[href*='itm']", "attr": "href"},
+                ],
+                "skip": 4,  # the first few results are ads
+            },
+        },
+        "validate": {
+            "title": {
+                "type": "first",
+                "selectors": [
+                    "h1.x-item-title__mainTitle",
+                    "h1[itemprop='name']",
+                    "div.ux-layout-section__content h1",
+                    "div.ux-layout-section__content span.ux-textspans--BOLD",
+                    "div.ux-layout-section__content span.ux-textspans",
+                ],
+            },
+        },
+        "product": {
+            "title": {"type": "first", "selectors": ["h1.x-item-title__mainTitle", "h1[itemprop='name']"]},
+            "brand": {"type": "first", "selectors": ["span.ux-textspans--BOLD"]},
+            "price": {"type": "first", "selectors": ["[data-testid='x-price-primary'] span.ux-textspans"]},
+            "seller_rating": {
+                "type": "first",
+                "selectors": ["h4.x-store-information__highlights span.ux-textspans"],
+                "pattern": r"\d+(?:\.\d+)?",
+            },
+            "specifications": {
+                "type": "pairs",
+                "rows": "dl.ux-labels-values",
+                "name": "dt.ux-labels-values__labels span.ux-textspans",
+                "value": "dd.ux-labels-values__values span.ux-textspans",
+            },
+            "feedback_link": {
+                "type": "first",
+                "selectors": [{"css": "a.fdbk-detail-list__btn-container__btn", "attr": "href"}],
+            },
+            "reviews": {
+                "type": "all",
+                "selectors": ["div.fdbk-container__details__comment span"],
+                "longer_than": 10,
+            },
+        },
+        "reviews": {
+            "reviews": {
+                "type": "all",
+                "selectors": ["div.fdbk-container__details__comment span"],
+                "longer_than": 10,
+            },
+        },
+    },
+}
@@ -0,0 +1,137 @@
+# scrapers/snapshots.py
+# Raw HTML snapshot store. Every page the extractors read can be kept on disk so a
+# broken selector can be fixed and re-run offline (scrapers/offline.py) instead of
+# re-crawling. Pages are content-addressed (sha256 of the HTML, so identical
+# pages are stored once) and compressed with zstd when `zstandard` is installed,
+# gzip otherwise. index.jsonl maps url + fetch time to the stored object.
+#   SCRAPER_SNAPSHOTS=true                    turn capturing on (off by default)
+#   SCRAPER_SNAPSHOT_DIR=./data/snapshots     where objects and the index live
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime, timezone
+from typing import Iterator, Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+SNAPSHOTS_ENABLED = os.getenv("SCRAPER_SNAPSHOTS", "false").lower() in ("1", "true", "yes")
+SNAPSHOT_DIR = os.getenv("SCRAPER_SNAPSHOT_DIR", os.path.join("data", "snapshots"))
+
+CODECS = {
+    "zst": (
+        lambda data: zstandard.ZstdCompressor(level=10).compress(data),
+        lambda data: zstandard.ZstdDecompressor().decompress(data),
+    ),
+    "gz": (
+        lambda data: gzip.compress(data, compresslevel=6),
+        gzip.decompress,
+    ),
+}
+
+
+class SnapshotStore:
+    def __init__(self, root: str = SNAPSHOT_DIR, enabled: bool = SNAPSHOTS_ENABLED):
+        self.root = root
+        self.enabled = enabled
+        self.codec = "zst" if zstandard is not None else "gz"
+        self._index_lock = threading.Lock()
+        self.stats = {"saved": 0, "deduplicated": 0, "raw_bytes": 0, "stored_bytes": 0, "errors": 0}
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.root, "index.jsonl")
+
+    def _object_path(self, digest: str, codec: str) -> str:
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.html.{codec}")
+
+    def save(self, url: str, platform: str, page_type: str, html: str,
+             fetched_at: Optional[datetime] = None) -> dict:
+        """Store `html` (once per distinct content) and append an index entry."""
+        data = html.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest, self.codec)
+        if os.path.exists(path):
+            self.stats["deduplicated"] += 1
+        else:
+            compressed = CODECS[self.codec][0](data)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            # Write then rename so a crash never leaves a truncated object behind
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp_path, path)
+            self.stats["saved"] += 1
+            self.stats["stored_bytes"] += len(compressed)
+        self.stats["raw_bytes"] += len(data)
+
+        entry = {
+            "url": url,
+            "platform": platform,
+            "page_type": page_type,
+            "fetched_at": (fetched_at or datetime.now(timezone.utc)).isoformat(),
+            "sha256": digest,
+            "codec": self.codec,
+            "size": len(data),
+        }
+        with self._index_lock:
+            with open(self.index_path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+        return entry
+
+    async def capture(self, page, platform: str, page_type: str) -> Optional[dict]:
+        """Snapshot the current DOM of a Playwright page; never fails the scrape."""
+        if not self.enabled:
+            return None
+        try:
+            html = await page.content()
+            return await asyncio.to_thread(self.save, page.url, platform, page_type, html)
+        except Exception as e:
+            self.stats["errors"] += 1
+            print(f"Error saving snapshot of {page.url}: {e}")
+            return None
+
+    def entries(self, platform: Optional[str] = None, page_type: Optional[str] = None,
+                url: Optional[str] = None, since: Optional[str] = None) -> Iterator[dict]:
+        """Index entries, oldest first. `since` is an ISO timestamp."""
+        if not os.path.exists(self.index_path):
+            return
+        with open(self.index_path, encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                if platform and entry["platform"] != platform:
+                    continue
+                if page_type and entry["page_type"] != page_type:
+                    continue
+                if url and entry["url"] != url:
+                    continue
+                if since and entry["fetched_at"] < since:
+                    continue
+                yield entry
+
+    def latest(self, url: str) -> Optional[dict]:
+        entry = None
+        for entry in self.entries(url=url):
+            pass
+        return entry
+
+    def load(self, entry: dict) -> str:
+        with open(self._object_path(entry["sha256"], entry["codec"]), "rb") as f:
+            return CODECS[entry["codec"]][1](f.read()).decode("utf-8")
+
+    def metrics(self) -> dict:
+        return {"enabled": self.enabled, "codec": self.codec, "root": self.root, **self.stats}
+
+
+snapshot_store = SnapshotStore()
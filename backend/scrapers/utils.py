@@ -0,0 +1,33 @@
+# scrapers/utils.py
+import asyncio
+import os
+
+# How many product pages of one platform scrape are extracted at the same time
+PAGE_CONCURRENCY = int(os.getenv("SCRAPER_PAGE_CONCURRENCY", "3"))
+
+
+async def scrape_pages(urls, scrape_one, concurrency=None, progress=None):
+    """Run `scrape_one(url, index)` over urls with a bounded number of pages open.
+
+    Results keep the order of `urls`; products that fail or return nothing are
+    dropped. `progress(done, total)` is awaited as each page finishes.
+    """
+    slots = asyncio.Semaphore(concurrency or PAGE_CONCURRENCY)
+    total = len(urls)
+    done = 0
+
+    async def run(index, url):
+        nonlocal done
+        async with slots:
+            try:
+                return await scrape_one(url, index)
+            except Exception as e:
+                print(f"Error processing product {index}: {e}")
+                return None
+            finally:
+                done += 1
+                if progress:
+                    await progress(done, total)
+
+    results = await asyncio.gather(*(run(index, url) for index, url in enumerate(urls, 1)))
+    return [result for result in results if result]
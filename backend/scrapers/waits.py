@@ -0,0 +1,78 @@
+# scrapers/waits.py
+# Event-driven readiness waits. Instead of sleeping a fixed few seconds after each
+# navigation, wait until the elements the extractor needs are actually in the DOM.
+import asyncio
+import os
+from typing import List
+
+READY_TIMEOUT_MS = int(os.getenv("SCRAPER_READY_TIMEOUT_MS", "10000"))
+# Price/review containers are not on every page, so don't wait long for them
+OPTIONAL_READY_TIMEOUT_MS = int(os.getenv("SCRAPER_OPTIONAL_READY_TIMEOUT_MS", "3000"))
+
+# platform -> page type -> selector groups. The first group must appear (usually
+# the title); the remaining groups (price, reviews, spec tables) are waited for
+# briefly, since the extractor reads the whole page in one snapshot.
+READY_SELECTORS = {
+    "amazon": {
+        "search": [
+            ["div[data-component-type='s-search-result']", "div.s-result-item h2"],
+        ],
+        "product": [
+            ["span#productTitle", "input#productTitle"],
+            [".a-price .a-price-whole"],
+            ["div[data-hook='review']", "#cm-cr-dp-review-list"],
+            ["table#productDetails_detailBullets_sections1"],
+        ],
+    },
+    "flipkart": {
+        "search": [
+            ["a._1fQZEK", "a.s1Q9rs", "a[href*='/p/']"],
+        ],
+        "product": [
+            ["span.B_NuCI", "._4rR01T", ".yhB1nd", "h1"],
+            ["div.Nx9bqj.CxhGGd", "div._30jeq3._16Jk6d"],
+            ["div.col.EPCmJX", "a[href*='product-reviews']"],
+            ["tr.WJdYP6"],
+        ],
+        "reviews": [
+            ["div.col.EPCmJX"],
+        ],
+    },
+    "ebay": {
+        "search": [
+            ["li.s-item"],
+        ],
+        "product": [
+            ["h1.x-item-title__mainTitle", "h1[itemprop='name']"],
+            ["[data-testid='x-price-primary']"],
+            ["div.ux-layout-section-module-evo"],
+        ],
+        "reviews": [
+            ["div.fdbk-container__details__comment"],
+        ],
+    },
+}
+
+
+async def wait_for_any(page, selectors: List[str], timeout: int = READY_TIMEOUT_MS) -> bool:
+    """Wait until any of `selectors` is attached. Returns False on timeout instead of raising."""
+    try:
+        # A CSS selector list matches as soon as one of its parts does
+        await page.wait_for_selector(", ".join(selectors), state="attached", timeout=timeout)
+        return True
+    except Exception:
+        return False
+
+
+async def wait_ready(page, platform: str, page_type: str, timeout: int = READY_TIMEOUT_MS) -> bool:
+    """Wait for the readiness selectors of a page type; True if the required group showed up."""
+    groups = READY_SELECTORS.get(platform, {}).get(page_type)
+    if not groups:
+        return True
+    required, *optional = groups
+    waits = [wait_for_any(page, required, timeout)]
+    waits += [wait_for_any(page, group, min(timeout, OPTIONAL_READY_TIMEOUT_MS)) for group in optional]
+    ready, *_ = await asyncio.gather(*waits)
+    if not ready:
+        print(f"Warning: {platform} {page_type} page not ready after {timeout}ms: {page.url}")
+    return ready
@@ -62,7 +62,7 @@ async def get_current_user(token: str = Depends(oauth2_scheme)) -> UserModel:
         raise credentials_exception
     
     try:
-        user = users_collection.find_one({"_id": ObjectId(token_data.user_id), "email": token_data.email})
+        user = await users_collection.find_one({"_id": ObjectId(token_data.user_id), "email": token_data.email})
         if user is None:
             raise credentials_exception
         return UserModel(**user)
@@ -0,0 +1,170 @@
+# utils/chunking.py
+# Token-aware text chunking shared by RAG ingestion (and anything else that has to
+# fit text into token budgets). The tiktoken encoder is built once per process;
+# chunk_texts() encodes a whole list of reviews with a single encode_batch call.
+# Micro-benchmark against the old per-call chunker:
+#   python -m backend.utils.chunking --reviews 5000
+import argparse
+import os
+import re
+import time
+from functools import lru_cache
+from typing import List, Sequence
+
+import tiktoken
+
+ENCODING_NAME = os.getenv("CHUNK_ENCODING", "cl100k_base")
+ENCODE_THREADS = int(os.getenv("CHUNK_ENCODE_THREADS", "8"))
+
+# Split after sentence punctuation or at line breaks
+SENTENCE_BOUNDARY = re.compile(r"(?<=[.!?])\s+|\n+")
+
+
+@lru_cache(maxsize=None)
+def get_encoder(name: str = ENCODING_NAME):
+    return tiktoken.get_encoding(name)
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoder().encode(text))
+
+
+def _windows(tokens: Sequence[int], max_tokens: int, overlap: int) -> List[Sequence[int]]:
+    if len(tokens) <= max_tokens:
+        return [tokens]
+    step = max_tokens - overlap
+    # Stop once the remaining tokens are all covered by the previous window's overlap
+    return [tokens[i:i + max_tokens] for i in range(0, len(tokens) - overlap, step)]
+
+
+def _pack_sentences(sentences: List[str], counts: List[int], tokens: List[List[int]],
+                    max_tokens: int, overlap: int) -> List[str]:
+    """Greedily pack whole sentences into chunks of at most `max_tokens`."""
+    encoder = get_encoder()
+    chunks: List[str] = []
+    current: List[int] = []  # indexes into sentences
+    size = 0
+    fresh = False  # does `current` hold anything not already emitted?
+
+    def flush():
+        nonlocal current, size, fresh
+        if fresh:
+            chunks.append(" ".join(sentences[i] for i in current))
+        # Carry trailing sentences into the next chunk as overlap
+        carried, carried_size = [], 0
+        for i in reversed(current):
+            if carried_size + counts[i] > overlap:
+                break
+            carried.insert(0, i)
+            carried_size += counts[i]
+        current, size, fresh = carried, carried_size, False
+
+    for i, count in enumerate(counts):
+        if count > max_tokens:
+            # A single sentence longer than a chunk falls back to token windows
+            flush()
+            current, size = [], 0
+            chunks.extend(encoder.decode_batch(_windows(tokens[i], max_tokens, overlap)))
+            continue
+        if size + count > max_tokens:
+            flush()
+            # Drop carried sentences if they leave no room for this one
+            while current and size + count > max_tokens:
+                size -= counts[current.pop(0)]
+        current.append(i)
+        size += count
+        fresh = True
+    if fresh:
+        chunks.append(" ".join(sentences[i] for i in current))
+    return chunks
+
+
+def chunk_texts(texts: Sequence[str], max_tokens: int = 400, overlap: int = 0,
+                snap_sentences: bool = False) -> List[List[str]]:
+    """Chunk many texts at once; returns one list of chunks per input text.
+
+    `overlap` tokens are repeated between consecutive chunks. With
+    `snap_sentences` chunks end on sentence boundaries (a sentence that alone
+    exceeds `max_tokens` is still split by tokens).
+    """
+    if overlap >= max_tokens:
+        raise ValueError("overlap must be smaller than max_tokens")
+    encoder = get_encoder()
+    texts = [str(text) for text in texts]
+
+    if not snap_sentences:
+        token_lists = encoder.encode_batch(texts, num_threads=ENCODE_THREADS)
+        results = []
+        for text, tokens in zip(texts, token_lists):
+            if len(tokens) <= max_tokens:
+                # Most reviews fit in one chunk: no decode needed
+                results.append([text] if text.strip() else [])
+            else:
+                results.append(encoder.decode_batch(_windows(tokens, max_tokens, overlap)))
+        return results
+
+    # Encode every sentence of every text in one batch, then pack per text
+    split = [[s.strip() for s in SENTENCE_BOUNDARY.split(text) if s and s.strip()] for text in texts]
+    flat = [sentence for sentences in split for sentence in sentences]
+    flat_tokens = encoder.encode_batch(flat, num_threads=ENCODE_THREADS)
+    results, offset = [], 0
+    for sentences in split:
+        tokens = flat_tokens[offset:offset + len(sentences)]
+        offset += len(sentences)
+        results.append(_pack_sentences(sentences, [len(t) for t in tokens], tokens, max_tokens, overlap))
+    return results
+
+
+def chunk_text(text: str, max_tokens: int = 400, overlap: int = 0, snap_sentences: bool = False) -> List[str]:
+    """Split text into chunks of at most max_tokens tokens."""
+    return chunk_texts([text], max_tokens, overlap, snap_sentences)[0]
+
+
+# ---- micro-benchmark -------------------------------------------------------
+
+def _legacy_chunk_text(text: str, max_tokens: int = 400) -> List[str]:
+    # The chunker rag_agent used before: new encoder per call, one decode per window
+    tokenizer = tiktoken.get_encoding("cl100k_base")
+    tokens = tokenizer.encode(text)
+    return [tokenizer.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def _sample_reviews(count: int) -> List[str]:
+    sentences = [
+        "Battery life is great and lasts two days.",
+        "The screen scratches too easily!",
+        "Delivery was quick, packaging was fine.",
+        "Would I buy it again? Probably yes.",
+        "Sound quality is average for the price.",
+    ]
+    return [" ".join(sentences[(i + j) % len(sentences)] for j in range(3 + i % 40)) for i in range(count)]
+
+
+def benchmark(reviews: int = 5000, max_tokens: int = 400):
+    texts = _sample_reviews(reviews)
+    get_encoder()  # not part of the measured work: it is built once per process
+
+    started = time.perf_counter()
+    legacy = [_legacy_chunk_text(text, max_tokens) for text in texts]
+    legacy_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batched = chunk_texts(texts, max_tokens)
+    batched_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    chunk_texts(texts, max_tokens, overlap=40, snap_sentences=True)
+    snapped_s = time.perf_counter() - started
+
+    print(f"{reviews} reviews, max_tokens={max_tokens}")
+    print(f"  legacy chunk_text     {legacy_s:8.3f}s  ({sum(map(len, legacy))} chunks)")
+    print(f"  chunk_texts           {batched_s:8.3f}s  ({sum(map(len, batched))} chunks, {legacy_s / batched_s:.1f}x)")
+    print(f"  chunk_texts (snapped) {snapped_s:8.3f}s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Chunker micro-benchmark")
+    parser.add_argument("--reviews", type=int, default=5000)
+    parser.add_argument("--max-tokens", type=int, default=400)
+    args = parser.parse_args()
+    benchmark(args.reviews, args.max_tokens)
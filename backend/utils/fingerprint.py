@@ -0,0 +1,48 @@
+# utils/fingerprint.py
+# Stable review fingerprints: a hash of whitespace/case-normalized text plus the
+# author and date when a scraper provides them. Used for in-run dedup (a set of
+# fingerprints instead of `review not in reviews`) and, through the unique index
+# on review_fingerprints, for dedup across scrape runs.
+import hashlib
+import re
+import unicodedata
+from typing import Iterable, List, Optional, Set, Union
+
+Review = Union[str, dict]
+
+
+def normalize_text(text: Optional[str]) -> str:
+    text = unicodedata.normalize("NFKC", str(text or ""))
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def review_text(review: Review) -> str:
+    if isinstance(review, dict):
+        return review.get("text") or review.get("body") or ""
+    return review
+
+
+def review_fingerprint(review: Review, author: Optional[str] = None, date: Optional[str] = None) -> str:
+    """sha1 of normalized text (+ author/date); reviews may be plain strings or dicts."""
+    if isinstance(review, dict):
+        author = author or review.get("author")
+        date = date or review.get("date")
+    parts = [normalize_text(review_text(review))]
+    if author or date:
+        parts += [normalize_text(author), normalize_text(date)]
+    return hashlib.sha1("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+def dedupe_reviews(reviews: Iterable[Review], seen: Optional[Set[str]] = None) -> List[Review]:
+    """Drop repeated reviews in O(n), keeping the first occurrence and the order.
+
+    `seen` is updated in place, so it can be shared across pages of one run.
+    """
+    seen = seen if seen is not None else set()
+    unique = []
+    for review in reviews:
+        digest = review_fingerprint(review)
+        if digest not in seen:
+            seen.add(digest)
+            unique.append(review)
+    return unique
@@ -0,0 +1,47 @@
+# utils/import_budget.py
+# Cold-import check: imports each entry point in a fresh interpreter and fails
+# when one takes longer than the budget. Run from the repo root:
+#   python -m backend.utils.import_budget --budget 1.0
+# tests/test_import_budget.py runs the same check under pytest.
+# `-X importtime` on the slow module shows which import to make lazy.
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "1.0"))
+MODULES = ["backend.main", "backend.jobs.worker"]
+
+_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+
+
+def import_seconds(module: str) -> float:
+    # Fresh process so nothing is already in sys.modules; no Mongo/OpenAI needed to import
+    env = {**os.environ, "MONGO_URI": os.getenv("MONGO_URI", "mongodb://localhost:27017"),
+           "DATABASE_NAME": os.getenv("DATABASE_NAME", "import_budget")}
+    out = subprocess.run([sys.executable, "-c", _SNIPPET.format(module=module)],
+                         capture_output=True, text=True, env=env, check=True)
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def check(modules: List[str]) -> Dict[str, float]:
+    return {module: import_seconds(module) for module in modules}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fail when cold imports exceed the budget")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--budget", type=float, default=IMPORT_BUDGET_SECONDS, help="seconds per module")
+    args = parser.parse_args()
+
+    over = False
+    for module, seconds in check(args.modules).items():
+        ok = seconds <= args.budget
+        over |= not ok
+        print(f"{'✅' if ok else '❌'} {module}: {seconds:.3f}s (budget {args.budget:.2f}s)")
+    sys.exit(1 if over else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# utils/pagination.py
+# Cursor pagination for list endpoints. Pages are ordered by _id and the next
+# page starts after the last _id returned, handed back in the X-Next-Cursor
+# header (absent on the last page). format=ndjson streams every matching
+# document instead, one JSON object per line, for bulk exports.
+import os
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple, Type
+
+from bson import ObjectId
+from fastapi import HTTPException
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+DEFAULT_PAGE_SIZE = int(os.getenv("API_PAGE_SIZE", "50"))
+MAX_PAGE_SIZE = int(os.getenv("API_MAX_PAGE_SIZE", "500"))
+NDJSON_BATCH_SIZE = int(os.getenv("API_NDJSON_BATCH_SIZE", "200"))
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def after_cursor(query: Dict[str, Any], cursor: Optional[str]) -> Dict[str, Any]:
+    if not cursor:
+        return query
+    if not ObjectId.is_valid(cursor):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return {**query, "_id": {"$gt": ObjectId(cursor)}}
+
+
+async def fetch_page(collection, query: Dict[str, Any], limit: int, cursor: Optional[str] = None,
+                     projection: Optional[Dict[str, int]] = None) -> Tuple[List[dict], Optional[str]]:
+    """One page of documents and the cursor for the next page (None on the last one)."""
+    # One extra document tells whether there is a next page
+    docs = await collection.find(after_cursor(query, cursor), projection).sort("_id", 1).limit(limit + 1).to_list(None)
+    next_cursor = str(docs[limit - 1]["_id"]) if len(docs) > limit else None
+    return docs[:limit], next_cursor
+
+
+def ndjson_response(collection, query: Dict[str, Any], model: Type[BaseModel], cursor: Optional[str] = None,
+                    projection: Optional[Dict[str, int]] = None,
+                    prepare: Optional[Callable[[dict], Awaitable[None]]] = None) -> StreamingResponse:
+    """Stream all matching documents as NDJSON, validated one at a time.
+
+    `prepare` fills in data kept outside the document (e.g. bucketed reviews) before validation.
+    """
+    find = collection.find(after_cursor(query, cursor), projection, batch_size=NDJSON_BATCH_SIZE).sort("_id", 1)
+
+    async def lines():
+        async for doc in find:
+            if prepare:
+                await prepare(doc)
+            yield model(**doc).model_dump_json(by_alias=True) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
@@ -0,0 +1,29 @@
+# tests/test_import_budget.py
+# Cold-import budget for the API and worker entry points (see backend/utils/import_budget.py).
+# Skipped unless the backend's runtime dependencies are installed. Run from the repo root:
+#   python -m pytest tests
+import subprocess
+
+import pytest
+
+from backend.utils.import_budget import IMPORT_BUDGET_SECONDS, MODULES, import_seconds
+
+# Imported at module level somewhere under backend.main / backend.jobs.worker
+# (chromadb, nltk, sentence_transformers... load lazily and aren't needed here)
+RUNTIME_DEPS = ["autogen_agentchat", "autogen_core", "dotenv", "email_validator", "fastapi", "httpx", "jose",
+                "passlib", "playwright", "pymongo", "tiktoken"]
+
+for _dep in RUNTIME_DEPS:
+    pytest.importorskip(_dep)
+
+
+@pytest.mark.parametrize("module", MODULES)
+def test_cold_import_within_budget(module):
+    try:
+        seconds = import_seconds(module)
+    except subprocess.CalledProcessError as e:
+        pytest.fail(f"importing {module} failed:\n{e.stderr}")
+    assert seconds <= IMPORT_BUDGET_SECONDS, (
+        f"{module} took {seconds:.3f}s to import (budget {IMPORT_BUDGET_SECONDS:.2f}s); "
+        f"`python -X importtime -c 'import {module}'` shows which import to make lazy"
+    )